@@ -14,6 +14,7 @@ from pathlib import Path
 
 import environ
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover every other middleware.
+    'forum.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,13 +53,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'forum.routers.PrimaryPinningMiddleware',
 ]
 
 ROOT_URLCONF = 'Answerly.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates with render timing for forum.instrumentation.
+        'BACKEND': 'forum.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -75,10 +80,37 @@ WSGI_APPLICATION = 'Answerly.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite tuned for concurrent web traffic. WAL lets readers carry on while one
+# connection writes, and IMMEDIATE transactions take the write lock up front,
+# where the busy timeout applies, instead of failing on a lock upgrade midway.
+# The busy timeout is kept short: a write that still cannot get the lock is
+# retried with jittered backoff (forum.domain.retry), so a contended request
+# waits a few seconds in total rather than the timeout once per attempt.
+# `manage.py benchmark_sqlite` compares this profile with the stock settings.
+SQLITE_OPTIONS = {
+    'timeout': 2,
+    'transaction_mode': 'IMMEDIATE',
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA mmap_size=134217728;'
+        'PRAGMA cache_size=-20000;'
+        'PRAGMA temp_store=MEMORY;'
+    ),
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+        # Reuse each thread's connection instead of reopening (and re-running the
+        # pragmas) on every request; health checks drop connections that went bad.
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        # A file-backed test database gives concurrent test threads real SQLite locking;
+        # the in-memory shared cache fails them with "database table is locked".
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -136,7 +168,34 @@ env = environ.Env(
 # Read the .env file
 environ.Env.read_env(os.path.join(BASE_DIR, '.env'))
 
-EMAIL_BACKEND = env('EMAIL_BACKEND')
+# Read replica for listing and detail pages, only used once it is listed in
+# FORUM_READ_REPLICAS. Its test database is a separate file so tests can
+# simulate replication lag.
+DATABASES['replica'] = {
+    **(
+        env.db('REPLICA_DATABASE_URL') if env('REPLICA_DATABASE_URL', default='')
+        else {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'db.sqlite3', 'OPTIONS': SQLITE_OPTIONS}
+    ),
+    'TEST': {'NAME': BASE_DIR / 'test_replica.sqlite3'},
+}
+DATABASE_ROUTERS = ['forum.routers.ReplicaRouter']
+
+# Aliases that read-only forum views may read from, and how long a client
+# that just wrote something keeps reading from the primary instead.
+FORUM_READ_REPLICAS = env.list('FORUM_READ_REPLICAS', default=[])
+FORUM_REPLICA_PIN_SECONDS = env.int('FORUM_REPLICA_PIN_SECONDS', default=10)
+
+# Outgoing mail is queued in the database outbox (accounts.OutboxEmail) and delivered by
+# `manage.py send_outbox` through OUTBOX_DELIVERY_BACKEND, so a slow relay never blocks a
+# request. Point OUTBOX_DELIVERY_BACKEND at the console or filebased backend to try it locally.
+# Deployments that predate the outbox set EMAIL_BACKEND to their relay; it becomes the
+# delivery backend unless OUTBOX_DELIVERY_BACKEND is set.
+EMAIL_BACKEND = 'accounts.outbox.OutboxEmailBackend'
+OUTBOX_DELIVERY_BACKEND = env(
+    'OUTBOX_DELIVERY_BACKEND',
+    default=env('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend'),
+)
+EMAIL_FILE_PATH = env('EMAIL_FILE_PATH', default=str(BASE_DIR / 'sent_emails'))
 EMAIL_HOST = env('EMAIL_HOST')
 EMAIL_USE_TLS = env.bool('EMAIL_USE_TLS')
 EMAIL_PORT = env.int('EMAIL_PORT')
@@ -146,3 +205,76 @@ DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL')
 SECRET_KEY = env('SECRET_KEY')
 DEBUG = env('DEBUG')
 ALLOWED_HOSTS = env.list('ALLOWED_HOSTS')
+
+# Shared cache used for the tag catalog. Point CACHE_URL at Redis/Memcached when
+# running more than one worker process so invalidations reach every worker.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Serve the vote endpoint and the HTMX answer/comment partials with their
+# async views at the regular URLs. Needs an ASGI server (Answerly.asgi);
+# the async views are always reachable under /async/ as well.
+FORUM_ASYNC_VIEWS = env.bool('FORUM_ASYNC_VIEWS', default=False)
+
+# Live vote counts and new-answer notices on question pages. The event
+# streams never end, so enable this only when serving Answerly.asgi; it
+# follows FORUM_ASYNC_VIEWS unless set explicitly.
+FORUM_LIVE_UPDATES = env.bool('FORUM_LIVE_UPDATES', default=FORUM_ASYNC_VIEWS)
+
+# Fan-out for the live question event streams. The default only reaches
+# clients connected to the same process; multi-process deployments need a
+# shared broker implementing forum.domain.live.Broker.
+FORUM_LIVE_BROKER = env('FORUM_LIVE_BROKER', default='forum.domain.live.LocalMemoryBroker')
+
+# Near-duplicate question index (forum.domain.duplicates), written by
+# `manage.py build_duplicate_index`. Until the file exists no duplicates are
+# suggested; each process loads it on its first lookup after that.
+FORUM_DUPLICATE_INDEX_PATH = env('FORUM_DUPLICATE_INDEX_PATH', default=str(BASE_DIR / 'duplicate_index.bin'))
+
+# Per-request performance instrumentation (forum.instrumentation). With
+# FORUM_SERVER_TIMING set, responses to staff users (and to everyone under DEBUG)
+# carry a Server-Timing header; it reveals database time and query counts, so it
+# is off by default. Each request is logged as one JSON line to the
+# forum.performance logger (at INFO, slow ones at WARNING), and a sample of the
+# slow ones is written with their SQL to a rotating file. Query parameters are
+# left out of that file unless FORUM_SLOW_REQUEST_LOG_PARAMS is set: they include
+# session keys and user data, so only enable it for local debugging.
+FORUM_SERVER_TIMING = env.bool('FORUM_SERVER_TIMING', default=False)
+FORUM_SLOW_REQUEST_MS = env.int('FORUM_SLOW_REQUEST_MS', default=500)
+FORUM_SLOW_REQUEST_SAMPLE_RATE = env.float('FORUM_SLOW_REQUEST_SAMPLE_RATE', default=0.1)
+FORUM_SLOW_REQUEST_LOG_PARAMS = env.bool('FORUM_SLOW_REQUEST_LOG_PARAMS', default=False)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json_line': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+    },
+    'handlers': {
+        'performance': {'class': 'logging.StreamHandler', 'formatter': 'json_line'},
+        'slow_requests': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': env('FORUM_SLOW_REQUEST_LOG', default=str(BASE_DIR / 'slow_requests.log')),
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'json_line',
+        },
+    },
+    'loggers': {
+        # Set FORUM_PERFORMANCE_LOG_LEVEL=INFO to log every request, not only slow ones.
+        'forum.performance': {
+            'handlers': ['performance'],
+            'level': env('FORUM_PERFORMANCE_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+        'forum.performance.slow': {'handlers': ['slow_requests'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
+# The test suite is slow by design (password hashing, lock contention tests), so keep its
+# requests out of the slow-request warnings and the slow log; tests capture them with assertLogs.
+if sys.argv[1:2] == ['test']:
+    for name in ('forum.performance', 'forum.performance.slow'):
+        LOGGING['loggers'][name]['level'] = 'ERROR'
@@ -0,0 +1,41 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.outbox import BATCH_SIZE, MAX_ATTEMPTS, deliver_outbox, outbox_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued outbox emails in batches over one reused connection, retrying failures "
+        "with backoff. With --interval it keeps running as a worker loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Emails leased per batch.")
+        parser.add_argument(
+            "--max-attempts", type=int, default=MAX_ATTEMPTS, help="Attempts before an email is marked failed."
+        )
+        parser.add_argument("--interval", type=float, help="Keep polling, sleeping this many seconds between drains.")
+        parser.add_argument("--stats", action="store_true", help="Print queue depth and latency metrics as JSON and exit.")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.stdout.write(json.dumps(outbox_stats(), indent=2))
+            return
+
+        while True:
+            start = time.perf_counter()
+            report = deliver_outbox(batch_size=options["batch_size"], max_attempts=options["max_attempts"])
+            if report["send_ms"] or options["interval"] is None:
+                median = statistics.median(report["send_ms"]) if report["send_ms"] else 0
+                self.stdout.write(
+                    f"Sent {report['sent']}, retrying {report['retrying']}, failed {report['failed']} "
+                    f"in {(time.perf_counter() - start) * 1000:.1f}ms (median send {median:.1f}ms); "
+                    f"{outbox_stats()['pending']} pending."
+                )
+            if options["interval"] is None:
+                return
+            time.sleep(options["interval"])
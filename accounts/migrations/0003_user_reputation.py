@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_outbox_email'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='reputation',
+            field=models.IntegerField(default=0, help_text="Points earned from votes on this user's posts; the sum of their reputation ledger."),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-reputation', 'id'], name='accounts_user_reputation_idx'),
+        ),
+    ]
@@ -1,6 +1,51 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 class User(AbstractUser):
     email = models.EmailField(unique=True)
+    reputation = models.IntegerField(
+        default=0,
+        help_text="Points earned from votes on this user's posts; the sum of their reputation ledger.",
+    )
     REQUIRED_FIELDS = ['email']
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=["-reputation", "id"], name="accounts_user_reputation_idx"),
+        ]
+
+
+class OutboxEmail(models.Model):
+    """An outgoing email queued by ``accounts.outbox.OutboxEmailBackend`` until the worker delivers it."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
+
+    subject = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list)
+    bcc = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list)
+    headers = models.JSONField(default=dict)
+    alternatives = models.JSONField(default=list, help_text="[content, mimetype] pairs, e.g. the HTML part.")
+    attachments = models.JSONField(default=list, help_text="[filename, base64 content, mimetype] triples.")
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="When the worker may (re)try delivery.")
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at", "id"], name="accounts_outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
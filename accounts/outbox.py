@@ -0,0 +1,187 @@
+"""
+Database outbox for outgoing email.
+
+``OutboxEmailBackend`` stores messages instead of sending them, so requests
+never wait on the mail relay. ``manage.py send_outbox`` drains the table
+through ``settings.OUTBOX_DELIVERY_BACKEND`` over one reused connection,
+retrying failures with exponential backoff.
+"""
+
+import base64
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from accounts.models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DELIVERY_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+OUTBOX_BACKEND = "accounts.outbox.OutboxEmailBackend"
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 60 * 60
+# A claimed batch stays invisible to other workers this long, so a crashed worker's batch is retried later.
+CLAIM_LEASE_SECONDS = 5 * 60
+
+
+def serialize_message(message):
+    """Turn an ``EmailMessage`` into an unsaved ``OutboxEmail`` row."""
+    attachments = []
+    for attachment in message.attachments:
+        if not isinstance(attachment, tuple):
+            raise ValueError("The email outbox only stores (filename, content, mimetype) attachments.")
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append([filename, base64.b64encode(content).decode("ascii"), mimetype])
+
+    return OutboxEmail(
+        subject=message.subject,
+        body=message.body,
+        from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(message.to),
+        cc=list(message.cc),
+        bcc=list(message.bcc),
+        reply_to=list(message.reply_to),
+        headers=dict(message.extra_headers),
+        alternatives=[[content, mimetype] for content, mimetype in getattr(message, "alternatives", [])],
+        attachments=attachments,
+    )
+
+
+def build_message(email, connection=None):
+    """Rebuild the ``EmailMultiAlternatives`` stored in an ``OutboxEmail`` row."""
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        cc=email.cc,
+        bcc=email.bcc,
+        reply_to=email.reply_to,
+        headers=email.headers,
+        alternatives=[tuple(alternative) for alternative in email.alternatives],
+        connection=connection,
+    )
+    for filename, content, mimetype in email.attachments:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Email backend that queues messages in the outbox table.
+
+    Rows are written in the caller's transaction, so a message is only
+    queued if the surrounding work commits.
+    """
+
+    def send_messages(self, email_messages):
+        rows = [serialize_message(message) for message in email_messages if message.recipients()]
+        OutboxEmail.objects.bulk_create(rows)
+        return len(rows)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def claim_due_emails(limit):
+    """Lease up to `limit` due emails to this worker and return them."""
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.Status.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:limit]
+        )
+        OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+        )
+    return emails
+
+
+def deliver_email(email, connection, max_attempts=MAX_ATTEMPTS):
+    """Send one leased email and record the outcome: "sent", "retrying" or "failed"."""
+    email.attempts += 1
+    try:
+        connection.open()
+        if not connection.send_messages([build_message(email, connection)]):
+            raise RuntimeError("The delivery backend did not send the message.")
+    except Exception as exc:
+        # Drop a possibly broken session; the next message reconnects.
+        connection.close()
+        email.last_error = f"{type(exc).__name__}: {exc}"
+        if email.attempts >= max_attempts:
+            email.status = OutboxEmail.Status.FAILED
+        else:
+            email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+        logger.warning("Outbox email %s attempt %s failed: %s", email.pk, email.attempts, email.last_error)
+        return "failed" if email.status == OutboxEmail.Status.FAILED else "retrying"
+
+    email.status = OutboxEmail.Status.SENT
+    email.sent_at = timezone.now()
+    email.last_error = ""
+    email.save(update_fields=["attempts", "last_error", "status", "sent_at"])
+    return "sent"
+
+
+def deliver_outbox(batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS, connection=None):
+    """Drain every due email in batches over one delivery connection.
+
+    Returns the outcome counts plus the per-message send times in milliseconds.
+    """
+    if connection is None:
+        backend = getattr(settings, "OUTBOX_DELIVERY_BACKEND", DEFAULT_DELIVERY_BACKEND)
+        if backend == OUTBOX_BACKEND:
+            # Delivering through the outbox would only queue every message again.
+            raise ImproperlyConfigured("OUTBOX_DELIVERY_BACKEND must be a backend that sends mail, not the outbox.")
+        connection = get_connection(backend)
+    report = {"sent": 0, "retrying": 0, "failed": 0, "send_ms": []}
+    try:
+        while emails := claim_due_emails(batch_size):
+            for email in emails:
+                start = time.perf_counter()
+                report[deliver_email(email, connection, max_attempts)] += 1
+                report["send_ms"].append((time.perf_counter() - start) * 1000)
+    finally:
+        connection.close()
+    return report
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def outbox_stats(window=timedelta(hours=1)):
+    """Queue depth and delivery latency (enqueue to sent, in seconds) over the last `window`."""
+    now = timezone.now()
+    pending = OutboxEmail.objects.filter(status=OutboxEmail.Status.PENDING)
+    oldest = pending.aggregate(oldest=Min("created_at"))["oldest"]
+    latencies = sorted(
+        (sent_at - created_at).total_seconds()
+        for created_at, sent_at in OutboxEmail.objects.filter(
+            status=OutboxEmail.Status.SENT, sent_at__gte=now - window
+        ).values_list("created_at", "sent_at")
+    )
+    return {
+        "pending": pending.count(),
+        "due": pending.filter(next_attempt_at__lte=now).count(),
+        "failed": OutboxEmail.objects.filter(status=OutboxEmail.Status.FAILED).count(),
+        "oldest_pending_seconds": (now - oldest).total_seconds() if oldest else None,
+        "sent_in_window": len(latencies),
+        "latency_p50_seconds": percentile(latencies, 0.5),
+        "latency_p95_seconds": percentile(latencies, 0.95),
+    }
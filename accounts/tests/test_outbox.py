@@ -0,0 +1,134 @@
+import json
+from io import StringIO
+from smtplib import SMTPServerDisconnected
+
+from django.core import mail
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import EmailMultiAlternatives, send_mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+
+from accounts.models import OutboxEmail
+from accounts.outbox import deliver_outbox, outbox_stats
+
+User = get_user_model()
+
+OUTBOX_SETTINGS = {
+    "EMAIL_BACKEND": "accounts.outbox.OutboxEmailBackend",
+    "OUTBOX_DELIVERY_BACKEND": "django.core.mail.backends.locmem.EmailBackend",
+}
+
+
+class CountingBackend(BaseEmailBackend):
+    connections = 0
+    failures = 0
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        CountingBackend.connections += 1
+
+    def send_messages(self, email_messages):
+        if CountingBackend.failures:
+            CountingBackend.failures -= 1
+            raise SMTPServerDisconnected("relay went away")
+        mail.outbox.extend(email_messages)
+        return len(email_messages)
+
+
+@override_settings(**OUTBOX_SETTINGS)
+class OutboxEmailTests(TestCase):
+
+    def setUp(self):
+        CountingBackend.connections = 0
+        CountingBackend.failures = 0
+
+    def test_password_reset_is_queued_then_delivered(self):
+        User.objects.create_user(username="forgetful", email="forgetful@example.com", password="StrongPass123!")
+        self.client.post(reverse("password_reset"), {"email": "forgetful@example.com"})
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboxEmail.objects.get()
+        self.assertEqual(queued.to, ["forgetful@example.com"])
+
+        out = StringIO()
+        call_command("send_outbox", stdout=out)
+        self.assertIn("Sent 1, retrying 0, failed 0", out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["forgetful@example.com"])
+        self.assertEqual(mail.outbox[0].alternatives[0].mimetype, "text/html")
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, OutboxEmail.Status.SENT)
+
+    def test_message_is_only_queued_when_transaction_commits(self):
+        try:
+            with transaction.atomic():
+                send_mail("Rolled back", "Body", None, ["nobody@example.com"])
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_round_trips_attachments_and_headers(self):
+        message = EmailMultiAlternatives("Report", "See attached", "from@example.com", ["to@example.com"],
+                                         headers={"X-Forum": "digest"})
+        message.attach("report.csv", "a,b\n1,2\n", "text/csv")
+        message.send()
+
+        deliver_outbox()
+        delivered = mail.outbox[0]
+        self.assertEqual(delivered.extra_headers, {"X-Forum": "digest"})
+        self.assertEqual(delivered.attachments[0].filename, "report.csv")
+        self.assertEqual(delivered.attachments[0].content, "a,b\n1,2\n")
+
+    @override_settings(OUTBOX_DELIVERY_BACKEND="accounts.tests.test_outbox.CountingBackend")
+    def test_batches_reuse_one_connection(self):
+        for i in range(5):
+            send_mail(f"Digest {i}", "Body", None, [f"user{i}@example.com"])
+
+        report = deliver_outbox(batch_size=2)
+        self.assertEqual(report["sent"], 5)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingBackend.connections, 1)
+        self.assertEqual(OutboxEmail.objects.filter(status=OutboxEmail.Status.SENT).count(), 5)
+
+    @override_settings(OUTBOX_DELIVERY_BACKEND="accounts.tests.test_outbox.CountingBackend")
+    def test_failures_back_off_then_give_up(self):
+        send_mail("Flaky", "Body", None, ["flaky@example.com"])
+        CountingBackend.failures = 10
+
+        with self.assertLogs("accounts.outbox", "WARNING"):
+            report = deliver_outbox(max_attempts=2)
+        self.assertEqual(report["retrying"], 1)
+        queued = OutboxEmail.objects.get()
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn("relay went away", queued.last_error)
+        self.assertGreater(queued.next_attempt_at, timezone.now())
+
+        self.assertEqual(deliver_outbox(max_attempts=2)["retrying"], 0)
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        with self.assertLogs("accounts.outbox", "WARNING"):
+            self.assertEqual(deliver_outbox(max_attempts=2)["failed"], 1)
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.Status.FAILED)
+
+    def test_reports_queue_depth_and_latency(self):
+        send_mail("First", "Body", None, ["a@example.com"])
+        send_mail("Second", "Body", None, ["b@example.com"])
+        self.assertEqual(outbox_stats()["pending"], 2)
+
+        deliver_outbox(batch_size=1)
+        out = StringIO()
+        call_command("send_outbox", "--stats", stdout=out)
+        stats = json.loads(out.getvalue())
+        self.assertEqual((stats["pending"], stats["sent_in_window"]), (0, 2))
+        self.assertGreaterEqual(stats["latency_p95_seconds"], 0)
+
+    @override_settings(OUTBOX_DELIVERY_BACKEND="accounts.outbox.OutboxEmailBackend")
+    def test_refuses_to_deliver_through_the_outbox_itself(self):
+        send_mail("Looping", "Body", None, ["loop@example.com"])
+        with self.assertRaises(ImproperlyConfigured):
+            deliver_outbox()
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.Status.PENDING)
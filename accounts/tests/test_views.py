@@ -139,3 +139,25 @@ class UserProfileEditTests(TestCase):
         response = self.client.post(self.url, data)
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "This field is required.")
+
+
+class LeaderboardViewTests(TestCase):
+
+    def setUp(self):
+        self.url = reverse('leaderboard')
+        for name, reputation in (('low', 3), ('high', 50), ('none', 0), ('tied', 3)):
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='StrongPass123!', reputation=reputation)  # type: ignore
+
+    def test_leaderboard_orders_users_by_reputation(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'accounts/leaderboard.html')
+        self.assertEqual([user.username for user in response.context['leaders']], ['high', 'low', 'tied'])
+
+    def test_leaderboard_reads_the_reputation_index(self):
+        from django.db import connection
+        queryset = self.client.get(self.url).context['paginator'].object_list
+        plan = queryset.explain()
+        if connection.vendor == 'sqlite':
+            self.assertIn('accounts_user_reputation_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
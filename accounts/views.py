@@ -1,6 +1,7 @@
 from django.urls import reverse_lazy
+from django.views.generic import ListView
 from django.views.generic.edit import FormView,UpdateView
-from django.contrib.auth import login
+from django.contrib.auth import get_user_model, login
 from django.contrib import messages
 from .forms import UserRegisterForm,UserEditForm
 from django.contrib.auth.views import PasswordResetView
@@ -33,3 +34,18 @@ class ProfileView(LoginRequiredMixin, SuccessMessageMixin, UpdateView):
 
     def get_object(self, queryset=None):
         return self.request.user
+
+
+class LeaderboardView(ListView):
+    """Users by reputation, served from the index on ``(-reputation, id)``."""
+
+    template_name = 'accounts/leaderboard.html'
+    context_object_name = 'leaders'
+    paginate_by = 25
+
+    def get_queryset(self):
+        return (
+            get_user_model().objects.filter(is_active=True, reputation__gt=0)
+            .order_by('-reputation', 'id')
+            .only('id', 'username', 'reputation')
+        )
@@ -1,39 +1,79 @@
 from django.contrib import admin
 from django.contrib.contenttypes.admin import GenericTabularInline
+from django.contrib.contenttypes.prefetch import GenericPrefetch
 from .models import Question, Answer, Comment, Vote
+from .pagination import EstimatedCountPaginator
+
+
+def generic_target_prefetch():
+    """Resolve `content_object` for a whole changelist page with one query per content type.
+
+    The target querysets join whatever the targets' ``__str__`` reads.
+    """
+    return GenericPrefetch(
+        "content_object",
+        [
+            Question.objects.all(),
+            Answer.objects.select_related("author", "question"),
+            Comment.objects.select_related("author"),
+        ],
+    )
+
 
 class VoteInline(GenericTabularInline):
     model = Vote
     extra = 0
     readonly_fields = ("user", "vote_type", "created_at")
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("user")
+
 class CommentInline(GenericTabularInline):
     model = Comment
     extra = 0
     fields = ("author", "content", "parent", "created_at")
     readonly_fields = ("created_at",)
+    raw_id_fields = ("author", "parent")
 
 class AnswerInline(admin.TabularInline):
     model = Answer
     extra = 0
     fields = ("author", "content", "created_at")
     readonly_fields = ("created_at",)
+    raw_id_fields = ("author",)
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
     list_display = ("title", "author", "created_at")
+    list_select_related = ("author",)
+    raw_id_fields = ("author",)
     inlines = [AnswerInline, VoteInline]
 
 @admin.register(Answer)
 class AnswerAdmin(admin.ModelAdmin):
     list_display = ("question", "author", "created_at")
+    list_select_related = ("question", "author")
+    raw_id_fields = ("question", "author")
     inlines = [CommentInline, VoteInline]
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ("content_object", "author", "parent", "created_at")
+    list_select_related = ("author", "parent__author")
+    raw_id_fields = ("author", "parent")
     inlines = [CommentInline,VoteInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(generic_target_prefetch())
+
 @admin.register(Vote)
 class VoteAdmin(admin.ModelAdmin):
     list_display = ("content_object", "user", "vote_type", "created_at")
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+    paginator = EstimatedCountPaginator
+    # The unfiltered total would be a second COUNT(*) over the whole table.
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(generic_target_prefetch())
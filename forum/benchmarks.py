@@ -0,0 +1,273 @@
+"""
+Query-count and latency benchmarks for every forum and accounts endpoint.
+
+``seed_dataset`` builds a synthetic forum, ``run_benchmarks`` requests each
+route through the test client and records query count, SQL time and wall
+time percentiles, and ``QUERY_BUDGETS`` holds the per-route query ceilings
+enforced by ``manage.py benchmark_endpoints`` and
+``forum.tests.TestEndpointQueryBudgets``.
+"""
+
+import math
+import random
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from taggit.models import Tag, TaggedItem
+
+from forum.domain.comments import rebuild_comment_paths
+from forum.domain.tags import invalidate_tag_catalog
+from forum.domain.vote import VOTABLE_MODELS, rebuild_vote_counters
+from forum.models import Answer, Comment, Question, Vote
+
+User = get_user_model()
+
+BENCHMARKED_URLCONFS = ("forum.urls", "accounts.urls", "django.contrib.auth.urls")
+
+PROFILES = ("anonymous", "authenticated")
+
+# Routes that only accept POST; everything else is requested with GET.
+POST_ROUTES = {"logout", "vote", "vote-async"}
+
+# Long-lived streams that never finish a response; listed for coverage but not timed.
+STREAMING_ROUTES = {"question-events"}
+
+# Query ceilings per route name, checked for every profile.
+DEFAULT_QUERY_BUDGET = 10
+QUERY_BUDGETS = {
+    "question_list": 8,
+    "question_detail": 8,
+    "answer-list-partial": 8,
+    "answer_detail": 8,
+    "answer-comments-partial": 8,
+    "tag_autocomplete": 2,
+    "vote": 14,
+    "answer-list-partial-async": 8,
+    "answer-comments-partial-async": 8,
+    "vote-async": 14,
+}
+
+# Which seeded object fills the `object_id` of routes that take one.
+OBJECT_ID_SOURCES = {
+    "vote": "question_id",
+    "vote-async": "question_id",
+}
+
+# Extra request data some routes need to do real work.
+ROUTE_DATA = {
+    "vote": {"vote_type": 1},
+    "vote-async": {"vote_type": 1},
+}
+
+BENCHMARK_PASSWORD = "benchmark-password"
+
+
+def seed_dataset(users=20, questions=50, answers_per_question=5, comments_per_answer=4,
+                 replies_per_comment=2, tags=30, votes_per_object=5, seed=1):
+    """Bulk-insert a synthetic forum and return the objects the benchmarks request.
+
+    The first user authors the sample question, answer and comment so the
+    author-only edit/delete pages can be measured too.
+    """
+    rng = random.Random(seed)
+    password = make_password(BENCHMARK_PASSWORD)
+    suffix = uuid.uuid4().hex[:8]
+    people = User.objects.bulk_create(
+        User(username=f"bench-{suffix}-{i}", email=f"bench-{suffix}-{i}@example.com", password=password)
+        for i in range(users)
+    )
+    tag_objects = Tag.objects.bulk_create(
+        Tag(name=f"bench-{suffix}-tag-{i}", slug=f"bench-{suffix}-tag-{i}") for i in range(tags)
+    )
+
+    question_objects = Question.objects.bulk_create(
+        Question(
+            title=f"Benchmark question {i}",
+            description=f"Synthetic question body {i} " * 5,
+            author=people[0] if i == 0 else rng.choice(people),
+        )
+        for i in range(questions)
+    )
+    question_type = ContentType.objects.get_for_model(Question)
+    TaggedItem.objects.bulk_create(
+        TaggedItem(content_type=question_type, object_id=question.pk, tag=tag)
+        for question in question_objects
+        for tag in rng.sample(tag_objects, min(3, len(tag_objects)))
+    )
+
+    answer_objects = Answer.objects.bulk_create(
+        Answer(
+            question=question,
+            author=people[0] if (question_index, i) == (0, 0) else rng.choice(people),
+            content=f"Synthetic answer {i}",
+        )
+        for question_index, question in enumerate(question_objects)
+        for i in range(answers_per_question)
+    )
+
+    answer_type = ContentType.objects.get_for_model(Answer)
+    top_level = Comment.objects.bulk_create(
+        Comment(
+            content_type=answer_type,
+            object_id=answer.pk,
+            author=people[0] if (answer_index, i) == (0, 0) else rng.choice(people),
+            content=f"Synthetic comment {i}",
+        )
+        for answer_index, answer in enumerate(answer_objects)
+        for i in range(comments_per_answer)
+    )
+    replies = Comment.objects.bulk_create(
+        Comment(
+            content_type=answer_type,
+            object_id=parent.object_id,
+            parent=parent,
+            author=rng.choice(people),
+            content=f"Synthetic reply {i}",
+        )
+        for parent in top_level
+        for i in range(replies_per_comment)
+    )
+
+    votes = []
+    for model, objects in ((Question, question_objects), (Answer, answer_objects), (Comment, top_level + replies)):
+        content_type = ContentType.objects.get_for_model(model)
+        for obj in objects:
+            for voter in rng.sample(people, min(votes_per_object, len(people))):
+                votes.append(
+                    Vote(user=voter, content_type=content_type, object_id=obj.pk, vote_type=rng.choice((1, -1)))
+                )
+    Vote.objects.bulk_create(votes, batch_size=2000)
+
+    # bulk_create skips signals, so refresh the denormalized state they maintain.
+    for model in VOTABLE_MODELS:
+        rebuild_vote_counters(model)
+    rebuild_comment_paths()
+    invalidate_tag_catalog()
+
+    return {
+        "user": people[0],
+        "question": question_objects[0],
+        "answer": answer_objects[0],
+        "comment": top_level[0] if top_level else None,
+        "prefix": f"bench-{suffix}-",
+        "counts": {
+            "users": users,
+            "questions": len(question_objects),
+            "answers": len(answer_objects),
+            "comments": len(top_level) + len(replies),
+            "tags": len(tag_objects),
+            "votes": len(votes),
+        },
+    }
+
+
+# Closing sentence of the help text of every command that seeds inside ``rolled_back``.
+ROLLED_BACK_HELP = "All seeded rows are rolled back afterwards."
+
+
+@contextmanager
+def rolled_back(using=None):
+    """Run the block in a transaction that is always rolled back, so a seeded dataset never persists."""
+    with transaction.atomic(using=using):
+        yield
+        transaction.set_rollback(True, using=using)
+
+
+def delete_dataset(dataset):
+    """Remove a committed ``seed_dataset`` forum; everything cascades from its users and tags."""
+    User.objects.filter(username__startswith=dataset["prefix"]).delete()
+    Tag.objects.filter(slug__startswith=dataset["prefix"]).delete()
+    invalidate_tag_catalog()
+
+
+def iter_routes(patterns=None, namespace_urlconfs=BENCHMARKED_URLCONFS):
+    """Yield each named URL pattern reachable from the benchmarked URLconfs, first match wins."""
+    seen = set()
+
+    def walk(patterns, included):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                name = getattr(pattern.urlconf_module, "__name__", None)
+                yield from walk(pattern.url_patterns, included or name in namespace_urlconfs)
+            elif included and pattern.name and pattern.name not in seen:
+                seen.add(pattern.name)
+                yield pattern
+
+    yield from walk(patterns if patterns is not None else get_resolver().url_patterns, False)
+
+
+def route_kwargs(pattern, dataset):
+    values = {
+        "question_id": dataset["question"].pk,
+        "answer_id": dataset["answer"].pk,
+        "comment_id": dataset["comment"].pk,
+        "uidb64": urlsafe_base64_encode(force_bytes(dataset["user"].pk)),
+        "token": default_token_generator.make_token(dataset["user"]),
+        "model_label": "question",
+    }
+    values["object_id"] = values.get(OBJECT_ID_SOURCES.get(pattern.name), 0)
+    return {name: values[name] for name in getattr(pattern.pattern, "converters", {})}
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def measure(client, method, path, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = getattr(client, method)(path, data)
+            timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "status": response.status_code,
+        "queries": len(queries),
+        "sql_ms": round(sum(float(query["time"]) for query in queries) * 1000, 3),
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+    }
+
+
+def run_benchmarks(dataset, repeat=5, profiles=PROFILES, budgets=None):
+    """Request every route under each profile and return one result dict per (route, profile)."""
+    budgets = QUERY_BUDGETS if budgets is None else budgets
+    routes = sorted(
+        (pattern for pattern in iter_routes() if pattern.name not in STREAMING_ROUTES),
+        key=lambda pattern: pattern.name in POST_ROUTES,
+    )
+    results = []
+    for profile in profiles:
+        client = Client(raise_request_exception=False)
+        for pattern in routes:
+            if profile == "authenticated":
+                client.force_login(dataset["user"])
+            method = "post" if pattern.name in POST_ROUTES else "get"
+            path = reverse(pattern.name, kwargs=route_kwargs(pattern, dataset))
+            result = measure(client, method, path, ROUTE_DATA.get(pattern.name, {}), repeat)
+            budget = budgets.get(pattern.name, DEFAULT_QUERY_BUDGET)
+            results.append(
+                {
+                    "route": pattern.name,
+                    "profile": profile,
+                    "method": method.upper(),
+                    "path": path,
+                    **result,
+                    "query_budget": budget,
+                    "over_budget": result["queries"] > budget,
+                }
+            )
+    return results
@@ -0,0 +1,164 @@
+from django.db.models import F, Max, Q, Value, Window
+from django.db.models.functions import Concat, Length, RowNumber, Substr
+
+from forum.models import Comment
+
+# Width of one zero-padded id segment in Comment.path.
+PATH_STEP = 10
+# Sorts after every digit, so [path, path + PATH_END) covers exactly one subtree.
+PATH_END = "~"
+# Deepest thread level (top-level comments are level 1) whose path still fits in Comment.path.
+MAX_COMMENT_DEPTH = Comment._meta.get_field("path").max_length // PATH_STEP
+# Replies shown under each top-level comment before "Show all replies".
+REPLY_PREVIEW_LIMIT = 3
+
+
+def path_segment(pk):
+    return f"{pk:0{PATH_STEP}d}"
+
+
+def descendants_filter(path):
+    """Range condition matching every comment strictly below the node at `path`."""
+    return Q(path__gt=path, path__lt=path + PATH_END)
+
+
+def is_descendant_path(path, ancestor_path):
+    return path != ancestor_path and path.startswith(ancestor_path)
+
+
+def comment_depth(path):
+    return len(path) // PATH_STEP
+
+
+def subtree_height(comment):
+    """Levels of replies below `comment`: 0 for a comment without replies."""
+    if not comment.path:
+        return 0
+    longest = Comment.objects.filter(descendants_filter(comment.path)).aggregate(longest=Max(Length("path")))["longest"]
+    return (longest - len(comment.path)) // PATH_STEP if longest else 0
+
+
+def fits_under(parent, comment=None):
+    """Whether `comment` (a new one when None), with its replies, can be placed under `parent`."""
+    height = subtree_height(comment) if comment is not None and comment.pk else 0
+    return comment_depth(parent.path) + 1 + height <= MAX_COMMENT_DEPTH
+
+
+def sync_comment_path(comment):
+    """Store `comment`'s materialized path, moving its whole subtree along if the parent changed."""
+    parent_path = comment.parent.path if comment.parent_id else ""
+    new_path = parent_path + path_segment(comment.pk)
+    old_path = comment.path
+    if new_path == old_path:
+        return
+
+    moved = Q(pk=comment.pk)
+    if old_path:
+        moved |= descendants_filter(old_path)
+    Comment.objects.filter(moved).update(
+        path=Concat(Value(new_path), Substr("path", len(old_path) + 1)) if old_path else Value(new_path)
+    )
+    comment.path = new_path
+
+
+def rebuild_comment_paths(model=Comment, batch_size=1000):
+    """Recompute every stored path from the parent links. Returns the number of rows changed."""
+    rows = {pk: (parent_id, path) for pk, parent_id, path in model.objects.values_list("pk", "parent_id", "path")}
+    paths = {}
+    for pk in rows:
+        chain = []
+        node = pk
+        while node is not None and node not in paths:
+            chain.append(node)
+            node = rows[node][0]
+        prefix = paths.get(node, "")
+        for node in reversed(chain):
+            prefix += path_segment(node)
+            paths[node] = prefix
+
+    changed = [model(pk=pk, path=path) for pk, path in paths.items() if rows[pk][1] != path]
+    model.objects.bulk_update(changed, ["path"], batch_size=batch_size)
+    return len(changed)
+
+
+def build_comment_tree(comments):
+    """Link path-ordered `comments` into trees in one pass and return the nodes without a loaded parent.
+
+    Every node gets a ``children`` list in thread order.
+    """
+    nodes = {}
+    roots = []
+    for comment in comments:
+        comment.children = []
+        parent = nodes.get(comment.path[:-PATH_STEP])
+        (parent.children if parent is not None else roots).append(comment)
+        nodes[comment.path] = comment
+    return roots
+
+
+def reply_previews_queryset(roots, queryset, limit=REPLY_PREVIEW_LIMIT):
+    """Query for up to ``limit + 1`` replies per thread in `roots`, annotated with ``thread_position``."""
+    in_threads = Q()
+    for root in roots:
+        in_threads |= descendants_filter(root.path)
+    return (
+        queryset.filter(in_threads)
+        .annotate(
+            thread_position=Window(
+                RowNumber(), partition_by=[Substr("path", 1, PATH_STEP)], order_by=F("path").asc()
+            )
+        )
+        .filter(thread_position__lte=limit + 1)
+        .order_by("path")
+    )
+
+
+def apply_reply_previews(roots, replies, limit=REPLY_PREVIEW_LIMIT):
+    by_path = {root.path: root for root in roots}
+    shown = []
+    for reply in replies:
+        root = by_path[reply.path[:PATH_STEP]]
+        if reply.thread_position > limit:
+            root.has_more_replies = True
+        else:
+            shown.append(reply)
+    for node in build_comment_tree(shown):
+        by_path[node.path[:-PATH_STEP]].children.append(node)
+    return shown
+
+
+def reset_reply_previews(roots):
+    roots = list(roots)
+    for root in roots:
+        root.children = []
+        root.has_more_replies = False
+    return roots
+
+
+def attach_reply_previews(roots, queryset, limit=REPLY_PREVIEW_LIMIT):
+    """Attach the first `limit` replies (in thread order) under each top-level comment in `roots` with one query.
+
+    `queryset` is the base comment queryset to load replies from. Each root
+    gets ``children`` and ``has_more_replies``; returns the loaded replies.
+    """
+    roots = reset_reply_previews(roots)
+    if not roots:
+        return []
+    return apply_reply_previews(roots, list(reply_previews_queryset(roots, queryset, limit)), limit)
+
+
+async def aattach_reply_previews(roots, queryset, limit=REPLY_PREVIEW_LIMIT):
+    """Async counterpart of ``attach_reply_previews``."""
+    roots = reset_reply_previews(roots)
+    if not roots:
+        return []
+    replies = [reply async for reply in reply_previews_queryset(roots, queryset, limit)]
+    return apply_reply_previews(roots, replies, limit)
+
+
+def load_comment_subtree(comment, queryset):
+    """Attach every reply below `comment` as nested ``children`` using one range query."""
+    replies = list(queryset.filter(descendants_filter(comment.path)).order_by("path"))
+    comment.children = build_comment_tree(replies)
+    comment.has_more_replies = False
+    return replies
@@ -0,0 +1,340 @@
+"""
+Streaming export and import of the whole Q&A corpus as JSON Lines.
+
+``export_corpus`` writes a header line followed by one JSON object per row,
+section by section in dependency order (users, tags, questions, their tag
+links, answers, comments, votes). Rows are read with ``.iterator()`` so memory
+stays flat however large the corpus is.
+
+``import_corpus`` reads such a stream into another database. Rows are
+inserted in ``bulk_create`` batches, every foreign key and generic
+``content_type``/``object_id`` pair is remapped to the new ids, and users and
+tags that already exist (by username and name) are reused. bulk_create skips
+signals, so the denormalized state they maintain (vote counters, hot scores,
+tag counts, reputation, the search index and the tag catalog) is rebuilt once at the end
+instead of per row. Comments get their ids reserved up front, like ``loaddata`` with
+explicit pks, so their materialized paths are written with the rows.
+"""
+
+import json
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+from taggit.models import Tag, TaggedItem
+
+from forum.domain.comments import path_segment
+from forum.domain.ranking import recompute_hot_scores
+from forum.domain.reputation import rebuild_reputation
+from forum.domain.search import get_search_backend
+from forum.domain.tags import invalidate_tag_catalog, reconcile_tag_counts
+from forum.domain.vote import VOTABLE_MODELS, rebuild_vote_counters
+from forum.models import Answer, Comment, Question, Vote
+
+User = get_user_model()
+
+CORPUS_FORMAT = "answerly-corpus"
+CORPUS_VERSION = 1
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 2000
+
+# Record key -> column, per section. Staff and superuser flags are never exported.
+CORPUS_SECTIONS = {
+    "user": {
+        "id": "pk",
+        "username": "username",
+        "email": "email",
+        "password": "password",
+        "first_name": "first_name",
+        "last_name": "last_name",
+        "is_active": "is_active",
+        "date_joined": "date_joined",
+    },
+    "tag": {"id": "pk", "name": "name", "slug": "slug"},
+    "question": {
+        "id": "pk",
+        "author": "author_id",
+        "title": "title",
+        "description": "description",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    },
+    "tagged": {"id": "pk", "question": "object_id", "tag": "tag_id"},
+    "answer": {
+        "id": "pk",
+        "question": "question_id",
+        "author": "author_id",
+        "content": "content",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    },
+    "comment": {
+        "id": "pk",
+        "target_model": "content_type_id",
+        "target": "object_id",
+        "parent": "parent_id",
+        "author": "author_id",
+        "content": "content",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    },
+    "vote": {
+        "id": "pk",
+        "target_model": "content_type_id",
+        "target": "object_id",
+        "user": "user_id",
+        "vote_type": "vote_type",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    },
+}
+
+TIMESTAMP_FIELDS = ("date_joined", "created_at", "updated_at")
+
+
+def section_querysets():
+    return {
+        "user": User.objects.all(),
+        "tag": Tag.objects.all(),
+        "question": Question.objects.all(),
+        "tagged": TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Question)),
+        "answer": Answer.objects.all(),
+        "comment": Comment.objects.all(),
+        "vote": Vote.objects.all(),
+    }
+
+
+def dump_record(record):
+    return json.dumps(record, separators=(",", ":"), default=lambda value: value.isoformat()) + "\n"
+
+
+def export_records(chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the corpus as dicts: a header, then every section's rows in pk order.
+
+    Each section stops at the highest pk it had when the export started, so
+    rows written meanwhile cannot reference parents the stream never saw.
+    """
+    querysets = section_querysets()
+    ceilings = {kind: queryset.aggregate(top=Max("pk"))["top"] or 0 for kind, queryset in querysets.items()}
+    yield {"format": CORPUS_FORMAT, "version": CORPUS_VERSION}
+    for kind, fields in CORPUS_SECTIONS.items():
+        rows = (
+            querysets[kind]
+            .filter(pk__lte=ceilings[kind])
+            .order_by("pk")
+            .values_list(*fields.values())
+            .iterator(chunk_size=chunk_size)
+        )
+        for row in rows:
+            record = {"model": kind, **dict(zip(fields, row))}
+            if "target_model" in record:
+                record["target_model"] = ContentType.objects.get_for_id(record["target_model"]).model
+            yield record
+
+
+def export_corpus(stream, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write the corpus to the text `stream`. Returns a Counter of rows written per section."""
+    counts = Counter()
+    for record in export_records(chunk_size):
+        stream.write(dump_record(record))
+        if "model" in record:
+            counts[record["model"]] += 1
+    return counts
+
+
+class CorpusImporter:
+    """Buffers records of one section and inserts them in batches, remembering old id -> new id."""
+
+    # Sections matched against existing rows by a natural key instead of always inserted.
+    NATURAL_KEYS = {"user": (User, "username"), "tag": (Tag, "name")}
+    MODELS = {"question": Question, "tagged": TaggedItem, "answer": Answer, "comment": Comment, "vote": Vote}
+    # Link rows whose new ids nothing refers to; duplicates of existing rows are skipped.
+    LINK_SECTIONS = {"tagged", "vote"}
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.ids = {kind: {} for kind in CORPUS_SECTIONS}
+        self.counts = Counter()
+        self.kind = None
+        self.pending = []
+        self.line_number = 0
+        self.next_comment_id = None
+        self.comment_paths = {}
+        self.content_types = {
+            model._meta.model_name: ContentType.objects.get_for_model(model) for model in VOTABLE_MODELS
+        }
+
+    def error(self, message):
+        return ValueError(f"Line {self.line_number}: {message}")
+
+    def resolve(self, kind, old_id):
+        if old_id is None:
+            return None
+        try:
+            return self.ids[kind][old_id]
+        except KeyError:
+            raise self.error(f"{kind} {old_id} is referenced before it appears in the corpus.") from None
+
+    def target(self, record):
+        model_name = record["target_model"]
+        if model_name not in self.content_types:
+            raise self.error(f"unknown target model {model_name!r}.")
+        return self.content_types[model_name], self.resolve(model_name, record["target"])
+
+    def read(self, stream):
+        header = None
+        for line in stream:
+            self.line_number += 1
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if header is None:
+                header = record
+                if header.get("format") != CORPUS_FORMAT or header.get("version") != CORPUS_VERSION:
+                    raise self.error(f"not a version {CORPUS_VERSION} {CORPUS_FORMAT} stream.")
+                continue
+            self.add(record)
+        self.flush()
+        return self.counts
+
+    def add(self, record):
+        kind = record.get("model")
+        if kind not in CORPUS_SECTIONS:
+            raise self.error(f"unknown record type {kind!r}.")
+        if kind != self.kind:
+            self.flush()
+            self.kind = kind
+        for field in TIMESTAMP_FIELDS:
+            if field in record:
+                record[field] = parse_datetime(record[field])
+        obj = getattr(self, f"build_{kind}")(record)
+        # bulk_create keeps the exported timestamps instead of stamping the current time.
+        obj.preserve_timestamps = True
+        self.pending.append((record["id"], obj))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def build_user(self, record):
+        return User(**{field: record[field] for field in CORPUS_SECTIONS["user"] if field != "id"})
+
+    def build_tag(self, record):
+        return Tag(name=record["name"], slug=record["slug"])
+
+    def build_question(self, record):
+        return Question(
+            author_id=self.resolve("user", record["author"]),
+            title=record["title"],
+            description=record["description"],
+            created_at=record["created_at"],
+            updated_at=record["updated_at"],
+        )
+
+    def build_tagged(self, record):
+        return TaggedItem(
+            content_type=self.content_types["question"],
+            object_id=self.resolve("question", record["question"]),
+            tag_id=self.resolve("tag", record["tag"]),
+        )
+
+    def build_answer(self, record):
+        return Answer(
+            question_id=self.resolve("question", record["question"]),
+            author_id=self.resolve("user", record["author"]),
+            content=record["content"],
+            created_at=record["created_at"],
+            updated_at=record["updated_at"],
+        )
+
+    def build_comment(self, record):
+        content_type, object_id = self.target(record)
+        parent_id = self.resolve("comment", record["parent"])
+        if self.next_comment_id is None:
+            self.next_comment_id = (Comment.objects.aggregate(top=Max("pk"))["top"] or 0) + 1
+        pk, self.next_comment_id = self.next_comment_id, self.next_comment_id + 1
+        # Known before the insert, so replies in the same batch can point at it.
+        self.ids["comment"][record["id"]] = pk
+        path = self.comment_paths[parent_id] if parent_id else ""
+        self.comment_paths[pk] = path = path + path_segment(pk)
+        return Comment(
+            pk=pk,
+            content_type=content_type,
+            object_id=object_id,
+            parent_id=parent_id,
+            path=path,
+            author_id=self.resolve("user", record["author"]),
+            content=record["content"],
+            created_at=record["created_at"],
+            updated_at=record["updated_at"],
+        )
+
+    def build_vote(self, record):
+        content_type, object_id = self.target(record)
+        return Vote(
+            content_type=content_type,
+            object_id=object_id,
+            user_id=self.resolve("user", record["user"]),
+            vote_type=record["vote_type"],
+            created_at=record["created_at"],
+            updated_at=record["updated_at"],
+        )
+
+    def flush(self):
+        if not self.pending:
+            return
+        kind, pending = self.kind, self.pending
+        self.pending = []
+        if kind in self.NATURAL_KEYS:
+            self.flush_matching(kind, pending)
+        elif kind in self.LINK_SECTIONS:
+            self.MODELS[kind].objects.bulk_create([obj for _, obj in pending], ignore_conflicts=True)
+        else:
+            created = self.MODELS[kind].objects.bulk_create([obj for _, obj in pending])
+            self.ids[kind].update((old_id, obj.pk) for (old_id, _), obj in zip(pending, created))
+        self.counts[kind] += len(pending)
+
+    def flush_matching(self, kind, pending):
+        model, key = self.NATURAL_KEYS[kind]
+        existing = dict(
+            model.objects.filter(**{f"{key}__in": [getattr(obj, key) for _, obj in pending]}).values_list(key, "pk")
+        )
+        missing = [(old_id, obj) for old_id, obj in pending if getattr(obj, key) not in existing]
+        model.objects.bulk_create([obj for _, obj in missing])
+        existing.update((getattr(obj, key), obj.pk) for _, obj in missing)
+        self.ids[kind].update((old_id, existing[getattr(obj, key)]) for old_id, obj in pending)
+
+
+def reset_sequences(models):
+    """Move id sequences past explicitly inserted pks (a no-op on SQLite)."""
+    with connection.cursor() as cursor:
+        for statement in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(statement)
+
+
+def rebuild_denormalized_state():
+    for model in VOTABLE_MODELS:
+        rebuild_vote_counters(model)
+    recompute_hot_scores()
+    reconcile_tag_counts()
+    invalidate_tag_catalog()
+    rebuild_reputation()
+
+
+def import_corpus(stream, batch_size=IMPORT_BATCH_SIZE):
+    """Load an ``export_corpus`` stream in one transaction. Returns a Counter of rows read per section.
+
+    The search index stops updating while rows go in and is rebuilt once afterwards.
+    Raises ValueError for malformed streams or dangling references.
+    """
+    backend = get_search_backend()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            backend.suspend(cursor)
+        counts = CorpusImporter(batch_size).read(stream)
+        reset_sequences([Comment])
+        rebuild_denormalized_state()
+        backend.rebuild()
+    return counts
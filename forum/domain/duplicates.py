@@ -0,0 +1,387 @@
+"""
+Near-duplicate question detection with MinHash and locality-sensitive hashing.
+
+A question becomes a set of shingles (title words plus description word
+pairs), the set becomes a MinHash signature, and the signature is cut into
+bands. One SHAKE-128 digest per shingle supplies all of its hash values, so
+the signature is an element-wise ``min`` rather than a Python loop per hash
+function. Questions sharing a band are candidates; the best-ranked candidates
+are then checked by exact Jaccard similarity of their shingles.
+
+``MinHashLSHIndex`` keeps the bands in sorted ``array``s, a few bytes per
+question and band, and reads and writes them as one binary file built by
+``manage.py build_duplicate_index``. Questions saved in this process after
+the file was built go into a small in-memory delta. ``find_duplicates``
+also picks up questions other processes created since, so a lookup never
+scans the question table. Until the file exists there are no suggestions.
+"""
+
+import bisect
+import hashlib
+import logging
+import os
+import re
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from collections import Counter
+
+from django.conf import settings
+
+from forum.models import Question
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+# 32 bands of 2 rows: a pair at Jaccard 0.3 shares a band with probability ~0.95.
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+# Part of the index file header; bump it whenever shingling or hashing changes.
+MINHASH_SEED = 1
+# Buckets this full hold a very common shingle and say little about similarity.
+MAX_BUCKET_SIZE = 500
+# Candidates, by shared bands, that are checked by exact similarity.
+CANDIDATE_LIMIT = 50
+DUPLICATE_MIN_SIMILARITY = 0.3
+DUPLICATE_LIMIT = 5
+BUILD_CHUNK_SIZE = 2000
+# New questions read per query when catching up with other processes.
+SYNC_BATCH_SIZE = 500
+
+INDEX_MAGIC = b"ANSLSH01"
+INDEX_HEADER = struct.Struct("<8sIIIQQ")
+
+WORD_RE = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it my of on or the this to what when "
+    "where which why with you".split()
+)
+
+SIGNATURE = struct.Struct(f"<{NUM_PERM}I")
+
+
+def question_shingles(title, description):
+    """Title words without stopwords, plus consecutive word pairs of the description."""
+    title_words = WORD_RE.findall(title.lower())
+    words = WORD_RE.findall(description.lower())
+    shingles = {f"t:{word}" for word in title_words if word not in STOPWORDS}
+    shingles.update(f"d:{first} {second}" for first, second in zip(words, words[1:]))
+    return shingles
+
+
+def jaccard(first, second):
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def shingle_hashes(shingle):
+    """NUM_PERM independent 32-bit hashes of `shingle`."""
+    return SIGNATURE.unpack(hashlib.shake_128(f"{MINHASH_SEED}:{shingle}".encode()).digest(SIGNATURE.size))
+
+
+def minhash(shingles):
+    if not shingles:
+        return None
+    return list(map(min, zip(*map(shingle_hashes, shingles))))
+
+
+def band_keys(signature):
+    """One 32-bit key per band of `signature`."""
+    packed = SIGNATURE.pack(*signature)
+    step = ROWS * 4
+    return [zlib.crc32(packed[start:start + step]) for start in range(0, SIGNATURE.size, step)]
+
+
+def question_band_keys(title, description):
+    signature = minhash(question_shingles(title, description))
+    return band_keys(signature) if signature is not None else None
+
+
+class MinHashLSHIndex:
+    """Band keys of many questions: a sorted, file-backed base plus an in-memory delta.
+
+    The base holds, per band, the keys in sorted order and, parallel to them,
+    positions into ``ids``. All methods are safe to call from several threads.
+    """
+
+    def __init__(self, ids=None, keys=None, positions=None, synced_through=0):
+        self.ids = ids if ids is not None else array("Q")
+        self.keys = keys if keys is not None else [array("I") for _ in range(BANDS)]
+        self.positions = positions if positions is not None else [array("I") for _ in range(BANDS)]
+        # Every question with a pk up to this one is in the index.
+        self.synced_through = synced_through
+        self._reset_delta()
+        self.lock = threading.Lock()
+
+    def _reset_delta(self):
+        self.base_max_id = max(self.ids, default=0)
+        self.delta = [{} for _ in range(BANDS)]
+        self.delta_keys = {}
+        # Base entries superseded by the delta or deleted; ids above base_max_id are never in the base.
+        self.hidden = set()
+
+    @classmethod
+    def build(cls, rows, synced_through=0):
+        """Create a base index from `(question_id, band_keys)` pairs."""
+        ids = array("Q")
+        unsorted = [array("I") for _ in range(BANDS)]
+        for question_id, keys in rows:
+            ids.append(question_id)
+            for band, key in enumerate(keys):
+                unsorted[band].append(key)
+        keys, positions = [], []
+        for band_keys in unsorted:
+            order = sorted(range(len(band_keys)), key=band_keys.__getitem__)
+            keys.append(array("I", [band_keys[position] for position in order]))
+            positions.append(array("I", order))
+        return cls(ids, keys, positions, synced_through)
+
+    def add(self, question_id, keys):
+        with self.lock:
+            self._add(question_id, keys)
+
+    def _add(self, question_id, keys):
+        self._discard(question_id)
+        self.delta_keys[question_id] = keys
+        for band, key in enumerate(keys):
+            self.delta[band].setdefault(key, set()).add(question_id)
+
+    def add_synced(self, rows, synced_through):
+        """Add `(question_id, band_keys)` rows read from the database up to `synced_through`.
+
+        Rows another thread has synced meanwhile are skipped, so a slow reader
+        never overwrites newer keys.
+        """
+        with self.lock:
+            for question_id, keys in rows:
+                if question_id > self.synced_through and keys is not None:
+                    self._add(question_id, keys)
+            self.synced_through = max(self.synced_through, synced_through)
+
+    def remove(self, question_id):
+        with self.lock:
+            self._discard(question_id)
+
+    def _discard(self, question_id):
+        if question_id <= self.base_max_id:
+            self.hidden.add(question_id)
+        for band, key in enumerate(self.delta_keys.pop(question_id, ())):
+            bucket = self.delta[band][key]
+            bucket.discard(question_id)
+            if not bucket:
+                del self.delta[band][key]
+
+    def query(self, keys):
+        """Count, per question, the bands it shares with `keys`."""
+        hits = Counter()
+        with self.lock:
+            for band, key in enumerate(keys):
+                band_keys = self.keys[band]
+                start = bisect.bisect_left(band_keys, key)
+                end = bisect.bisect_right(band_keys, key, start, min(start + MAX_BUCKET_SIZE + 1, len(band_keys)))
+                if end - start <= MAX_BUCKET_SIZE:
+                    ids, positions = self.ids, self.positions[band]
+                    hits.update(ids[positions[index]] for index in range(start, end))
+                hits.update(self.delta[band].get(key, ()))
+            for question_id in self.hidden.intersection(hits):
+                if question_id not in self.delta_keys:
+                    del hits[question_id]
+                else:
+                    hits[question_id] = sum(
+                        key == own for key, own in zip(keys, self.delta_keys[question_id])
+                    )
+        return hits
+
+    def rows(self):
+        """Yield `(question_id, band_keys)` for every live question, base and delta alike."""
+        with self.lock:
+            rows = self._live_rows()
+        yield from rows
+
+    def _live_rows(self):
+        keys_by_position = [[0] * BANDS for _ in range(len(self.ids))]
+        for band in range(BANDS):
+            for key, position in zip(self.keys[band], self.positions[band]):
+                keys_by_position[position][band] = key
+        rows = [
+            (question_id, keys)
+            for question_id, keys in zip(self.ids, keys_by_position)
+            if question_id not in self.hidden
+        ]
+        rows.extend(self.delta_keys.items())
+        return rows
+
+    def compact(self):
+        """Rebuild the base from the live questions, emptying the delta and ``hidden``."""
+        with self.lock:
+            if not (self.delta_keys or self.hidden):
+                return
+            merged = self.build(self._live_rows())
+            self.ids, self.keys, self.positions = merged.ids, merged.keys, merged.positions
+            self._reset_delta()
+
+    def save(self, path):
+        """Compact the index and write it to `path` atomically."""
+        self.compact()
+        with self.lock:
+            header = INDEX_HEADER.pack(INDEX_MAGIC, NUM_PERM, BANDS, MINHASH_SEED, self.synced_through, len(self.ids))
+            arrays = (self.ids, *self.keys, *self.positions)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(header)
+            for values in arrays:
+                if sys.byteorder == "big":
+                    values = array(values.typecode, values)
+                    values.byteswap()
+                values.tofile(fh)
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by ``save``; None when the file is missing or from other parameters."""
+        try:
+            fh = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        with fh:
+            magic, num_perm, bands, seed, synced_through, count = INDEX_HEADER.unpack(fh.read(INDEX_HEADER.size))
+            if (magic, num_perm, bands, seed) != (INDEX_MAGIC, NUM_PERM, BANDS, MINHASH_SEED):
+                return None
+            arrays = []
+            for typecode in ["Q"] + ["I"] * (2 * BANDS):
+                values = array(typecode)
+                values.fromfile(fh, count)
+                if sys.byteorder == "big":
+                    values.byteswap()
+                arrays.append(values)
+        return cls(arrays[0], arrays[1:BANDS + 1], arrays[BANDS + 1:], synced_through)
+
+
+def question_rows(queryset, chunk_size=BUILD_CHUNK_SIZE):
+    for question_id, title, description in queryset.values_list("pk", "title", "description").iterator(
+        chunk_size=chunk_size
+    ):
+        keys = question_band_keys(title, description)
+        if keys is not None:
+            yield question_id, keys
+
+
+def build_duplicate_index(chunk_size=BUILD_CHUNK_SIZE):
+    """Index every question currently in the database."""
+    synced_through = Question.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    return MinHashLSHIndex.build(
+        question_rows(Question.objects.filter(pk__lte=synced_through).order_by("pk"), chunk_size), synced_through
+    )
+
+
+def duplicate_index_path():
+    return getattr(settings, "FORUM_DUPLICATE_INDEX_PATH", None)
+
+
+_index = None
+_index_lock = threading.Lock()
+_warned_missing = False
+
+
+def get_duplicate_index():
+    """The process-wide index loaded from the index file; None until ``build_duplicate_index`` has written it.
+
+    Building it here instead would scan the whole question table inside a
+    request, holding the write transaction of the question form.
+    """
+    global _index, _warned_missing
+    with _index_lock:
+        if _index is None:
+            path = duplicate_index_path()
+            _index = MinHashLSHIndex.load(path) if path else None
+            if _index is None and not _warned_missing:
+                _warned_missing = True
+                logger.warning(
+                    "No duplicate index at %s; run `manage.py build_duplicate_index` to enable duplicate suggestions.",
+                    path,
+                )
+        return _index
+
+
+def loaded_duplicate_index():
+    return _index
+
+
+def reset_duplicate_index():
+    global _index, _warned_missing
+    with _index_lock:
+        _index = None
+        _warned_missing = False
+
+
+def sync_new_questions(index, batch_size=SYNC_BATCH_SIZE):
+    """Add questions created since the index was last synced, e.g. by other processes.
+
+    Batches are read and hashed without holding any lock; only adding them
+    to the index takes the index's own lock, briefly.
+    """
+    while True:
+        batch = list(
+            Question.objects.filter(pk__gt=index.synced_through)
+            .order_by("pk")
+            .values_list("pk", "title", "description")[:batch_size]
+        )
+        if not batch:
+            return
+        index.add_synced(
+            [(question_id, question_band_keys(title, description)) for question_id, title, description in batch],
+            synced_through=batch[-1][0],
+        )
+        if len(batch) < batch_size:
+            return
+
+
+def index_question(question):
+    """Reflect a saved question in this process's index, if one is loaded."""
+    index = loaded_duplicate_index()
+    if index is None:
+        return
+    keys = question_band_keys(question.title, question.description)
+    if keys is None:
+        index.remove(question.pk)
+    else:
+        index.add(question.pk, keys)
+
+
+def unindex_question(question_id):
+    index = loaded_duplicate_index()
+    if index is not None:
+        index.remove(question_id)
+
+
+def find_duplicates(title, description, exclude_id=None, limit=DUPLICATE_LIMIT,
+                    min_similarity=DUPLICATE_MIN_SIMILARITY):
+    """Return up to `limit` existing questions similar to the given text, most similar first.
+
+    Each question carries its Jaccard similarity as ``similarity``.
+    """
+    shingles = question_shingles(title, description)
+    signature = minhash(shingles)
+    if signature is None:
+        return []
+    index = get_duplicate_index()
+    if index is None:
+        return []
+    sync_new_questions(index)
+    hits = index.query(band_keys(signature))
+    hits.pop(exclude_id, None)
+    candidate_ids = [question_id for question_id, _ in hits.most_common(CANDIDATE_LIMIT)]
+    if not candidate_ids:
+        return []
+
+    duplicates = []
+    for question in Question.objects.filter(pk__in=candidate_ids).only("pk", "title", "description"):
+        question.similarity = jaccard(shingles, question_shingles(question.title, question.description))
+        if question.similarity >= min_similarity:
+            duplicates.append(question)
+    duplicates.sort(key=lambda question: (-question.similarity, -question.pk))
+    return duplicates[:limit]
@@ -0,0 +1,243 @@
+"""
+Live vote-count and new-content updates for open question pages.
+
+Writers publish compact events to a per-question channel once their change
+has committed; ``stream_events`` turns a subscription into Server-Sent
+Events, coalescing bursts into one event per object per interval. The broker
+is pluggable through ``settings.FORUM_LIVE_BROKER``; the default
+``LocalMemoryBroker`` only reaches subscribers in the same process.
+
+Streams never end, so they need an ASGI server: nothing is published or
+streamed unless ``settings.FORUM_LIVE_UPDATES`` is on, and publishing skips
+channels without subscribers before doing any lookups.
+"""
+
+import asyncio
+import json
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.utils.module_loading import import_string
+
+from forum.models import Answer, Comment, Question
+
+DEFAULT_BROKER = "forum.domain.live.LocalMemoryBroker"
+# Events for the same object inside this window reach the browser as one.
+COALESCE_SECONDS = 1.0
+# An idle stream sends a comment line this often so proxies keep it open.
+KEEPALIVE_SECONDS = 15
+RECONNECT_MILLISECONDS = 5000
+# Events buffered per subscriber; a client that falls further behind misses some.
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+def question_channel(question_id):
+    return f"question:{question_id}"
+
+
+class Subscription:
+    """One listener's queue, bound to the event loop that subscribed.
+
+    ``deliver`` may be called from any thread.
+    """
+
+    def __init__(self, on_close=None):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.on_close = on_close
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self.put, event)
+        except RuntimeError:
+            # The subscriber's loop has already shut down.
+            pass
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        if self.on_close is not None:
+            self.on_close(self)
+            self.on_close = None
+
+
+class Broker:
+    """Fan-out interface for live events.
+
+    ``publish`` is called from request threads after a commit and must not
+    block; ``subscribe`` is called from async code and returns a
+    ``Subscription`` the caller closes when done.
+    """
+
+    def publish(self, channel, event):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        raise NotImplementedError
+
+    def has_subscribers(self, channel=None):
+        """Whether anyone may be listening on `channel` (any channel when None).
+
+        Publishers use it to skip building events; brokers that cannot tell
+        cheaply keep this default.
+        """
+        return True
+
+
+class LocalMemoryBroker(Broker):
+    """Single-process broker: subscribers are registered in a dict guarded by a lock."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+
+    def publish(self, channel, event):
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def subscribe(self, channel):
+        subscription = Subscription(on_close=lambda subscription: self.unsubscribe(channel, subscription))
+        with self.lock:
+            self.subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def has_subscribers(self, channel=None):
+        with self.lock:
+            return bool(self.subscribers) if channel is None else channel in self.subscribers
+
+    def unsubscribe(self, channel, subscription):
+        with self.lock:
+            subscribers = self.subscribers.get(channel, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self.subscribers.pop(channel, None)
+
+
+@lru_cache(maxsize=None)
+def load_broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    return load_broker(getattr(settings, "FORUM_LIVE_BROKER", DEFAULT_BROKER))
+
+
+def live_updates_enabled():
+    return getattr(settings, "FORUM_LIVE_UPDATES", False)
+
+
+def has_listeners():
+    return live_updates_enabled() and get_broker().has_subscribers()
+
+
+def question_id_for(model_object):
+    """Return the id of the question whose page shows `model_object`."""
+    if isinstance(model_object, Question):
+        return model_object.pk
+    if isinstance(model_object, Answer):
+        return model_object.question_id
+    model_name, object_id = Comment.objects.filter(pk=model_object.pk).values_list(
+        "content_type__model", "object_id"
+    ).get()
+    return comment_question_id(model_name, object_id)
+
+
+def comment_question_id(model_name, object_id):
+    if model_name == "question":
+        return object_id
+    return Answer.objects.filter(pk=object_id).values_list("question_id", flat=True).first()
+
+
+def publish(question_id, event):
+    if question_id is None or not live_updates_enabled():
+        return
+    channel = question_channel(question_id)
+    broker = get_broker()
+    if broker.has_subscribers(channel):
+        broker.publish(channel, event)
+
+
+def publish_vote_counts(model_object, upvotes, downvotes):
+    if not has_listeners():
+        return
+    publish(
+        question_id_for(model_object),
+        {
+            "type": "vote",
+            "model": model_object._meta.model_name,
+            "id": model_object.pk,
+            "upvotes": upvotes,
+            "downvotes": downvotes,
+        },
+    )
+
+
+def publish_new_answer(answer):
+    publish(answer.question_id, {"type": "answer", "id": answer.pk})
+
+
+def publish_new_comment(comment):
+    if not has_listeners():
+        return
+    model_name = ContentType.objects.get_for_id(comment.content_type_id).model
+    event = {"type": "comment", "id": comment.pk, "parent_id": comment.parent_id}
+    if model_name == "answer":
+        event["answer_id"] = comment.object_id
+    publish(comment_question_id(model_name, comment.object_id), event)
+
+
+def event_key(event):
+    return event["type"], event.get("model"), event["id"]
+
+
+async def coalesced_batches(subscription, interval=COALESCE_SECONDS, keepalive=KEEPALIVE_SECONDS):
+    """Yield lists of events with at most one event per object per `interval`.
+
+    A later event for the same object replaces the earlier one. Yields an
+    empty list after `keepalive` idle seconds.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            first = await subscription.get(keepalive)
+        except asyncio.TimeoutError:
+            yield []
+            continue
+        pending = {event_key(first): first}
+        deadline = loop.time() + interval
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await subscription.get(remaining)
+            except asyncio.TimeoutError:
+                break
+            pending[event_key(event)] = event
+        yield list(pending.values())
+
+
+def format_event(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+async def stream_events(channel, interval=COALESCE_SECONDS, keepalive=KEEPALIVE_SECONDS):
+    """Server-Sent Events body for `channel`; unsubscribes when the client goes away."""
+    subscription = get_broker().subscribe(channel)
+    try:
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+        async for batch in coalesced_batches(subscription, interval, keepalive):
+            if not batch:
+                yield ": keepalive\n\n"
+            for event in batch:
+                yield format_event(event)
+    finally:
+        subscription.close()
@@ -0,0 +1,66 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from forum.models import Question
+
+# Ages are measured from this instant; only differences matter.
+HOT_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+# A question needs ten times the activity to outrank one this many seconds newer.
+HOT_DECAY_SECONDS = 45_000
+# How much one answer counts towards activity, relative to one net upvote.
+ANSWER_WEIGHT = 2
+HOT_BATCH_SIZE = 500
+
+
+def hot_score(score, answer_count, created_at):
+    """Time-decayed ranking value for a question.
+
+    Age enters as a constant offset that grows with the creation time, so a
+    stored value never goes stale by itself: newer questions simply start
+    higher. Only votes and answers require a recompute.
+    """
+    activity = score + ANSWER_WEIGHT * answer_count
+    order = math.log10(max(abs(activity), 1))
+    sign = (activity > 0) - (activity < 0)
+    return sign * order + (created_at - HOT_EPOCH).total_seconds() / HOT_DECAY_SECONDS
+
+
+def mark_hot_score_stale(question_id):
+    Question.objects.filter(pk=question_id, hot_score_stale=False).update(hot_score_stale=True)
+
+
+def recompute_hot_scores(model=Question, full=False, batch_size=HOT_BATCH_SIZE):
+    """Recompute ``hot_score`` for stale questions (or every question with `full`). Returns the row count.
+
+    Each batch clears the stale flag before reading, so a vote landing
+    mid-batch marks its question stale again for the next run.
+    """
+    queryset = model.objects.all() if full else model.objects.filter(hot_score_stale=True)
+    updated = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            batch = list(queryset.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not batch:
+                return updated
+            last_pk = batch[-1]
+            model.objects.filter(pk__in=batch).update(hot_score_stale=False)
+            rows = model.objects.filter(pk__in=batch).annotate(answer_total=Count("answers")).values_list(
+                "pk", "score", "answer_total", "created_at"
+            )
+            model.objects.bulk_update(
+                [
+                    model(pk=pk, hot_score=hot_score(score, answers, created_at))
+                    for pk, score, answers, created_at in rows
+                ],
+                ["hot_score"],
+            )
+            updated += len(batch)
+
+
+def initial_hot_score(question):
+    return hot_score(question.score, 0, question.created_at or timezone.now())
@@ -0,0 +1,250 @@
+"""
+Precomputed "related questions" lists.
+
+Two questions are related by the tags, title words and description words
+they share, each weighted by its inverse document frequency so that a shared
+rare tag counts for far more than a shared ``python``. The score is the
+cosine similarity of the weighted tag sets, title word sets and description
+word sets, combined with TAG_WEIGHT, TITLE_WEIGHT and DESCRIPTION_WEIGHT, and
+the best RELATED_LIMIT per question are stored as ``RelatedQuestion`` rows
+that the detail page reads with one indexed query.
+
+``RelatedCorpus`` holds every question's features and inverted postings in
+memory. Scoring a question accumulates dot products over the postings of its
+features, the sparse equivalent of one row of a similarity matrix product.
+Title, description and tag changes flag a question with ``related_stale``;
+``refresh_related_questions`` recomputes flagged questions in batches, along
+with the lists the change can move: those showing a flagged question and
+those it now ranks highly.
+"""
+
+import heapq
+import math
+from array import array
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+from taggit.models import TaggedItem
+
+from forum.domain.duplicates import STOPWORDS, WORD_RE
+from forum.models import Question, RelatedQuestion
+
+RELATED_LIMIT = 10
+TAG_WEIGHT = 0.6
+TITLE_WEIGHT = 0.25
+DESCRIPTION_WEIGHT = 0.15
+FEATURE_WEIGHTS = (TAG_WEIGHT, TITLE_WEIGHT, DESCRIPTION_WEIGHT)
+# Related lists never show a question scoring below this.
+MIN_RELATED_SCORE = 0.05
+# Popular features only contribute their most recently indexed questions as candidates.
+MAX_POSTING_CANDIDATES = 500
+RELATED_BATCH_SIZE = 500
+LOAD_CHUNK_SIZE = 5000
+
+
+def text_terms(text):
+    return tuple(sorted({word for word in WORD_RE.findall(text.lower()) if word not in STOPWORDS}))
+
+
+def question_features(tags, title, description):
+    return tuple(sorted(tags)), text_terms(title), text_terms(description)
+
+
+def inverse_frequency(total, frequency):
+    return math.log(1 + total / frequency)
+
+
+class RelatedCorpus:
+    """Tags, title terms and description terms of every question, with postings to its questions."""
+
+    def __init__(self):
+        # question id -> (tag ids, title terms, description terms)
+        self.features = {}
+        self.postings = tuple({} for _ in FEATURE_WEIGHTS)
+        # Per kind, cached feature weights and question norms; see ``refresh``.
+        self.weights = tuple({} for _ in FEATURE_WEIGHTS)
+        self.norms = tuple({} for _ in FEATURE_WEIGHTS)
+
+    @classmethod
+    def load(cls):
+        corpus = cls()
+        tags = {}
+        tagged = (
+            TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Question))
+            .order_by("object_id")
+            .values_list("object_id", "tag_id")
+        )
+        for question_id, tag_id in tagged.iterator(chunk_size=LOAD_CHUNK_SIZE):
+            tags.setdefault(question_id, []).append(tag_id)
+        texts = Question.objects.order_by("pk").values_list("pk", "title", "description")
+        for question_id, title, description in texts.iterator(chunk_size=LOAD_CHUNK_SIZE):
+            corpus.add(question_id, question_features(tags.get(question_id, ()), title, description))
+        return corpus
+
+    def add(self, question_id, features):
+        self.discard(question_id)
+        self.features[question_id] = features
+        for postings, values in zip(self.postings, features):
+            for value in values:
+                postings.setdefault(value, array("I")).append(question_id)
+
+    def discard(self, question_id):
+        old = self.features.pop(question_id, None)
+        if old is None:
+            return
+        for kind, values in enumerate(old):
+            self.norms[kind].pop(question_id, None)
+            postings = self.postings[kind]
+            for value in values:
+                postings[value].remove(question_id)
+                if not postings[value]:
+                    del postings[value]
+
+    def reload(self, question_ids):
+        """Re-read the features of `question_ids` from the database, dropping deleted questions."""
+        tags = {question_id: [] for question_id in question_ids}
+        tagged = TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Question), object_id__in=question_ids
+        ).values_list("object_id", "tag_id")
+        for question_id, tag_id in tagged:
+            tags[question_id].append(tag_id)
+        texts = {
+            question_id: (title, description)
+            for question_id, title, description in Question.objects.filter(pk__in=question_ids).values_list(
+                "pk", "title", "description"
+            )
+        }
+        for question_id in question_ids:
+            if question_id in texts:
+                self.add(question_id, question_features(tags[question_id], *texts[question_id]))
+            else:
+                self.discard(question_id)
+
+    def refresh(self):
+        """Forget cached weights and norms.
+
+        They are kept between calls because frequencies drift slowly: within a
+        refresh pass every score uses the frequencies seen when it started.
+        """
+        self.weights = tuple({} for _ in FEATURE_WEIGHTS)
+        self.norms = tuple({} for _ in FEATURE_WEIGHTS)
+
+    def weight(self, kind, value):
+        weights = self.weights[kind]
+        if value not in weights:
+            weights[value] = inverse_frequency(len(self.features), len(self.postings[kind][value])) ** 2
+        return weights[value]
+
+    def norm(self, kind, question_id):
+        norms = self.norms[kind]
+        if question_id not in norms:
+            norms[question_id] = math.sqrt(sum(self.weight(kind, value) for value in self.features[question_id][kind]))
+        return norms[question_id]
+
+    def scores(self, question_id):
+        """Similarity of `question_id` to every question sharing a feature with it."""
+        scores = {}
+        for kind, share in enumerate(FEATURE_WEIGHTS):
+            dots = {}
+            for value in self.features[question_id][kind]:
+                weight = self.weight(kind, value)
+                for other in self.postings[kind][value][-MAX_POSTING_CANDIDATES:]:
+                    dots[other] = dots.get(other, 0.0) + weight
+            dots.pop(question_id, None)
+            if not dots:
+                continue
+            norms, norm = self.norms[kind], self.norm
+            scale = share / norm(kind, question_id)
+            for other, dot in dots.items():
+                other_norm = norms.get(other) or norm(kind, other)
+                scores[other] = scores.get(other, 0.0) + scale * dot / other_norm
+        return scores
+
+    def top_related(self, question_id, limit=RELATED_LIMIT):
+        """The best `limit` `(question_id, score)` pairs for `question_id`, best first."""
+        scores = self.scores(question_id)
+        ranked = heapq.nlargest(limit, scores, key=scores.__getitem__)
+        return [(other, scores[other]) for other in ranked if scores[other] >= MIN_RELATED_SCORE]
+
+
+def mark_related_stale(question_ids):
+    Question.objects.filter(pk__in=question_ids, related_stale=False).update(related_stale=True)
+
+
+def mark_listing_questions_stale(question_id):
+    """Flag the questions whose related list shows `question_id`."""
+    mark_related_stale(RelatedQuestion.objects.filter(related_id=question_id).values("question_id"))
+
+
+def write_related(lists):
+    """Replace the stored lists of the questions in `lists` (question id -> ranked pairs).
+
+    Returns the ids, among those involved, of questions that no longer exist.
+    """
+    involved = {other for ranked in lists.values() for other, _ in ranked}.union(lists)
+    existing = set(Question.objects.filter(pk__in=involved).values_list("pk", flat=True))
+    RelatedQuestion.objects.filter(question_id__in=lists).delete()
+    RelatedQuestion.objects.bulk_create(
+        RelatedQuestion(question_id=question_id, related_id=other, rank=rank, score=score)
+        for question_id, ranked in lists.items()
+        if question_id in existing
+        for rank, (other, score) in enumerate(pair for pair in ranked if pair[0] in existing)
+    )
+    Question.objects.filter(pk__in=lists).update(related_updated_at=timezone.now())
+    return involved - existing
+
+
+def refresh_related_questions(corpus=None, full=False, batch_size=RELATED_BATCH_SIZE):
+    """Recompute related lists of stale questions (every question with `full`). Returns the lists written.
+
+    Pass a long-lived `corpus` to skip loading every question's features on
+    each call. As in ``recompute_hot_scores``, each batch clears the stale
+    flag before reading, so a change landing mid-batch is seen by the next run.
+    """
+    corpus = corpus if corpus is not None else RelatedCorpus.load()
+    corpus.refresh()
+    queryset = Question.objects.all() if full else Question.objects.filter(related_stale=True)
+    written = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            batch = list(queryset.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not batch:
+                return written
+            last_pk = batch[-1]
+            Question.objects.filter(pk__in=batch).update(related_stale=False)
+            corpus.reload(batch)
+            lists = {question_id: corpus.top_related(question_id) for question_id in batch}
+            if not full:
+                # Scores are symmetric: a changed question can enter the lists of the
+                # questions it ranks highly and leave those that showed it.
+                affected = {other for ranked in lists.values() for other, _ in ranked}
+                affected.update(RelatedQuestion.objects.filter(related_id__in=batch).values_list("question_id", flat=True))
+                lists.update(
+                    (question_id, corpus.top_related(question_id))
+                    for question_id in affected - lists.keys()
+                    if question_id in corpus.features
+                )
+            gone = write_related(lists)
+            for question_id in gone:
+                corpus.discard(question_id)
+            written += len(lists.keys() - gone)
+
+
+def related_questions(question_id):
+    """The stored related list of `question_id` as Question objects, best first, from one indexed query.
+
+    Each question carries its stored similarity to `question_id` as ``similarity``.
+    """
+    entries = (
+        RelatedQuestion.objects.filter(question_id=question_id)
+        .select_related("related")
+        .only("score", "related__id", "related__title")
+        .order_by("rank")
+    )
+    related = []
+    for entry in entries:
+        entry.related.similarity = entry.score
+        related.append(entry.related)
+    return related
@@ -0,0 +1,114 @@
+"""
+User reputation, materialized from votes.
+
+A vote on a user's question, answer or comment is worth the
+REPUTATION_POINTS of its type to the post's author; votes on one's own posts
+earn nothing. ``apply_reputation_delta``
+runs with every vote counter update: it appends a ``ReputationEntry`` and
+moves the author's cached ``User.reputation`` with one F-expression UPDATE,
+inside the vote's transaction, so the ledger always sums to the total.
+
+``rebuild_reputation`` recomputes every total by streaming the Vote table
+and records each correction it makes as a ledger entry of its own.
+"""
+
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+
+from forum.models import Answer, Comment, Question, ReputationEntry, Vote
+
+User = get_user_model()
+
+# Points per vote type, keyed by the voted model.
+REPUTATION_POINTS = {
+    Question: {Vote.VoteType.UPVOTE: 5, Vote.VoteType.DOWNVOTE: -2},
+    Answer: {Vote.VoteType.UPVOTE: 10, Vote.VoteType.DOWNVOTE: -2},
+    Comment: {Vote.VoteType.UPVOTE: 1, Vote.VoteType.DOWNVOTE: 0},
+}
+REBUILD_CHUNK_SIZE = 5000
+REBUILD_BATCH_SIZE = 1000
+
+
+def vote_points(model, vote_type):
+    return REPUTATION_POINTS.get(model, {}).get(vote_type, 0)
+
+
+def author_of(model, object_id):
+    return model.objects.filter(pk=object_id).values_list("author_id", flat=True).first()
+
+
+def apply_reputation_delta(model, object_id, old_vote_type=0, new_vote_type=0, author_id=None, voter_id=None):
+    """Credit the author of the voted object for `voter_id`'s vote moving from `old_vote_type` to `new_vote_type`.
+
+    Pass `author_id` when the object may already be gone. Returns the points gained or lost.
+    """
+    delta = vote_points(model, new_vote_type) - vote_points(model, old_vote_type)
+    if not delta:
+        return 0
+    if author_id is None:
+        author_id = author_of(model, object_id)
+    if author_id is None or author_id == voter_id:
+        return 0
+    ReputationEntry.objects.create(
+        user_id=author_id,
+        delta=delta,
+        content_type=ContentType.objects.get_for_model(model),
+        object_id=object_id,
+    )
+    User.objects.filter(pk=author_id).update(reputation=F("reputation") + delta)
+    return delta
+
+
+def reputation_from_votes(chunk_size=REBUILD_CHUNK_SIZE):
+    """Stream every vote, in pk order and `chunk_size` rows at a time, into a Counter of points per author.
+
+    Self-votes are skipped, as in ``apply_reputation_delta``.
+    """
+    totals = Counter()
+    for model, points in REPUTATION_POINTS.items():
+        authors = model.objects.filter(pk=OuterRef("object_id")).values("author_id")
+        votes = (
+            Vote.objects.filter(content_type=ContentType.objects.get_for_model(model))
+            .annotate(author=Subquery(authors))
+            .order_by("pk")
+            .values_list("author", "user_id", "vote_type")
+        )
+        for author_id, voter_id, vote_type in votes.iterator(chunk_size=chunk_size):
+            if author_id is not None and author_id != voter_id:
+                totals[author_id] += points.get(vote_type, 0)
+    return totals
+
+
+def rebuild_reputation(chunk_size=REBUILD_CHUNK_SIZE, batch_size=REBUILD_BATCH_SIZE, dry_run=False):
+    """Recompute every user's reputation from the Vote table. Returns ``{user_id: (stored, expected)}`` of drifted users.
+
+    Runs in one transaction, so the totals and the stored values it corrects
+    come from the same snapshot. With `dry_run` nothing is written.
+    """
+    with transaction.atomic():
+        totals = reputation_from_votes(chunk_size)
+        drifted = {
+            user_id: (stored, totals.get(user_id, 0))
+            for user_id, stored in User.objects.order_by("pk").values_list("pk", "reputation").iterator(
+                chunk_size=chunk_size
+            )
+            if stored != totals.get(user_id, 0)
+        }
+        if drifted and not dry_run:
+            ReputationEntry.objects.bulk_create(
+                (
+                    ReputationEntry(user_id=user_id, delta=expected - stored, reason=ReputationEntry.Reason.REBUILD)
+                    for user_id, (stored, expected) in drifted.items()
+                ),
+                batch_size=batch_size,
+            )
+            User.objects.bulk_update(
+                [User(pk=user_id, reputation=expected) for user_id, (_, expected) in drifted.items()],
+                ["reputation"],
+                batch_size=batch_size,
+            )
+    return drifted
@@ -0,0 +1,55 @@
+import random
+import sqlite3
+import time
+from functools import wraps
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+LOCK_RETRY_ATTEMPTS = 5
+LOCK_RETRY_BASE_SECONDS = 0.05
+LOCK_RETRY_MAX_SECONDS = 1.0
+LOCK_ERROR_MESSAGES = ("database is locked", "database table is locked")
+
+
+def is_lock_error(exc):
+    return isinstance(exc, (OperationalError, sqlite3.OperationalError)) and any(
+        message in str(exc) for message in LOCK_ERROR_MESSAGES
+    )
+
+
+def lock_retry_delay(attempt):
+    """Full-jitter exponential backoff, so retrying writers do not collide again in lockstep."""
+    return random.uniform(0, min(LOCK_RETRY_BASE_SECONDS * 2**attempt, LOCK_RETRY_MAX_SECONDS))
+
+
+def call_with_lock_retry(func, *args, attempts=LOCK_RETRY_ATTEMPTS, **kwargs):
+    """Call `func`, retrying with backoff while the database reports lock contention.
+
+    `func` must be safe to repeat, i.e. run its writes in one transaction.
+    """
+    for attempt in range(attempts):
+        try:
+            return func(*args, **kwargs)
+        except Exception as exc:
+            if not is_lock_error(exc) or attempt == attempts - 1:
+                raise
+            time.sleep(lock_retry_delay(attempt))
+
+
+def retry_on_lock(func=None, *, using=DEFAULT_DB_ALIAS, attempts=LOCK_RETRY_ATTEMPTS):
+    """Run `func` in a transaction that is retried when it fails on a database lock.
+
+    Inside an enclosing transaction a retry cannot start over, so `func`
+    simply runs once as part of it.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if connections[using].in_atomic_block:
+                return func(*args, **kwargs)
+            return call_with_lock_retry(transaction.atomic(using=using)(func), *args, attempts=attempts, **kwargs)
+
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
@@ -0,0 +1,224 @@
+import re
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import BooleanField, Case, Exists, FloatField, OuterRef, Q, Value, When
+from django.db.models.expressions import RawSQL
+from taggit.models import TaggedItem
+
+from forum.models import Question, QuestionSearchEntry
+
+# Extra relevance given to questions tagged with one of the searched words.
+TAG_BOOST = 1.0
+# Relative weight of a title hit compared to a description hit.
+TITLE_WEIGHT = 4.0
+DESCRIPTION_WEIGHT = 1.0
+
+SQLITE_FTS_TABLE = QuestionSearchEntry._meta.db_table
+
+SQLITE_INSTALL_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+        title, description,
+        content='forum_question', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai AFTER INSERT ON forum_question BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad AFTER DELETE ON forum_question BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au AFTER UPDATE OF title, description ON forum_question BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+SQLITE_SUSPEND_SQL = [
+    f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_au",
+]
+
+SQLITE_UNINSTALL_SQL = [
+    *SQLITE_SUSPEND_SQL,
+    f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}",
+]
+
+POSTGRES_SEARCH_CONFIG = "english"
+POSTGRES_INDEX_NAME = "forum_question_search_idx"
+
+POSTGRES_INSTALL_SQL = [
+    f"""
+    CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX_NAME} ON forum_question USING GIN ((
+        setweight(to_tsvector('{POSTGRES_SEARCH_CONFIG}'::regconfig, COALESCE(title, '')), 'A')
+        || setweight(to_tsvector('{POSTGRES_SEARCH_CONFIG}'::regconfig, COALESCE(description, '')), 'B')
+    ))
+    """,
+]
+
+POSTGRES_UNINSTALL_SQL = [f"DROP INDEX IF EXISTS {POSTGRES_INDEX_NAME}"]
+
+
+def search_terms(value):
+    """Split raw user input into lower-cased word tokens."""
+    return re.findall(r"\w+", value.lower())
+
+
+def tag_boost(terms):
+    """Relevance bonus for questions carrying a tag named like one of `terms`."""
+    tagged = TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Question),
+        object_id=OuterRef("pk"),
+        tag__slug__in=terms,
+    )
+    return Case(When(Exists(tagged), then=Value(TAG_BOOST)), default=Value(0.0), output_field=FloatField())
+
+
+class IContainsSearchBackend:
+    """Fallback for database engines without a full-text index: substring scans."""
+
+    def search(self, queryset, value):
+        terms = search_terms(value)
+        title_hit = Case(
+            When(title__icontains=value, then=Value(TITLE_WEIGHT)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        return queryset.filter(
+            Q(title__icontains=value) | Q(description__icontains=value)
+        ).annotate(search_rank=title_hit + tag_boost(terms))
+
+    def rebuild(self):
+        return None
+
+    def install(self, executor):
+        pass
+
+    def uninstall(self, executor):
+        pass
+
+    def suspend(self, executor):
+        """Stop maintaining the index during a bulk load; ``rebuild`` resumes and catches up."""
+        pass
+
+
+class SQLiteSearchBackend(IContainsSearchBackend):
+    """SQLite FTS5 external-content index over question titles and descriptions.
+
+    The index is kept in sync by triggers on ``forum_question``; every word
+    of the query must match, with prefix matching so partial keystrokes hit.
+    """
+
+    def match_expression(self, terms):
+        return " ".join(f'"{term}"*' for term in terms)
+
+    def search(self, queryset, value):
+        terms = search_terms(value)
+        if not terms:
+            return super().search(queryset, value)
+
+        # Join the FTS table (through QuestionSearchEntry) instead of using a
+        # correlated subquery so bm25() is evaluated once per match rather than
+        # re-running MATCH per row.
+        matches = RawSQL(
+            f"{SQLITE_FTS_TABLE} MATCH %s", (self.match_expression(terms),), output_field=BooleanField()
+        )
+        text_rank = RawSQL(
+            f"-bm25({SQLITE_FTS_TABLE}, %s, %s)",
+            (TITLE_WEIGHT, DESCRIPTION_WEIGHT),
+            output_field=FloatField(),
+        )
+        return (
+            queryset.filter(search_entry__isnull=False)
+            .filter(matches)
+            .annotate(search_rank=text_rank + tag_boost(terms))
+        )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            self.install(cursor)
+            cursor.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+
+    def install(self, executor):
+        for statement in SQLITE_INSTALL_SQL:
+            executor.execute(statement)
+
+    def uninstall(self, executor):
+        for statement in SQLITE_UNINSTALL_SQL:
+            executor.execute(statement)
+
+    def suspend(self, executor):
+        # Only the triggers go: dropping the FTS table itself inside a transaction
+        # that is later rolled back leaves the connection unable to open savepoints.
+        for statement in SQLITE_SUSPEND_SQL:
+            executor.execute(statement)
+
+
+class PostgresSearchBackend(IContainsSearchBackend):
+    """PostgreSQL full-text search backed by a GIN expression index.
+
+    The vector is computed from the columns at query time, so there is
+    nothing to keep in sync; the index expression mirrors ``search_vector``.
+    """
+
+    def search_vector(self):
+        from django.contrib.postgres.search import SearchVector
+
+        return SearchVector("title", weight="A", config=POSTGRES_SEARCH_CONFIG) + SearchVector(
+            "description", weight="B", config=POSTGRES_SEARCH_CONFIG
+        )
+
+    def search(self, queryset, value):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        terms = search_terms(value)
+        if not terms:
+            return super().search(queryset, value)
+
+        vector = self.search_vector()
+        query = SearchQuery(value, search_type="websearch", config=POSTGRES_SEARCH_CONFIG)
+        return (
+            queryset.annotate(search_vector=vector)
+            .filter(search_vector=query)
+            .annotate(search_rank=SearchRank(vector, query) + tag_boost(terms))
+        )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            self.install(cursor)
+            cursor.execute(f"REINDEX INDEX {POSTGRES_INDEX_NAME}")
+
+    def install(self, executor):
+        for statement in POSTGRES_INSTALL_SQL:
+            executor.execute(statement)
+
+    def uninstall(self, executor):
+        for statement in POSTGRES_UNINSTALL_SQL:
+            executor.execute(statement)
+
+    def suspend(self, executor):
+        self.uninstall(executor)
+
+
+SEARCH_BACKENDS = {
+    "sqlite": SQLiteSearchBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_search_backend(vendor=None):
+    """Return the search backend matching the database engine in use."""
+    return SEARCH_BACKENDS.get(vendor or connection.vendor, IContainsSearchBackend)()
@@ -0,0 +1,190 @@
+import heapq
+import json
+import math
+from bisect import bisect_left
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from taggit.models import Tag, TaggedItem
+
+from forum.models import Question, TagCounter
+
+TAG_CATALOG_VERSION_KEY = "forum:tag-catalog:version"
+TAG_CATALOG_KEY = "forum:tag-catalog:{version}"
+# Upper bound on staleness should an invalidation ever be missed. Popularity
+# order is only refreshed with the catalog, so it may lag this much too.
+TAG_CATALOG_TIMEOUT = 60 * 60
+TAG_PAGE_SIZE = 20
+TAG_CLOUD_KEY = "forum:tag-cloud:{version}"
+# Counts move with every tagged question, so the cloud expires on its own.
+TAG_CLOUD_TIMEOUT = 5 * 60
+TAG_CLOUD_SIZE = 30
+# Font-size steps, least to most popular.
+TAG_CLOUD_LEVELS = 5
+
+
+def get_tag_catalog_version():
+    cache.add(TAG_CATALOG_VERSION_KEY, 1, timeout=None)
+    return cache.get(TAG_CATALOG_VERSION_KEY, 1)
+
+
+def bump_tag_catalog_version():
+    try:
+        cache.incr(TAG_CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(TAG_CATALOG_VERSION_KEY, 1, timeout=None)
+
+
+def invalidate_tag_catalog():
+    """Move the catalog to a new version now and again once the transaction commits.
+
+    The second bump discards any catalog another process rebuilt from the
+    pre-commit state while the change was still in flight.
+    """
+    bump_tag_catalog_version()
+    transaction.on_commit(bump_tag_catalog_version)
+
+
+def build_tag_catalog():
+    rows = Tag.objects.order_by(F("counter__question_count").desc(nulls_last=True), "name").values_list("id", "name")
+    tags = [{"id": tag_id, "name": name} for tag_id, name in rows]
+    # Lowercased names in sorted order with each tag's popularity rank, for prefix lookups.
+    prefix_index = sorted((tag["name"].lower(), rank) for rank, tag in enumerate(tags))
+    return {
+        "tags": tags,
+        "prefix_names": [name for name, _ in prefix_index],
+        "prefix_ranks": [rank for _, rank in prefix_index],
+        "choices": [(str(tag["id"]), tag["name"]) for tag in tags],
+        "json": json.dumps(tags),
+    }
+
+
+def get_tag_catalog():
+    """Return the cached tag catalog: the tag list, form choices and a pre-serialized JSON blob.
+
+    Tags are ordered by popularity, most used first, then by name.
+    """
+    key = TAG_CATALOG_KEY.format(version=get_tag_catalog_version())
+    return cache.get_or_set(key, build_tag_catalog, timeout=TAG_CATALOG_TIMEOUT)
+
+
+def tag_choices():
+    return get_tag_catalog()["choices"]
+
+
+def get_tags_by_ids(tag_ids):
+    wanted = set(tag_ids)
+    return [tag for tag in get_tag_catalog()["tags"] if tag["id"] in wanted]
+
+
+def search_tags(query="", page=1, page_size=TAG_PAGE_SIZE):
+    """Return one page of catalog tags whose name starts with `query`, plus whether more pages follow.
+
+    Matches are found by bisecting the catalog's sorted prefix index, so a
+    keystroke only touches the tags that match rather than the whole catalog.
+    """
+    query = query.strip().lower()
+    catalog = get_tag_catalog()
+    tags = catalog["tags"]
+    start = (page - 1) * page_size
+    if not query:
+        return tags[start:start + page_size], len(tags) > start + page_size
+
+    names = catalog["prefix_names"]
+    low = bisect_left(names, query)
+    high = bisect_left(names, query + "\U0010ffff", low)
+    # Most popular first, like the unfiltered catalog; one extra rank tells whether more pages follow.
+    ranks = heapq.nsmallest(start + page_size + 1, catalog["prefix_ranks"][low:high])
+    return [tags[rank] for rank in ranks[start:start + page_size]], len(ranks) > start + page_size
+
+
+def question_tag_ids(question_id):
+    return list(
+        TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Question), object_id=question_id
+        ).values_list("tag_id", flat=True)
+    )
+
+
+def adjust_tag_counts(tag_ids, delta):
+    """Add `delta` to the question count of every tag in `tag_ids` with one F-expression UPDATE."""
+    tag_ids = list(tag_ids)
+    if not tag_ids or not delta:
+        return
+    if delta > 0:
+        TagCounter.objects.bulk_create([TagCounter(tag_id=tag_id) for tag_id in tag_ids], ignore_conflicts=True)
+    # Never below zero, even if the counter had already drifted low.
+    TagCounter.objects.filter(tag_id__in=tag_ids).update(
+        question_count=Greatest(F("question_count") + delta, Value(0))
+    )
+
+
+def tag_count_expression():
+    """Subquery expression recomputing a counter's question count from taggit's through table."""
+    tagged = (
+        TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Question), tag_id=OuterRef("tag_id"))
+        .order_by()
+        .values("tag_id")
+    )
+    return Coalesce(Subquery(tagged.annotate(total=Count("pk")).values("total")[:1]), Value(0))
+
+
+def find_tag_count_drift():
+    """Return a queryset of counters that disagree with taggit's through table."""
+    return (
+        TagCounter.objects.annotate(expected_count=tag_count_expression())
+        .exclude(question_count=F("expected_count"))
+        .order_by("tag_id")
+    )
+
+
+def find_uncounted_tags():
+    """Return a queryset of tags on questions that have no counter yet, e.g. after a bulk load."""
+    tagged = TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Question))
+    return Tag.objects.filter(counter__isnull=True, pk__in=tagged.values("tag_id")).order_by("name")
+
+
+def reconcile_tag_counts():
+    """Create missing counters and correct drifted ones in bulk. Returns the number of counters fixed."""
+    created = TagCounter.objects.bulk_create(
+        [TagCounter(tag_id=tag_id) for tag_id in Tag.objects.filter(counter__isnull=True).values_list("pk", flat=True)],
+        ignore_conflicts=True,
+    )
+    drifted = list(find_tag_count_drift().values_list("tag_id", flat=True))
+    TagCounter.objects.filter(tag_id__in=drifted).update(question_count=tag_count_expression())
+    if created or drifted:
+        invalidate_tag_catalog()
+    return len(set(drifted).union(counter.tag_id for counter in created))
+
+
+def cloud_levels(counts):
+    """Map each count to a step from 1 to TAG_CLOUD_LEVELS on a log scale between the extremes."""
+    low, high = math.log(min(counts)), math.log(max(counts))
+    if high == low:
+        return [TAG_CLOUD_LEVELS // 2 + 1] * len(counts)
+    return [1 + round((math.log(count) - low) / (high - low) * (TAG_CLOUD_LEVELS - 1)) for count in counts]
+
+
+def build_tag_cloud(size=TAG_CLOUD_SIZE):
+    rows = list(
+        TagCounter.objects.filter(question_count__gt=0)
+        .order_by("-question_count", "tag")
+        .values_list("tag_id", "tag__name", "question_count")[:size]
+    )
+    if not rows:
+        return []
+    levels = cloud_levels([count for _, _, count in rows])
+    cloud = [
+        {"id": tag_id, "name": name, "count": count, "level": level}
+        for (tag_id, name, count), level in zip(rows, levels)
+    ]
+    return sorted(cloud, key=lambda tag: tag["name"])
+
+
+def get_tag_cloud():
+    """Return the cached TAG_CLOUD_SIZE most used tags, alphabetically, each with its count and size level."""
+    key = TAG_CLOUD_KEY.format(version=get_tag_catalog_version())
+    return cache.get_or_set(key, build_tag_cloud, timeout=TAG_CLOUD_TIMEOUT)
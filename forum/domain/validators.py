@@ -0,0 +1,136 @@
+"""
+HTTP validators for conditional GETs of the question, answer and partial views.
+
+Each ``*_state`` function returns the state row from a single query, or
+None when the object does not exist. ``state`` changes whenever
+the rendered response could: the object's own timestamp and counters,
+a fingerprint of its listed children and, for a signed-in user, their votes
+on those objects (which decide how the vote buttons are drawn).
+
+The ``a*_state`` twins run the same query on the async ORM for the ASGI
+partials.
+"""
+
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F, IntegerField, Max, OuterRef, Subquery, Sum, Value
+
+from forum.models import Answer, Comment, Question, Vote
+
+
+def aggregate_over(queryset, expression):
+    """Scalar subquery computing the aggregate `expression` over every row of `queryset`."""
+    return Subquery(
+        queryset.order_by()
+        .annotate(group=Value(1, output_field=IntegerField()))
+        .values("group")
+        .annotate(value=expression)
+        .values("value")[:1]
+    )
+
+
+def children_fingerprint(prefix, queryset):
+    """Id sum, newest change and vote checksums of `queryset`.
+
+    Summing ids notices additions and deletions without a COUNT over the
+    listing. The pk-weighted sums catch counter moves on two rows that
+    cancel out in the plain totals.
+    """
+    return {
+        f"{prefix}_ids": aggregate_over(queryset, Sum("pk")),
+        f"{prefix}_changed": aggregate_over(queryset, Max("updated_at")),
+        f"{prefix}_upvotes": aggregate_over(queryset, Sum("upvote_count")),
+        f"{prefix}_downvotes": aggregate_over(queryset, Sum("downvote_count")),
+        f"{prefix}_checksum": aggregate_over(queryset, Sum(F("pk") * (F("upvote_count") * 2 + F("downvote_count")))),
+    }
+
+
+def user_votes_fingerprint(user, votes):
+    """Id sum and newest change of `user`'s votes in `votes`; empty for anonymous users."""
+    if not user.is_authenticated:
+        return {}
+    votes = votes.filter(user=user)
+    return {
+        "user_votes": aggregate_over(votes, Sum("pk")),
+        "user_votes_changed": aggregate_over(votes, Max("updated_at")),
+    }
+
+
+def state_queryset(queryset, fields, annotations):
+    return queryset.order_by().annotate(**annotations).values_list(*fields, *annotations)[:1]
+
+
+def fetch_state(queryset, fields, annotations):
+    return next(iter(state_queryset(queryset, fields, annotations)), None)
+
+
+async def afetch_state(queryset, fields, annotations):
+    async for row in state_queryset(queryset, fields, annotations):
+        return row
+    return None
+
+
+def votes_on(model, **filters):
+    return Vote.objects.filter(content_type=ContentType.objects.get_for_model(model), **filters)
+
+
+def question_state(question_id, user):
+    return fetch_state(
+        Question.objects.filter(pk=question_id),
+        ("updated_at", "upvote_count", "downvote_count", "related_updated_at"),
+        user_votes_fingerprint(user, votes_on(Question, object_id=OuterRef("pk"))),
+    )
+
+
+def answer_state(answer_id, user):
+    return fetch_state(
+        Answer.objects.filter(pk=answer_id),
+        ("updated_at", "upvote_count", "downvote_count", "question__updated_at"),
+        user_votes_fingerprint(user, votes_on(Answer, object_id=OuterRef("pk"))),
+    )
+
+
+def answer_list_query(question_id, user):
+    answers = Answer.objects.filter(question=OuterRef("pk"))
+    return (
+        Question.objects.filter(pk=question_id),
+        ("updated_at",),
+        {
+            **children_fingerprint("answers", answers),
+            **user_votes_fingerprint(user, votes_on(Answer, answers__question=OuterRef("pk"))),
+        },
+    )
+
+
+def answer_list_state(question_id, user):
+    return fetch_state(*answer_list_query(question_id, user))
+
+
+async def aanswer_list_state(question_id, user):
+    # Warm the content type cache so building the query stays off the sync ORM.
+    await sync_to_async(ContentType.objects.get_for_model)(Answer)
+    return await afetch_state(*answer_list_query(question_id, user))
+
+
+def comment_list_query(answer_id, user):
+    comments = Comment.objects.filter(content_type=ContentType.objects.get_for_model(Answer), object_id=OuterRef("pk"))
+    comment_ids = Comment.objects.filter(
+        content_type=ContentType.objects.get_for_model(Answer), object_id=OuterRef(OuterRef("pk"))
+    ).values("pk")
+    return (
+        Answer.objects.filter(pk=answer_id),
+        ("updated_at",),
+        {
+            **children_fingerprint("comments", comments),
+            **user_votes_fingerprint(user, votes_on(Comment, object_id__in=comment_ids)),
+        },
+    )
+
+
+def comment_list_state(answer_id, user):
+    return fetch_state(*comment_list_query(answer_id, user))
+
+
+async def acomment_list_state(answer_id, user):
+    await sync_to_async(ContentType.objects.get_for_models)(Answer, Comment)
+    return await afetch_state(*comment_list_query(answer_id, user))
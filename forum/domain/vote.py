@@ -1,21 +1,213 @@
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.http import JsonResponse
+from django.utils import timezone
 
+from forum.domain.live import publish_vote_counts
+from forum.domain.reputation import apply_reputation_delta
+from forum.domain.retry import retry_on_lock
+from forum.models import Answer, Comment, Question, Vote
 
-def update_votes(request, model_object, vote_type, vote=None, created=None):
-    if not created:
-        if vote.vote_type == vote_type:
-            vote.delete()
-            vote_type = 0
-        else:
-            vote.vote_type = vote_type
-            vote.save(update_fields=["vote_type"])
+VOTABLE_MODELS = (Question, Answer, Comment)
+# Votable models keyed by the label used in vote URLs, e.g. "question".
+VOTABLE_MODELS_BY_LABEL = {model._meta.model_name: model for model in VOTABLE_MODELS}
 
-    vote_counts = model_object.get_vote_counts()
 
+def apply_vote_delta(content_type_id, object_id, old_vote_type=0, new_vote_type=0, author_id=None, voter_id=None):
+    """Shift the stored vote counters of the voted object from `old_vote_type` to `new_vote_type`.
+
+    A vote type of 0 means "no vote", so creating a vote is (0 -> type) and
+    deleting one is (type -> 0). The update is a single F-expression UPDATE,
+    which keeps concurrent votes from overwriting each other. The author's
+    reputation moves with it unless `voter_id` is the author; pass `author_id`
+    if the object may already be deleted.
+    """
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    if model is None or not hasattr(model, "upvote_count"):
+        return
+
+    upvote_delta = int(new_vote_type == 1) - int(old_vote_type == 1)
+    downvote_delta = int(new_vote_type == -1) - int(old_vote_type == -1)
+    if not upvote_delta and not downvote_delta:
+        return
+
+    updates = {
+        "upvote_count": F("upvote_count") + upvote_delta,
+        "downvote_count": F("downvote_count") + downvote_delta,
+        "score": F("score") + upvote_delta - downvote_delta,
+    }
+    if model is Question:
+        # Queue the question for the next hot ranking recompute.
+        updates["hot_score_stale"] = True
+    model.objects.filter(pk=object_id).update(**updates)
+    apply_reputation_delta(model, object_id, old_vote_type, new_vote_type, author_id, voter_id)
+
+
+def vote_counter_expressions(model):
+    """Return subquery expressions that recompute the vote counters of `model` from the Vote table."""
+    votes = (
+        Vote.objects.filter(
+            content_type=ContentType.objects.get_for_model(model),
+            object_id=OuterRef("pk"),
+        )
+        .order_by()
+        .values("object_id")
+    )
+
+    def count_of(vote_type):
+        return Coalesce(
+            Subquery(votes.filter(vote_type=vote_type).annotate(total=Count("pk")).values("total")[:1]),
+            Value(0),
+        )
+
+    upvotes = count_of(Vote.VoteType.UPVOTE)
+    downvotes = count_of(Vote.VoteType.DOWNVOTE)
+    return {
+        "upvote_count": upvotes,
+        "downvote_count": downvotes,
+        "score": upvotes - downvotes,
+    }
+
+
+def rebuild_vote_counters(model):
+    """Recompute the stored counters of every `model` row in a single UPDATE. Returns the row count."""
+    return model.objects.update(**vote_counter_expressions(model))
+
+
+def find_vote_counter_drift(model):
+    """Return a queryset of `model` rows whose stored counters disagree with the Vote table."""
+    expressions = vote_counter_expressions(model)
+    return (
+        model.objects.annotate(
+            expected_upvotes=expressions["upvote_count"],
+            expected_downvotes=expressions["downvote_count"],
+        )
+        .filter(
+            ~Q(upvote_count=F("expected_upvotes"))
+            | ~Q(downvote_count=F("expected_downvotes"))
+            | ~Q(score=F("expected_upvotes") - F("expected_downvotes"))
+        )
+        .order_by("pk")
+    )
+
+
+def user_votes_queryset(objects, user):
+    """Return a ``(content_type_id, object_id, vote_type)`` queryset of `user`'s votes on `objects`, or None."""
+    if not objects or not getattr(user, "is_authenticated", False):
+        return None
+    ids_by_content_type = {}
+    for obj in objects:
+        content_type = ContentType.objects.get_for_model(obj)
+        ids_by_content_type.setdefault(content_type.pk, set()).add(obj.pk)
+
+    condition = Q()
+    for content_type_id, object_ids in ids_by_content_type.items():
+        condition |= Q(content_type_id=content_type_id, object_id__in=object_ids)
+    return Vote.objects.filter(condition, user=user).values_list("content_type_id", "object_id", "vote_type")
+
+
+def apply_user_votes(objects, rows):
+    user_votes = {(content_type_id, object_id): vote_type for content_type_id, object_id, vote_type in rows}
+    for obj in objects:
+        content_type = ContentType.objects.get_for_model(obj)
+        obj.user_vote = user_votes.get((content_type.pk, obj.pk), 0)
+    return user_votes
+
+
+def attach_user_votes(objects, user):
+    """Load `user`'s votes on every object in `objects` with one query.
+
+    Each object gets a ``user_vote`` attribute (1, -1 or 0) which the
+    ``get_user_vote`` template tag reads instead of querying per object.
+    Objects may be of mixed votable types. Returns the lookup dict keyed by
+    ``(content_type_id, object_id)``.
+    """
+    objects = list(objects)
+    queryset = user_votes_queryset(objects, user)
+    return apply_user_votes(objects, queryset if queryset is not None else [])
+
+
+async def aattach_user_votes(objects, user):
+    """Async counterpart of ``attach_user_votes``."""
+    objects = list(objects)
+    # Content types come from a process-wide cache that may need a sync query to fill.
+    await sync_to_async(ContentType.objects.get_for_models)(*{type(obj) for obj in objects})
+    queryset = user_votes_queryset(objects, user)
+    return apply_user_votes(objects, [row async for row in queryset] if queryset is not None else [])
+
+
+def toggle_vote(user, model_object, vote_type, attempts=3):
+    """Toggle `user`'s `vote_type` vote on `model_object` and return the resulting vote type (0 = none).
+
+    Each step decides the outcome from the row it locks or writes: delete a
+    matching vote, else flip an opposite one, else insert. Concurrent toggles
+    from the same user therefore serialize on the vote row and never count
+    twice; an insert that loses the race is retried.
+    """
+    content_type = ContentType.objects.get_for_model(model_object)
+    votes = Vote.objects.filter(user=user, content_type=content_type, object_id=model_object.pk)
+
+    for attempt in range(attempts):
+        with transaction.atomic():
+            # The locked row cannot go away before the delete, whose
+            # post_delete signal then moves the counters exactly once.
+            vote = votes.filter(vote_type=vote_type).select_for_update().first()
+            if vote is not None:
+                vote._voted_author_id = model_object.author_id
+                vote.delete()
+                return 0
+
+            if votes.exclude(vote_type=vote_type).update(vote_type=vote_type, updated_at=timezone.now()):
+                apply_vote_delta(
+                    content_type.pk,
+                    model_object.pk,
+                    -vote_type,
+                    vote_type,
+                    author_id=model_object.author_id,
+                    voter_id=user.pk,
+                )
+                return vote_type
+
+            try:
+                with transaction.atomic():
+                    # The post_save signal moves the counters for a new vote.
+                    vote = Vote(user=user, content_type=content_type, object_id=model_object.pk, vote_type=vote_type)
+                    vote._voted_author_id = model_object.author_id
+                    vote.save(force_insert=True)
+                return vote_type
+            except IntegrityError:
+                if attempt == attempts - 1:
+                    raise
+
+
+def vote_counts_queryset(model_object):
+    return type(model_object).objects.filter(pk=model_object.pk).values_list("upvote_count", "downvote_count")
+
+
+def update_votes(request, model_object, vote_type):
+    user_vote = retry_on_lock(toggle_vote)(request.user, model_object, vote_type)
+    upvotes, downvotes = vote_counts_queryset(model_object).get()
+    publish_vote_counts(model_object, upvotes, downvotes)
+    return vote_response(upvotes, downvotes, user_vote)
+
+
+async def aupdate_votes(request, model_object, vote_type):
+    """Async counterpart of ``update_votes``; the toggle itself runs in a worker thread
+    because Django cannot open transactions from async code."""
+    user_vote = await sync_to_async(retry_on_lock(toggle_vote))(request.user, model_object, vote_type)
+    upvotes, downvotes = await vote_counts_queryset(model_object).aget()
+    await sync_to_async(publish_vote_counts)(model_object, upvotes, downvotes)
+    return vote_response(upvotes, downvotes, user_vote)
+
+
+def vote_response(upvotes, downvotes, user_vote):
     return JsonResponse(
         {
-            "upvotes": vote_counts["upvotes"],
-            "downvotes": vote_counts["downvotes"],
-            "user_vote": vote_type,
+            "upvotes": upvotes,
+            "downvotes": downvotes,
+            "user_vote": user_vote,
         }
     )
@@ -1,7 +1,10 @@
-from django.db.models import Q, Count
 import django_filters
-from taggit.models import Tag
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Exists, OuterRef
+from taggit.models import TaggedItem
 from .models import Question, Answer, Comment, Vote
+from .domain.search import get_search_backend
+from .domain.tags import tag_choices
 
 from django.db import models
 
@@ -9,6 +12,10 @@ class PopularityChoice(models.IntegerChoices):
     MOST_LIKED = Vote.VoteType.UPVOTE, "Most liked"
     LEAST_LIKED = Vote.VoteType.DOWNVOTE, "Least liked"
 
+class SortChoice(models.TextChoices):
+    RELEVANCE = "relevance", "Most relevant"
+    HOT = "hot", "Hot"
+
 class VoteTypeFilterMixin(django_filters.FilterSet):
     vote_type = django_filters.ChoiceFilter(
         choices=PopularityChoice.choices,
@@ -22,11 +29,12 @@ class VoteTypeFilterMixin(django_filters.FilterSet):
         if not value:
             return queryset
 
+        # Keyed on (count, id) so cursor pages walk the *_popular_idx / *_unpopular_idx indexes.
         value_int = int(value)
         if value_int == Vote.VoteType.UPVOTE:
-            return queryset.order_by("-upvotes", "-created_at")
+            return queryset.order_by("-upvote_count", "-id")
         elif value_int == Vote.VoteType.DOWNVOTE:
-            return queryset.order_by("-downvotes", "-created_at")
+            return queryset.order_by("-downvote_count", "-id")
         else:
             return queryset
 
@@ -35,29 +43,47 @@ class QuestionFilter(VoteTypeFilterMixin):
         method='filter_question',
     )
 
-    tag = django_filters.ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all().order_by('name'),
+    tag = django_filters.MultipleChoiceFilter(
+        choices=tag_choices,
         method='filter_tag',
         required=False,
         label="Tags",
     )
 
+    sort = django_filters.ChoiceFilter(
+        choices=SortChoice.choices,
+        method='filter_sort',
+        empty_label='Newest first',
+        required=False,
+        label="Sort",
+    )
+
     class Meta:
         model = Question
-        fields = ['question', 'tag', 'vote_type']
+        fields = ['question', 'tag', 'vote_type', 'sort']
 
     def filter_question(self, queryset, name, value):
         if value:
-            return queryset.filter(
-                Q(title__icontains=value) |
-                Q(description__icontains=value)
-            )
+            return get_search_backend().search(queryset, value)
+        return queryset
+
+    def filter_sort(self, queryset, name, value):
+        if value == SortChoice.RELEVANCE and 'search_rank' in queryset.query.annotations:
+            return queryset.order_by('-search_rank', '-created_at')
+        if value == SortChoice.HOT:
+            return queryset.order_by('-hot_score', '-id')
         return queryset
 
     def filter_tag(self, queryset, name, value):
         if not value:
             return queryset
-        return queryset.filter(tags__in=value).distinct()
+        # A semi-join keeps one row per question, so no DISTINCT over the annotated rows.
+        tagged = TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Question),
+            object_id=OuterRef('pk'),
+            tag_id__in=value,
+        )
+        return queryset.filter(Exists(tagged))
 
 
 class AnswerFilter(VoteTypeFilterMixin):
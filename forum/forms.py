@@ -1,6 +1,7 @@
 from django import forms
 from .models import Question,Answer,Comment
 from taggit.forms import TagField
+from forum.domain.comments import MAX_COMMENT_DEPTH, fits_under, is_descendant_path
 
 class QuestionForm(forms.ModelForm):
     tags = TagField(
@@ -22,3 +23,13 @@ class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ["content", "parent"]
+
+    def clean_parent(self):
+        parent = self.cleaned_data.get("parent")
+        if parent and self.instance.pk and (
+            parent.pk == self.instance.pk or is_descendant_path(parent.path, self.instance.path)
+        ):
+            raise forms.ValidationError("A comment cannot reply to itself or to one of its replies.")
+        if parent and parent.pk != self.instance.parent_id and not fits_under(parent, self.instance):
+            raise forms.ValidationError(f"Replies cannot be nested more than {MAX_COMMENT_DEPTH} levels deep.")
+        return parent
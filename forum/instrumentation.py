@@ -0,0 +1,243 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` measures every request: query count, SQL time,
+repeated and duplicate queries, template render time and the time spent
+outside rendering (the view), tagged with the resolved URL name so the data
+aggregates per route. It adds a ``Server-Timing`` header for staff users
+(or everyone under ``DEBUG``) when ``FORUM_SERVER_TIMING`` is set, logs one JSON line
+per request to ``forum.performance`` and writes a sample of slow requests,
+with their SQL, to ``forum.performance.slow``. Query parameters can hold
+session keys and personal data, so the sample only carries their count
+unless ``FORUM_SLOW_REQUEST_LOG_PARAMS`` is set.
+
+Queries are counted by ``record_query``, an execute wrapper installed on
+every database connection as it opens, and templates are timed by
+``InstrumentedDjangoTemplates``. Both find the request's ``RequestMetrics``
+through a context variable and do nothing outside an instrumented request.
+"""
+
+import json
+import logging
+import random
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger("forum.performance")
+slow_logger = logging.getLogger("forum.performance.slow")
+
+DEFAULT_SLOW_REQUEST_MS = 500
+DEFAULT_SLOW_REQUEST_SAMPLE_RATE = 0.1
+# Statements kept per request for the slow log; later ones are still counted.
+MAX_RECORDED_QUERIES = 100
+# Repeated statements listed in a slow-request sample.
+MAX_REPORTED_REPEATS = 5
+
+_current_metrics = ContextVar("forum_request_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = (
+        "start", "total_seconds", "queries", "sql_seconds", "statements", "duplicates",
+        "seen", "recorded", "template_seconds", "rendering",
+    )
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.total_seconds = 0.0
+        self.queries = 0
+        self.sql_seconds = 0.0
+        # SQL text -> executions; the same text many times is the N+1 signature.
+        self.statements = {}
+        # Executions repeating an earlier statement with identical parameters.
+        self.duplicates = 0
+        self.seen = set()
+        self.recorded = []
+        self.template_seconds = 0.0
+        self.rendering = False
+
+    def record_query(self, sql, params, seconds):
+        self.queries += 1
+        self.sql_seconds += seconds
+        self.statements[sql] = self.statements.get(sql, 0) + 1
+        try:
+            key = (sql, tuple(params) if isinstance(params, list) else params)
+            if key in self.seen:
+                self.duplicates += 1
+            else:
+                self.seen.add(key)
+        except TypeError:
+            # executemany parameter lists are not hashable; they are never duplicates.
+            pass
+        if len(self.recorded) < MAX_RECORDED_QUERIES:
+            self.recorded.append((sql, params, seconds))
+
+    @property
+    def repeated_queries(self):
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+    @property
+    def view_seconds(self):
+        return self.total_seconds - self.template_seconds
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding each statement to the current request's metrics."""
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(sql, params, perf_counter() - start)
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _current_metrics.get()
+        # Templates rendered from inside another render are already being timed.
+        if metrics is None or metrics.rendering:
+            return super().render(context, request)
+        metrics.rendering = True
+        start = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_seconds += perf_counter() - start
+            metrics.rendering = False
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing top-level renders for ``PerformanceMiddleware``."""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match is not None else None
+
+
+def is_staff(user):
+    return user is not None and user.is_authenticated and user.is_staff
+
+
+def server_timing(metrics):
+    return ", ".join(
+        (
+            f"total;dur={metrics.total_seconds * 1000:.1f}",
+            f"view;dur={metrics.view_seconds * 1000:.1f}",
+            f"tpl;dur={metrics.template_seconds * 1000:.1f}",
+            f'db;dur={metrics.sql_seconds * 1000:.1f};desc="{metrics.queries} queries"',
+        )
+    )
+
+
+def request_record(request, response, metrics):
+    return {
+        "route": route_name(request),
+        "method": request.method,
+        "status": response.status_code,
+        "total_ms": round(metrics.total_seconds * 1000, 2),
+        "view_ms": round(metrics.view_seconds * 1000, 2),
+        "template_ms": round(metrics.template_seconds * 1000, 2),
+        "sql_ms": round(metrics.sql_seconds * 1000, 2),
+        "queries": metrics.queries,
+        "repeated_queries": metrics.repeated_queries,
+        "duplicate_queries": metrics.duplicates,
+    }
+
+
+def param_count(params):
+    return 0 if params is None else len(params)
+
+
+def slow_request_sample(request, record, metrics, log_params=False):
+    repeats = sorted(
+        ((count, sql) for sql, count in metrics.statements.items() if count > 1), reverse=True
+    )[:MAX_REPORTED_REPEATS]
+    return {
+        **record,
+        "path": request.path,
+        "repeats": [{"count": count, "sql": sql} for count, sql in repeats],
+        "sql": [
+            {
+                "ms": round(seconds * 1000, 3),
+                "sql": sql,
+                "param_count": param_count(params),
+                **({"params": repr(params)} if log_params else {}),
+            }
+            for sql, params, seconds in metrics.recorded
+        ],
+    }
+
+
+class PerformanceMiddleware:
+    """Time each request; see the module docstring. Place it first so it covers every other middleware."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_seconds = getattr(settings, "FORUM_SLOW_REQUEST_MS", DEFAULT_SLOW_REQUEST_MS) / 1000
+        self.sample_rate = getattr(settings, "FORUM_SLOW_REQUEST_SAMPLE_RATE", DEFAULT_SLOW_REQUEST_SAMPLE_RATE)
+        self.server_timing = getattr(settings, "FORUM_SERVER_TIMING", False)
+        self.log_params = getattr(settings, "FORUM_SLOW_REQUEST_LOG_PARAMS", False)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        show_timing = self.server_timing and (settings.DEBUG or is_staff(getattr(request, "user", None)))
+        return self.finish(request, response, metrics, show_timing)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        show_timing = self.server_timing and (
+            settings.DEBUG or (hasattr(request, "auser") and is_staff(await request.auser()))
+        )
+        return self.finish(request, response, metrics, show_timing)
+
+    def finish(self, request, response, metrics, show_timing=False):
+        # Streaming responses are measured up to their first byte.
+        metrics.total_seconds = perf_counter() - metrics.start
+        if show_timing:
+            response["Server-Timing"] = server_timing(metrics)
+        slow = metrics.total_seconds >= self.slow_seconds
+        if slow or logger.isEnabledFor(logging.INFO):
+            record = request_record(request, response, metrics)
+            logger.log(logging.WARNING if slow else logging.INFO, json.dumps(record))
+            if slow and random.random() < self.sample_rate:
+                slow_logger.warning(json.dumps(slow_request_sample(request, record, metrics, self.log_params)))
+        return response
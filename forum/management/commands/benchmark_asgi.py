@@ -0,0 +1,143 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from forum.benchmarks import delete_dataset, percentile, seed_dataset
+
+# Routes served by both a sync and an async view; the async one is named "<route>-async".
+ROUTES = ("answer-list-partial", "answer-comments-partial", "vote")
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the sync and async vote/partial views through the project's ASGI application "
+        "at several concurrency levels and report throughput and p50/p95 latency. The synthetic "
+        "dataset is committed (worker threads use their own connections) and deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int, action="append", help="Requests in flight; repeat for several levels."
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Requests per route, variant and level.")
+        parser.add_argument("--questions", type=int, default=50)
+        parser.add_argument("--answers", type=int, default=10, help="Answers per question.")
+        parser.add_argument("--comments", type=int, default=4, help="Top-level comments per answer.")
+
+    def handle(self, *args, **options):
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            dataset = seed_dataset(
+                users=20,
+                questions=options["questions"],
+                answers_per_question=options["answers"],
+                comments_per_answer=options["comments"],
+            )
+            try:
+                asyncio.run(self.run(dataset, options["concurrency"] or [1, 8, 32], options["requests"]))
+            finally:
+                delete_dataset(dataset)
+
+    async def run(self, dataset, levels, count):
+        application = get_asgi_application()
+        headers = await self.session_headers(dataset["user"])
+        kwargs = {
+            "answer-list-partial": {"question_id": dataset["question"].pk},
+            "answer-comments-partial": {"answer_id": dataset["answer"].pk},
+            "vote": {"model_label": "question", "object_id": dataset["question"].pk},
+        }
+        for route in ROUTES:
+            for variant in ("sync", "async"):
+                name = route if variant == "sync" else f"{route}-async"
+                method, body = ("POST", urlencode({"vote_type": 1}).encode()) if route == "vote" else ("GET", b"")
+                request = (method, reverse(name, kwargs=kwargs[route]), headers, body)
+                for level in levels:
+                    result = await self.load(application, request, level, count)
+                    self.stdout.write(
+                        f"{route:24} {variant:5} c={level:<4} rps={result['rps']:8.1f}  "
+                        f"p50={result['p50_ms']:8.2f}ms  p95={result['p95_ms']:8.2f}ms  errors={result['errors']}"
+                    )
+
+    async def session_headers(self, user):
+        def login():
+            client = Client()
+            client.force_login(user)
+            request = HttpRequest()
+            token = get_token(request)
+            cookies = {
+                settings.SESSION_COOKIE_NAME: client.cookies[settings.SESSION_COOKIE_NAME].value,
+                settings.CSRF_COOKIE_NAME: request.META["CSRF_COOKIE"],
+            }
+            return [
+                (b"host", b"testserver"),
+                (b"cookie", "; ".join(f"{key}={value}" for key, value in cookies.items()).encode()),
+                (b"x-csrftoken", token.encode()),
+                (b"content-type", b"application/x-www-form-urlencoded"),
+            ]
+
+        return await sync_to_async(login)()
+
+    async def load(self, application, request, concurrency, count):
+        """Send `count` copies of `request` with at most `concurrency` in flight."""
+        semaphore = asyncio.Semaphore(concurrency)
+        timings = []
+        statuses = []
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                statuses.append(await asgi_request(application, *request))
+                timings.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(count)))
+        elapsed = time.perf_counter() - start
+        return {
+            "rps": count / elapsed,
+            "p50_ms": statistics.median(timings),
+            "p95_ms": percentile(timings, 0.95),
+            "errors": sum(status >= 400 for status in statuses),
+        }
+
+
+async def asgi_request(application, method, path, headers, body):
+    """Drive one HTTP request through an ASGI application in-process and return the status code."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [*headers, (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    response = {}
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client never disconnects; Django cancels this wait once it has responded.
+        await asyncio.Future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+
+    await application(scope, receive, send)
+    return response["status"]
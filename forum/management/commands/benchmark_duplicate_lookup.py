@@ -0,0 +1,91 @@
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from forum.benchmarks import percentile
+from forum.domain.duplicates import (
+    CANDIDATE_LIMIT,
+    MinHashLSHIndex,
+    band_keys,
+    minhash,
+    question_band_keys,
+    question_shingles,
+)
+
+VOCABULARY_SIZE = 20_000
+VOCABULARY = [f"w{rank}" for rank in range(1, VOCABULARY_SIZE + 1)]
+# Zipf's law: the r-th most common word has frequency proportional to 1/r, as in real text.
+ZIPF_CUM_WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, VOCABULARY_SIZE + 1)))
+# Share of words a near-duplicate rewrites.
+REWRITE_FRACTION = 0.2
+
+
+def synthetic_words(rng, count):
+    return rng.choices(VOCABULARY, cum_weights=ZIPF_CUM_WEIGHTS, k=count)
+
+
+def synthetic_question(seed, index):
+    rng = random.Random(seed * 1_000_003 + index)
+    return " ".join(synthetic_words(rng, rng.randint(5, 10))), " ".join(synthetic_words(rng, rng.randint(20, 60)))
+
+
+def rewrite(rng, text):
+    words = text.split()
+    for position in rng.sample(range(len(words)), int(len(words) * REWRITE_FRACTION)):
+        words[position] = synthetic_words(rng, 1)[0]
+    return " ".join(words)
+
+
+class Command(BaseCommand):
+    help = (
+        "Build an in-memory MinHash/LSH duplicate index over synthetic questions, then time lookups of "
+        "rewritten copies of indexed questions (signature plus LSH query, without the database) and "
+        "report how often the original is among the candidates. Also times saving and loading the index file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=500_000, help="Synthetic questions to index.")
+        parser.add_argument("--lookups", type=int, default=1000, help="Timed lookups.")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        seed, count = options["seed"], options["questions"]
+        start = time.perf_counter()
+        index = MinHashLSHIndex.build(
+            (question_id, question_band_keys(*synthetic_question(seed, question_id)))
+            for question_id in range(1, count + 1)
+        )
+        self.stdout.write(f"Indexed {count} questions in {time.perf_counter() - start:.1f}s.")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "duplicates.idx")
+            start = time.perf_counter()
+            size = index.save(path)
+            saved = time.perf_counter() - start
+            start = time.perf_counter()
+            index = MinHashLSHIndex.load(path)
+            loaded = time.perf_counter() - start
+        self.stdout.write(f"Index file {size / 1024 / 1024:.1f} MiB: save {saved:.2f}s, load {loaded:.2f}s.")
+
+        rng = random.Random(seed)
+        timings, found, candidates = [], 0, []
+        for _ in range(options["lookups"]):
+            question_id = rng.randint(1, count)
+            title, description = synthetic_question(seed, question_id)
+            title, description = rewrite(rng, title), rewrite(rng, description)
+            start = time.perf_counter()
+            hits = index.query(band_keys(minhash(question_shingles(title, description))))
+            top = [hit for hit, _ in hits.most_common(CANDIDATE_LIMIT)]
+            timings.append((time.perf_counter() - start) * 1000)
+            found += question_id in top
+            candidates.append(len(hits))
+        self.stdout.write(
+            f"Lookup p50={statistics.median(timings):.3f}ms p95={percentile(timings, 0.95):.3f}ms "
+            f"max={max(timings):.3f}ms; original in top {CANDIDATE_LIMIT}: {found / len(timings):.1%}; "
+            f"median candidates {statistics.median(candidates):.0f}."
+        )
@@ -0,0 +1,54 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from forum.benchmarks import ROLLED_BACK_HELP, rolled_back, run_benchmarks, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic forum, request every forum/accounts route and report query count, "
+        "SQL time and p50/p95 wall time as JSON. Fails when a route exceeds its query budget. "
+        f"{ROLLED_BACK_HELP}"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--questions", type=int, default=50)
+        parser.add_argument("--answers", type=int, default=5, help="Answers per question.")
+        parser.add_argument("--comments", type=int, default=4, help="Top-level comments per answer.")
+        parser.add_argument("--replies", type=int, default=2, help="Replies per top-level comment.")
+        parser.add_argument("--tags", type=int, default=30)
+        parser.add_argument("--votes", type=int, default=5, help="Votes per question, answer and comment.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed requests per route and profile.")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument(
+            "--no-enforce", action="store_true", help="Report query-budget violations without failing."
+        )
+
+    def handle(self, *args, **options):
+        with rolled_back(), override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            dataset = seed_dataset(
+                users=options["users"],
+                questions=options["questions"],
+                answers_per_question=options["answers"],
+                comments_per_answer=options["comments"],
+                replies_per_comment=options["replies"],
+                tags=options["tags"],
+                votes_per_object=options["votes"],
+            )
+            results = run_benchmarks(dataset, repeat=options["repeat"])
+
+        report = json.dumps({"dataset": dataset["counts"], "results": results}, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(report)
+            self.stdout.write(f"Wrote benchmark report for {len(results)} requests to {options['output']}.")
+        else:
+            self.stdout.write(report)
+
+        over_budget = [f"{r['route']} ({r['profile']}): {r['queries']} > {r['query_budget']}" for r in results if r["over_budget"]]
+        if over_budget and not options["no_enforce"]:
+            raise CommandError("Query budget exceeded:\n  " + "\n  ".join(over_budget))
@@ -0,0 +1,50 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from forum.benchmarks import ROLLED_BACK_HELP, rolled_back, seed_dataset
+from forum.domain.ranking import recompute_hot_scores
+from forum.models import Question
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare an incremental hot-score recompute (stale questions only) against a full recompute "
+        f"on a synthetic dataset. {ROLLED_BACK_HELP}"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=20_000, help="Number of questions to seed.")
+        parser.add_argument("--changed", type=float, default=0.01, help="Fraction of questions marked as changed.")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed runs per strategy.")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed for the synthetic dataset.")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.run(options)
+
+    def run(self, options):
+        start = time.perf_counter()
+        seed_dataset(
+            users=50, questions=options["questions"], answers_per_question=2, comments_per_answer=0,
+            replies_per_comment=0, tags=20, votes_per_object=3, seed=options["seed"],
+        )
+        recompute_hot_scores(full=True)
+        self.stdout.write(f"Seeded {options['questions']} questions in {time.perf_counter() - start:.1f}s")
+
+        rng = random.Random(options["seed"])
+        ids = list(Question.objects.values_list("pk", flat=True))
+        changed = rng.sample(ids, max(1, int(len(ids) * options["changed"])))
+
+        for label, full in (("incremental", False), ("full", True)):
+            timings = []
+            for _ in range(options["repeat"]):
+                Question.objects.filter(pk__in=changed).update(hot_score_stale=True)
+                start = time.perf_counter()
+                updated = recompute_hot_scores(full=full)
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f"{label:12} rows={updated:<7} median={statistics.median(timings):9.2f}ms  max={max(timings):9.2f}ms"
+            )
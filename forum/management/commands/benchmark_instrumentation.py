@@ -0,0 +1,96 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from forum.benchmarks import ROLLED_BACK_HELP, rolled_back, seed_dataset
+from forum.instrumentation import record_query
+
+INSTRUMENTATION_MIDDLEWARE = "forum.instrumentation.PerformanceMiddleware"
+
+# Read-heavy pages that exercise queries, template rendering and the middleware stack.
+ROUTES = (
+    ("question_list", lambda dataset: {}),
+    ("question_detail", lambda dataset: {"question_id": dataset["question"].pk}),
+    ("answer-list-partial", lambda dataset: {"question_id": dataset["question"].pk}),
+    ("answer_detail", lambda dataset: {"answer_id": dataset["answer"].pk}),
+    ("answer-comments-partial", lambda dataset: {"answer_id": dataset["answer"].pk}),
+)
+
+
+@contextmanager
+def query_recorder_detached():
+    wrappers = connection.execute_wrappers
+    removed = record_query in wrappers
+    if removed:
+        wrappers.remove(record_query)
+    try:
+        yield
+    finally:
+        if removed:
+            wrappers.append(record_query)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the overhead of the per-request performance instrumentation: request read-heavy forum "
+        "pages alternately with and without PerformanceMiddleware and its query recorder, and compare "
+        f"median wall time. Fails when the overhead exceeds --max-overhead percent. {ROLLED_BACK_HELP}"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=200, help="Timed requests per route and mode.")
+        parser.add_argument("--questions", type=int, default=50)
+        parser.add_argument(
+            "--max-overhead", type=float, default=2.0, help="Largest acceptable overhead, in percent."
+        )
+
+    def handle(self, *args, **options):
+        with rolled_back(), override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            dataset = seed_dataset(questions=options["questions"])
+            timings = self.run(dataset, options["rounds"])
+
+        total_on = total_off = 0.0
+        for name, _ in ROUTES:
+            on, off = statistics.median(timings[name, True]), statistics.median(timings[name, False])
+            total_on += on
+            total_off += off
+            self.stdout.write(f"{name:24} off={off:8.3f}ms  on={on:8.3f}ms  overhead={(on / off - 1) * 100:+6.2f}%")
+        overhead = (total_on / total_off - 1) * 100
+        self.stdout.write(f"{'all routes':24} overhead={overhead:+.2f}%")
+        if overhead > options["max_overhead"]:
+            raise CommandError(f"Instrumentation overhead {overhead:.2f}% exceeds {options['max_overhead']}%.")
+
+    def run(self, dataset, rounds):
+        paths = [(name, reverse(name, kwargs=kwargs(dataset))) for name, kwargs in ROUTES]
+        instrumented = Client()
+        plain = Client()
+        # A client's handler builds its middleware chain on the first request.
+        with override_settings(MIDDLEWARE=[m for m in settings.MIDDLEWARE if m != INSTRUMENTATION_MIDDLEWARE]):
+            for _, path in paths:
+                plain.get(path)
+        for _, path in paths:
+            instrumented.get(path)
+
+        timings = {(name, enabled): [] for name, _ in ROUTES for enabled in (True, False)}
+        for index in range(rounds):
+            # Alternate which mode goes first so drift and cache warmth hit both equally.
+            for enabled in (True, False) if index % 2 else (False, True):
+                for name, path in paths:
+                    if enabled:
+                        start = time.perf_counter()
+                        instrumented.get(path)
+                        elapsed = time.perf_counter() - start
+                    else:
+                        with query_recorder_detached():
+                            start = time.perf_counter()
+                            plain.get(path)
+                            elapsed = time.perf_counter() - start
+                    timings[name, enabled].append(elapsed * 1000)
+        return timings
@@ -0,0 +1,78 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from forum.benchmarks import ROLLED_BACK_HELP, rolled_back
+from forum.domain.search import IContainsSearchBackend, get_search_backend
+from forum.models import Question
+
+User = get_user_model()
+
+WORDS = (
+    "django python query index cache template model view form signal migration database "
+    "sqlite postgres search filter tag vote answer comment user session middleware async "
+    "thread worker queue email deploy docker nginx gunicorn static media test fixture"
+).split()
+
+# Synthetic filler words so term frequencies follow a long-tailed (Zipf-like) distribution.
+VOCABULARY = WORDS + [f"word{i}" for i in range(5000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+DEFAULT_QUERIES = ["django", "postgres index", "async worker", "templ", "docker nginx deploy"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare question search latency of the full-text backend against the icontains scan "
+        f"on a synthetic dataset. {ROLLED_BACK_HELP}"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=100_000, help="Number of questions to seed.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query and backend.")
+        parser.add_argument("--query", action="append", dest="queries", help="Search string to time (repeatable).")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed for the synthetic corpus.")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.run(options)
+
+    def run(self, options):
+        rng = random.Random(options["seed"])
+        self.seed(options["questions"], rng)
+
+        backends = [("icontains", IContainsSearchBackend()), (type(get_search_backend()).__name__, get_search_backend())]
+        for value in options["queries"] or DEFAULT_QUERIES:
+            for label, backend in backends:
+                timings = []
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    queryset = backend.search(Question.objects.all(), value)
+                    total = queryset.count()
+                    list(queryset.order_by("-search_rank", "-created_at")[:10])
+                    timings.append((time.perf_counter() - start) * 1000)
+                self.stdout.write(
+                    f"{value!r:24} {label:22} matches={total:<7} "
+                    f"median={statistics.median(timings):8.2f}ms  max={max(timings):8.2f}ms"
+                )
+
+    def seed(self, count, rng):
+        author = User.objects.create_user(username="search-benchmark", email="search-benchmark@example.com")
+        start = time.perf_counter()
+        batch = []
+        for i in range(count):
+            batch.append(
+                Question(
+                    title=" ".join(rng.choices(VOCABULARY, WEIGHTS, k=6)),
+                    description=" ".join(rng.choices(VOCABULARY, WEIGHTS, k=40)),
+                    author=author,
+                )
+            )
+            if len(batch) == 2000:
+                Question.objects.bulk_create(batch)
+                batch = []
+        Question.objects.bulk_create(batch)
+        self.stdout.write(f"Seeded {count} questions in {time.perf_counter() - start:.1f}s")
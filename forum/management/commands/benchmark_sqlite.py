@@ -0,0 +1,150 @@
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from forum.benchmarks import percentile
+from forum.domain.retry import call_with_lock_retry, is_lock_error
+
+SCHEMA = (
+    "CREATE TABLE vote (user_id INTEGER NOT NULL, object_id INTEGER NOT NULL, PRIMARY KEY (user_id, object_id))",
+    "CREATE TABLE counter (object_id INTEGER PRIMARY KEY, upvotes INTEGER NOT NULL DEFAULT 0)",
+)
+
+# Django's defaults: 5s busy timeout, DEFERRED transactions, rollback journal, a new connection per request.
+STOCK_OPTIONS = {"timeout": 5}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent vote-toggle write throughput on scratch SQLite files, first with Django's stock "
+        "SQLite settings and a connection per request, then with the tuned SQLITE_OPTIONS profile, "
+        "persistent connections and lock retries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8, help="Concurrent writers.")
+        parser.add_argument("--ops", type=int, default=200, help="Vote toggles per writer.")
+        parser.add_argument("--objects", type=int, default=20, help="Distinct objects being voted on.")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        tuned = getattr(settings, "SQLITE_OPTIONS", settings.DATABASES["default"].get("OPTIONS", {}))
+        profiles = (
+            ("stock", STOCK_OPTIONS, False),
+            ("tuned", tuned, True),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for name, sqlite_options, tuned_profile in profiles:
+                path = os.path.join(directory, f"{name}.sqlite3")
+                create_schema(path, options["objects"])
+                result = run_workload(path, sqlite_options, tuned_profile, options)
+                self.stdout.write(
+                    f"{name:6} committed={result['committed']:<6} lock_errors={result['lock_errors']:<5} "
+                    f"retries={result['retries']:<5} tps={result['tps']:9.1f}  "
+                    f"p50={result['p50_ms']:7.2f}ms  p95={result['p95_ms']:7.2f}ms"
+                )
+
+
+def create_schema(path, objects):
+    conn = sqlite3.connect(path)
+    with conn:
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.executemany("INSERT INTO counter (object_id) VALUES (?)", [(i,) for i in range(objects)])
+    conn.close()
+
+
+def connect(path, sqlite_options):
+    """Open a connection configured the way Django's SQLite backend applies these OPTIONS."""
+    conn = sqlite3.connect(path, timeout=sqlite_options.get("timeout", 5), isolation_level=None,
+                           check_same_thread=False)
+    for command in sqlite_options.get("init_command", "").split(";"):
+        if command := command.strip():
+            conn.execute(command)
+    return conn
+
+
+def toggle(conn, begin, user_id, object_id):
+    """The statement shape of ``toggle_vote``: read the vote, then flip it and the counter in one transaction."""
+    conn.execute(begin)
+    try:
+        conn.execute("SELECT upvotes FROM counter WHERE object_id = ?", (object_id,)).fetchone()
+        if conn.execute("DELETE FROM vote WHERE user_id = ? AND object_id = ?", (user_id, object_id)).rowcount:
+            delta = -1
+        else:
+            conn.execute("INSERT INTO vote (user_id, object_id) VALUES (?, ?)", (user_id, object_id))
+            delta = 1
+        conn.execute("UPDATE counter SET upvotes = upvotes + ? WHERE object_id = ?", (delta, object_id))
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+
+def run_workload(path, sqlite_options, tuned, options):
+    mode = sqlite_options.get("transaction_mode")
+    begin = f"BEGIN {mode}" if mode else "BEGIN"
+    lock = threading.Lock()
+    stats = {"committed": 0, "lock_errors": 0, "retries": 0, "timings": []}
+
+    def writer(index):
+        rng = random.Random(options["seed"] * 1000 + index)
+        conn = connect(path, sqlite_options) if tuned else None
+        committed = lock_errors = retries = 0
+        timings = []
+        for _ in range(options["ops"]):
+            args = (rng.randrange(1000), rng.randrange(options["objects"]))
+            start = time.perf_counter()
+            try:
+                if tuned:
+                    attempts = []
+
+                    def attempt():
+                        attempts.append(1)
+                        toggle(conn, begin, *args)
+
+                    call_with_lock_retry(attempt)
+                    retries += len(attempts) - 1
+                else:
+                    request_conn = connect(path, sqlite_options)
+                    try:
+                        toggle(request_conn, begin, *args)
+                    finally:
+                        request_conn.close()
+                committed += 1
+            except sqlite3.OperationalError as exc:
+                if not is_lock_error(exc):
+                    raise
+                lock_errors += 1
+            timings.append((time.perf_counter() - start) * 1000)
+        if conn is not None:
+            conn.close()
+        with lock:
+            stats["committed"] += committed
+            stats["lock_errors"] += lock_errors
+            stats["retries"] += retries
+            stats["timings"].extend(timings)
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(options["threads"])]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "committed": stats["committed"],
+        "lock_errors": stats["lock_errors"],
+        "retries": stats["retries"],
+        "tps": stats["committed"] / elapsed,
+        "p50_ms": statistics.median(stats["timings"]),
+        "p95_ms": percentile(stats["timings"], 0.95),
+    }
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from forum.domain.duplicates import BUILD_CHUNK_SIZE, build_duplicate_index, duplicate_index_path
+
+
+class Command(BaseCommand):
+    help = (
+        "Sign every question and write the MinHash/LSH duplicate index file that web processes load "
+        "on their first lookup (settings.FORUM_DUPLICATE_INDEX_PATH unless --path is given)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", help="Write the index here instead of FORUM_DUPLICATE_INDEX_PATH.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=BUILD_CHUNK_SIZE, help="Questions fetched from the database at a time."
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"] or duplicate_index_path()
+        if not path:
+            raise CommandError("Set FORUM_DUPLICATE_INDEX_PATH or pass --path.")
+        start = time.perf_counter()
+        index = build_duplicate_index(chunk_size=options["chunk_size"])
+        size = index.save(path)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {len(index.ids)} questions in {time.perf_counter() - start:.1f}s; "
+                f"wrote {size / 1024 / 1024:.1f} MiB to {path}."
+            )
+        )
@@ -0,0 +1,45 @@
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from forum.domain.corpus import EXPORT_CHUNK_SIZE, export_corpus
+
+
+def open_output(path):
+    if path == "-":
+        return sys.stdout
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream every user, tag, question, answer, comment and vote as JSON Lines with constant memory. "
+        "Paths ending in .gz are compressed; '-' writes to standard output."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="File to write, or '-' for standard output.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Rows fetched from the database at a time."
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        stream = open_output(options["output"])
+        try:
+            counts = export_corpus(stream, chunk_size=options["chunk_size"])
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        report = self.stderr if options["output"] == "-" else self.stdout
+        report.write(throughput_summary("Exported", counts, time.perf_counter() - start))
+
+
+def throughput_summary(verb, counts, elapsed):
+    total = sum(counts.values())
+    sections = ", ".join(f"{count} {kind}" for kind, count in counts.items())
+    return f"{verb} {total} rows ({sections}) in {elapsed:.1f}s, {total / max(elapsed, 1e-9):.0f} rows/s."
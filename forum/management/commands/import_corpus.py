@@ -0,0 +1,42 @@
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from forum.domain.corpus import IMPORT_BATCH_SIZE, import_corpus
+from forum.management.commands.export_corpus import throughput_summary
+
+
+def open_input(path):
+    if path == "-":
+        return sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a corpus written by export_corpus in bulk_create batches, remapping ids onto this database. "
+        "Existing users and tags are reused by username and name; counters, comment paths, hot scores "
+        "and the search index are rebuilt once at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="File to read, or '-' for standard input.")
+        parser.add_argument(
+            "--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Rows inserted per bulk_create call."
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        stream = open_input(options["input"])
+        try:
+            counts = import_corpus(stream, batch_size=options["batch_size"])
+        except ValueError as exc:
+            raise CommandError(f"Import aborted, nothing was written. {exc}") from exc
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write(self.style.SUCCESS(throughput_summary("Imported", counts, time.perf_counter() - start)))
@@ -0,0 +1,41 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from forum.domain.reputation import REBUILD_CHUNK_SIZE, rebuild_reputation
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute (or verify) every user's reputation by streaming the Vote table in chunks. "
+        "Each correction is recorded in the reputation ledger."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report users whose reputation drifted from their votes; do not modify anything.",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=REBUILD_CHUNK_SIZE, help="Votes fetched from the database at a time."
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        drifted = rebuild_reputation(chunk_size=options["chunk_size"], dry_run=options["verify"])
+        elapsed = time.perf_counter() - start
+        if options["verbosity"] > 1:
+            usernames = dict(get_user_model().objects.filter(pk__in=list(drifted)[:20]).values_list("pk", "username"))
+            for user_id, (stored, expected) in list(drifted.items())[:20]:
+                self.stdout.write(f"  {usernames.get(user_id, user_id)}: stored {stored}, expected {expected}")
+
+        if options["verify"]:
+            if drifted:
+                raise CommandError(
+                    f"{len(drifted)} user(s) have drifted reputation; run without --verify to fix."
+                )
+            self.stdout.write(self.style.SUCCESS(f"Reputation is consistent ({elapsed:.1f}s)."))
+            return
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt reputation in {elapsed:.1f}s: {len(drifted)} user(s) corrected."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from forum.domain.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Re-create and repopulate the full-text search index for questions."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt question search index using {type(backend).__name__} ({connection.vendor}).")
+        )
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from forum.domain.vote import VOTABLE_MODELS, find_vote_counter_drift, rebuild_vote_counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or verify) the denormalized vote counters on questions, answers and comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report rows whose counters drifted from the Vote table; do not modify anything.",
+        )
+        parser.add_argument(
+            "--model",
+            choices=[model._meta.model_name for model in VOTABLE_MODELS],
+            action="append",
+            help="Restrict to a single votable model. May be given more than once.",
+        )
+
+    def handle(self, *args, **options):
+        selected = options["model"]
+        models = [m for m in VOTABLE_MODELS if not selected or m._meta.model_name in selected]
+
+        if options["verify"]:
+            self.verify(models, verbosity=options["verbosity"])
+            return
+
+        for model in models:
+            updated = rebuild_vote_counters(model)
+            self.stdout.write(f"Rebuilt vote counters for {updated} {model._meta.verbose_name_plural}.")
+        self.stdout.write(self.style.SUCCESS("Vote counters rebuilt."))
+
+    def verify(self, models, verbosity):
+        total_drift = 0
+        for model in models:
+            drifted = find_vote_counter_drift(model)
+            count = drifted.count()
+            total_drift += count
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {count} drifted row(s).")
+            if verbosity > 1:
+                for obj in drifted[:20]:
+                    self.stdout.write(
+                        f"  #{obj.pk}: stored {obj.upvote_count}/{obj.downvote_count}, "
+                        f"expected {obj.expected_upvotes}/{obj.expected_downvotes}"
+                    )
+
+        if total_drift:
+            raise CommandError(f"{total_drift} row(s) have drifted vote counters; run without --verify to fix.")
+        self.stdout.write(self.style.SUCCESS("Vote counters are consistent."))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from forum.domain.ranking import HOT_BATCH_SIZE, recompute_hot_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the hot ranking of questions whose votes or answers changed. "
+        "With --interval it keeps running as a worker loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Recompute every question, not only stale ones.")
+        parser.add_argument("--batch-size", type=int, default=HOT_BATCH_SIZE, help="Questions updated per transaction.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Keep polling for stale questions, sleeping this many seconds between passes.",
+        )
+
+    def handle(self, *args, **options):
+        full = options["full"]
+        while True:
+            start = time.perf_counter()
+            updated = recompute_hot_scores(full=full, batch_size=options["batch_size"])
+            if updated or options["verbosity"] > 1 or options["interval"] is None:
+                self.stdout.write(
+                    f"Recomputed hot scores for {updated} question(s) in {(time.perf_counter() - start) * 1000:.1f}ms."
+                )
+            if options["interval"] is None:
+                return
+            full = False
+            time.sleep(options["interval"])
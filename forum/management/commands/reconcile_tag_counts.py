@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from forum.domain.tags import find_tag_count_drift, find_uncounted_tags, reconcile_tag_counts
+
+
+class Command(BaseCommand):
+    help = "Repair (or verify) the denormalized per-tag question counts against taggit's through table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report tags whose counts drifted; do not modify anything.",
+        )
+
+    def handle(self, *args, **options):
+        if options["verify"]:
+            self.verify(verbosity=options["verbosity"])
+            return
+
+        fixed = reconcile_tag_counts()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled tag counts: {fixed} counter(s) fixed."))
+
+    def verify(self, verbosity):
+        drifted = find_tag_count_drift().select_related("tag")
+        uncounted = find_uncounted_tags()
+        count = drifted.count() + uncounted.count()
+        self.stdout.write(f"{count} drifted tag count(s).")
+        if verbosity > 1:
+            for counter in drifted[:20]:
+                self.stdout.write(
+                    f"  {counter.tag.name}: stored {counter.question_count}, expected {counter.expected_count}"
+                )
+            for tag in uncounted[:20]:
+                self.stdout.write(f"  {tag.name}: no counter")
+        if count:
+            raise CommandError(f"{count} tag count(s) have drifted; run without --verify to fix.")
+        self.stdout.write(self.style.SUCCESS("Tag counts are consistent."))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from forum.domain.related import RELATED_BATCH_SIZE, RelatedCorpus, refresh_related_questions
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the related-questions lists of questions whose title or tags changed, and of the "
+        "questions whose lists the change affects. With --interval it keeps running as a worker loop, "
+        "holding every question's tags and title words in memory between passes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Recompute every question, not only stale ones.")
+        parser.add_argument(
+            "--batch-size", type=int, default=RELATED_BATCH_SIZE, help="Questions recomputed per transaction."
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Keep polling for stale questions, sleeping this many seconds between passes.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        corpus = RelatedCorpus.load()
+        if options["verbosity"] > 1:
+            self.stdout.write(
+                f"Loaded {len(corpus.features)} questions in {(time.perf_counter() - start) * 1000:.1f}ms."
+            )
+        full = options["full"]
+        while True:
+            start = time.perf_counter()
+            written = refresh_related_questions(corpus, full=full, batch_size=options["batch_size"])
+            if written or options["verbosity"] > 1 or options["interval"] is None:
+                self.stdout.write(
+                    f"Refreshed related questions for {written} question(s) "
+                    f"in {(time.perf_counter() - start) * 1000:.1f}ms."
+                )
+            if options["interval"] is None:
+                return
+            full = False
+            time.sleep(options["interval"])
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:43
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_vote_counters(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    Vote = apps.get_model("forum", "Vote")
+
+    for model_name in ("question", "answer", "comment"):
+        model = apps.get_model("forum", model_name)
+        content_type, _ = ContentType.objects.get_or_create(app_label="forum", model=model_name)
+        votes = (
+            Vote.objects.filter(content_type=content_type, object_id=OuterRef("pk"))
+            .order_by()
+            .values("object_id")
+        )
+
+        def count_of(vote_type):
+            return Coalesce(
+                Subquery(votes.filter(vote_type=vote_type).annotate(total=Count("pk")).values("total")[:1]),
+                Value(0),
+            )
+
+        model.objects.update(
+            upvote_count=count_of(1),
+            downvote_count=count_of(-1),
+            score=count_of(1) - count_of(-1),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='downvote_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of downvotes cast on this object.'),
+        ),
+        migrations.AddField(
+            model_name='answer',
+            name='score',
+            field=models.IntegerField(default=0, help_text='Upvotes minus downvotes.'),
+        ),
+        migrations.AddField(
+            model_name='answer',
+            name='upvote_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of upvotes cast on this object.'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='downvote_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of downvotes cast on this object.'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='score',
+            field=models.IntegerField(default=0, help_text='Upvotes minus downvotes.'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='upvote_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of upvotes cast on this object.'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='downvote_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of downvotes cast on this object.'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='score',
+            field=models.IntegerField(default=0, help_text='Upvotes minus downvotes.'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='upvote_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of upvotes cast on this object.'),
+        ),
+        migrations.RunPython(backfill_vote_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+from django.db import migrations
+
+# The search index as first installed; forum.domain.search re-creates it
+# (with any later changes) after migrations and on rebuild_search_index.
+INSTALL_SQL = {
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS forum_question_fts USING fts5(
+            title, description,
+            content='forum_question', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS forum_question_fts_ai AFTER INSERT ON forum_question BEGIN
+            INSERT INTO forum_question_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS forum_question_fts_ad AFTER DELETE ON forum_question BEGIN
+            INSERT INTO forum_question_fts(forum_question_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS forum_question_fts_au AFTER UPDATE OF title, description ON forum_question BEGIN
+            INSERT INTO forum_question_fts(forum_question_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO forum_question_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+    ],
+    "postgresql": [
+        """
+        CREATE INDEX IF NOT EXISTS forum_question_search_idx ON forum_question USING GIN ((
+            setweight(to_tsvector('english'::regconfig, COALESCE(title, '')), 'A')
+            || setweight(to_tsvector('english'::regconfig, COALESCE(description, '')), 'B')
+        ))
+        """,
+    ],
+}
+
+UNINSTALL_SQL = {
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS forum_question_fts_ai",
+        "DROP TRIGGER IF EXISTS forum_question_fts_ad",
+        "DROP TRIGGER IF EXISTS forum_question_fts_au",
+        "DROP TABLE IF EXISTS forum_question_fts",
+    ],
+    "postgresql": ["DROP INDEX IF EXISTS forum_question_search_idx"],
+}
+
+
+def install_search_index(apps, schema_editor):
+    for statement in INSTALL_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def uninstall_search_index(apps, schema_editor):
+    for statement in UNINSTALL_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0002_vote_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
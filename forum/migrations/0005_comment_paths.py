@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_comment_paths(apps, schema_editor):
+    """Write every comment's path from the parent links: its ancestors' zero-padded ids, then its own."""
+    Comment = apps.get_model("forum", "Comment")
+    parents = dict(Comment.objects.values_list("pk", "parent_id"))
+    paths = {}
+    for pk in parents:
+        chain = []
+        node = pk
+        while node is not None and node not in paths:
+            chain.append(node)
+            node = parents[node]
+        prefix = paths.get(node, "")
+        for node in reversed(chain):
+            prefix += f"{node:010d}"
+            paths[node] = prefix
+    Comment.objects.bulk_update(
+        [Comment(pk=pk, path=path) for pk, path in paths.items()], ["path"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('forum', '0004_access_pattern_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, help_text="Materialized path: the zero-padded ids of this comment's ancestors followed by its own.", max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['content_type', 'object_id', 'path'], name='forum_comment_tree_idx'),
+        ),
+        migrations.RunPython(backfill_comment_paths, migrations.RunPython.noop),
+    ]
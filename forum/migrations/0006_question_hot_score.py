@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:40
+
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+# The ranking in force when hot_score was introduced.
+HOT_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+HOT_DECAY_SECONDS = 45_000
+ANSWER_WEIGHT = 2
+
+
+def backfill_hot_scores(apps, schema_editor):
+    Question = apps.get_model("forum", "Question")
+    rows = Question.objects.annotate(answer_total=Count("answers")).order_by("pk").values_list(
+        "pk", "score", "answer_total", "created_at"
+    )
+    scored = []
+    for pk, score, answers, created_at in rows.iterator(chunk_size=2000):
+        activity = score + ANSWER_WEIGHT * answers
+        order = math.log10(max(abs(activity), 1))
+        sign = (activity > 0) - (activity < 0)
+        hot_score = sign * order + (created_at - HOT_EPOCH).total_seconds() / HOT_DECAY_SECONDS
+        scored.append(Question(pk=pk, hot_score=hot_score, hot_score_stale=False))
+    Question.objects.bulk_update(scored, ["hot_score", "hot_score_stale"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0005_comment_paths'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='hot_score',
+            field=models.FloatField(default=0, help_text='Time-decayed ranking from score, answer count and age; maintained by recompute_hot_scores.'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='hot_score_stale',
+            field=models.BooleanField(default=True, help_text='Set when votes or answers changed since hot_score was last computed.'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-hot_score', '-id'], name='forum_question_hot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(condition=models.Q(('hot_score_stale', True)), fields=['id'], name='forum_question_hot_stale_idx'),
+        ),
+        migrations.RunPython(backfill_hot_scores, migrations.RunPython.noop),
+    ]
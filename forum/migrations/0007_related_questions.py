@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0006_question_hot_score'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedQuestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(help_text='Position in the list, starting at 0.')),
+                ('score', models.FloatField(help_text='Weighted tag overlap plus title similarity.')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='related_stale',
+            field=models.BooleanField(default=True, help_text='Set when the title or tags changed since the related questions were last computed.'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='related_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text="When refresh_related_questions last wrote this question's related questions.", null=True),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(condition=models.Q(('related_stale', True)), fields=['id'], name='forum_question_rel_stale_idx'),
+        ),
+        migrations.AddField(
+            model_name='relatedquestion',
+            name='question',
+            field=models.ForeignKey(help_text='The question whose list this entry belongs to.', on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='forum.question'),
+        ),
+        migrations.AddField(
+            model_name='relatedquestion',
+            name='related',
+            field=models.ForeignKey(help_text='The question shown as related.', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='forum.question'),
+        ),
+        migrations.AddIndex(
+            model_name='relatedquestion',
+            index=models.Index(fields=['question', 'rank'], name='forum_related_question_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_tag_counters(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    TaggedItem = apps.get_model("taggit", "TaggedItem")
+    Tag = apps.get_model("taggit", "Tag")
+    TagCounter = apps.get_model("forum", "TagCounter")
+
+    content_type, _ = ContentType.objects.get_or_create(app_label="forum", model="question")
+    counts = dict(
+        TaggedItem.objects.filter(content_type=content_type)
+        .order_by()
+        .values("tag_id")
+        .annotate(total=Count("pk"))
+        .values_list("tag_id", "total")
+    )
+    TagCounter.objects.bulk_create(
+        (
+            TagCounter(tag_id=tag_id, question_count=counts.get(tag_id, 0))
+            for tag_id in Tag.objects.values_list("pk", flat=True)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0007_related_questions'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagCounter',
+            fields=[
+                ('tag', models.OneToOneField(help_text='The counted tag.', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counter', serialize=False, to='taggit.tag')),
+                ('question_count', models.PositiveIntegerField(default=0, help_text='Number of questions tagged with it.')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-question_count', 'tag'], name='forum_tagcounter_top_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_tag_counters, migrations.RunPython.noop),
+    ]
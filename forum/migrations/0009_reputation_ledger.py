@@ -0,0 +1,73 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+# The points in force when reputation was introduced.
+POINTS = {
+    "question": {1: 5, -1: -2},
+    "answer": {1: 10, -1: -2},
+    "comment": {1: 1, -1: 0},
+}
+
+
+def backfill_reputation(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    Vote = apps.get_model("forum", "Vote")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    ReputationEntry = apps.get_model("forum", "ReputationEntry")
+
+    totals = {}
+    for model_name, points in POINTS.items():
+        content_type, _ = ContentType.objects.get_or_create(app_label="forum", model=model_name)
+        authors = apps.get_model("forum", model_name).objects.filter(pk=OuterRef("object_id")).values("author_id")
+        votes = (
+            Vote.objects.filter(content_type=content_type)
+            .annotate(author=Subquery(authors))
+            .order_by("pk")
+            .values_list("author", "user_id", "vote_type")
+        )
+        for author_id, voter_id, vote_type in votes.iterator(chunk_size=5000):
+            # Votes on one's own posts earn nothing.
+            if author_id is not None and author_id != voter_id:
+                totals[author_id] = totals.get(author_id, 0) + points.get(vote_type, 0)
+
+    earned = {user_id: total for user_id, total in totals.items() if total}
+    ReputationEntry.objects.bulk_create(
+        (ReputationEntry(user_id=user_id, delta=total, reason="rebuild") for user_id, total in earned.items()),
+        batch_size=1000,
+    )
+    User.objects.bulk_update(
+        [User(pk=user_id, reputation=total) for user_id, total in earned.items()], ["reputation"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('forum', '0008_tag_counters'),
+        ('accounts', '0003_user_reputation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReputationEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField(help_text='Points gained (positive) or lost (negative).')),
+                ('reason', models.CharField(choices=[('vote', 'Vote'), ('rebuild', 'Rebuild correction')], default='vote', max_length=10)),
+                ('object_id', models.PositiveIntegerField(blank=True, help_text='The ID of the voted post.', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('content_type', models.ForeignKey(blank=True, help_text='The type of the voted post, for vote entries.', null=True, on_delete=django.db.models.deletion.SET_NULL, to='contenttypes.contenttype')),
+                ('user', models.ForeignKey(help_text='The user whose reputation changed.', on_delete=django.db.models.deletion.CASCADE, related_name='reputation_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at', '-id'], name='forum_reputation_user_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_reputation, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0009_reputation_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionSearchEntry',
+            fields=[
+                ('question', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='forum.question')),
+                ('title', models.TextField()),
+                ('description', models.TextField()),
+            ],
+            options={
+                'db_table': 'forum_question_fts',
+                'managed': False,
+            },
+        ),
+    ]
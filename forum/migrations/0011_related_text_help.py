@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0010_question_search_entry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='question',
+            name='related_stale',
+            field=models.BooleanField(default=True, help_text='Set when the title, description or tags changed since the related questions were last computed.'),
+        ),
+        migrations.AlterField(
+            model_name='relatedquestion',
+            name='score',
+            field=models.FloatField(help_text='Weighted tag, title and description similarity to the question.'),
+        ),
+    ]
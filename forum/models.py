@@ -1,44 +1,60 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from taggit.managers import TaggableManager
+from taggit.models import Tag
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
-from django.db.models import Sum, Case, When, IntegerField
 
 User = get_user_model()
 
+class TimestampField(models.DateTimeField):
+    """
+    DateTimeField whose auto_now/auto_now_add stamping is skipped for instances with
+    ``preserve_timestamps`` set, such as rows loaded by the corpus import.
+    """
+
+    def pre_save(self, model_instance, add):
+        if getattr(model_instance, "preserve_timestamps", False):
+            return getattr(model_instance, self.attname)
+        return super().pre_save(model_instance, add)
+
+    def deconstruct(self):
+        # Stored exactly like a DateTimeField, so migrations keep referring to that.
+        name, _, args, kwargs = super().deconstruct()
+        return name, "django.db.models.DateTimeField", args, kwargs
+
+
 class TimeStampedModel(models.Model):
     """
     Abstract base model that provides common timestamp fields.
     """
 
-    created_at = models.DateTimeField(auto_now_add=True, help_text="Date and time when the object was created.")
-    updated_at = models.DateTimeField(auto_now=True, help_text="Date and time when the object was last updated.")
+    created_at = TimestampField(auto_now_add=True, help_text="Date and time when the object was created.")
+    updated_at = TimestampField(auto_now=True, help_text="Date and time when the object was last updated.")
+
+    class Meta:
+        abstract = True
+
+class VoteCountMixin(models.Model):
+    """
+    Abstract base model that stores denormalized vote counters.
+
+    The counters are kept in sync with the ``Vote`` table by the signal
+    handlers in ``forum.signals`` and can be rebuilt in bulk with the
+    ``rebuild_vote_counts`` management command.
+    """
+
+    upvote_count = models.PositiveIntegerField(default=0, help_text="Number of upvotes cast on this object.")
+    downvote_count = models.PositiveIntegerField(default=0, help_text="Number of downvotes cast on this object.")
+    score = models.IntegerField(default=0, help_text="Upvotes minus downvotes.")
 
     class Meta:
         abstract = True
 
-class VoteCountMixin:
     def get_vote_counts(self):
-        votes = self.votes.aggregate(
-            upvotes=Sum(
-                Case(
-                    When(vote_type=1, then=1),
-                    default=0,
-                    output_field=IntegerField()
-                )
-            ),
-            downvotes=Sum(
-                Case(
-                    When(vote_type=-1, then=1),
-                    default=0,
-                    output_field=IntegerField()
-                )
-            )
-        )
         return {
-            "upvotes": votes.get('upvotes') or 0,
-            "downvotes": votes.get('downvotes') or 0,
+            "upvotes": self.upvote_count,
+            "downvotes": self.downvote_count,
         }
 
     def get_user_voted_type(self, user):
@@ -65,11 +81,179 @@ class Question(VoteCountMixin,TimeStampedModel):
     )
     tags = TaggableManager(help_text="Add relevant tags to categorize and improve discoverability of your question.")
     votes = GenericRelation("Vote", related_query_name="questions", help_text="All votes (upvotes/downvotes) associated with this question.")
+    hot_score = models.FloatField(
+        default=0,
+        help_text="Time-decayed ranking from score, answer count and age; maintained by recompute_hot_scores.",
+    )
+    hot_score_stale = models.BooleanField(
+        default=True,
+        help_text="Set when votes or answers changed since hot_score was last computed.",
+    )
+    related_stale = models.BooleanField(
+        default=True,
+        help_text="Set when the title, description or tags changed since the related questions were last computed.",
+    )
+    related_updated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="When refresh_related_questions last wrote this question's related questions.",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="forum_question_recent_idx"),
+            models.Index(fields=["-hot_score", "-id"], name="forum_question_hot_idx"),
+            models.Index(fields=["-upvote_count", "-id"], name="forum_question_popular_idx"),
+            models.Index(fields=["-downvote_count", "-id"], name="forum_question_unpopular_idx"),
+            models.Index(
+                fields=["id"], condition=models.Q(hot_score_stale=True), name="forum_question_hot_stale_idx"
+            ),
+            models.Index(
+                fields=["id"], condition=models.Q(related_stale=True), name="forum_question_rel_stale_idx"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the persisted text so saves that leave it alone keep the related list.
+        instance._loaded_text = (instance.__dict__.get("title"), instance.__dict__.get("description"))
+        return instance
+
+    def text_changed(self):
+        """Whether saving would write a title or description other than the one loaded."""
+        if self._state.adding or not hasattr(self, "_loaded_text"):
+            return True
+        return self._loaded_text != (self.__dict__.get("title"), self.__dict__.get("description"))
 
     def __str__(self):
         return self.title
 
 
+class RelatedQuestion(models.Model):
+    """
+    One entry of a question's precomputed "related questions" list.
+
+    The lists are written by the ``refresh_related_questions`` management
+    command (see ``forum.domain.related``) and read in rank order.
+    """
+
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name="related_entries",
+        help_text="The question whose list this entry belongs to.",
+    )
+    related = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name="+",
+        help_text="The question shown as related.",
+    )
+    rank = models.PositiveSmallIntegerField(help_text="Position in the list, starting at 0.")
+    score = models.FloatField(help_text="Weighted tag, title and description similarity to the question.")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["question", "rank"], name="forum_related_question_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.related_id} related to {self.question_id}"
+
+
+class TagCounter(models.Model):
+    """
+    Denormalized number of questions carrying a tag.
+
+    Kept in step with taggit's m2m signals by the handlers in
+    ``forum.signals``; bulk loads bypass them, and the
+    ``reconcile_tag_counts`` management command repairs any drift.
+    """
+
+    tag = models.OneToOneField(
+        Tag,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="counter",
+        help_text="The counted tag.",
+    )
+    question_count = models.PositiveIntegerField(default=0, help_text="Number of questions tagged with it.")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-question_count", "tag"], name="forum_tagcounter_top_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.tag_id}: {self.question_count}"
+
+
+class QuestionSearchEntry(models.Model):
+    """
+    A row of the SQLite FTS5 index over question text, joined by the SQLite search backend.
+
+    The table is created and kept in sync by forum.domain.search, not by migrations.
+    """
+
+    question = models.OneToOneField(
+        Question,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        related_name="search_entry",
+    )
+    title = models.TextField()
+    description = models.TextField()
+
+    class Meta:
+        managed = False
+        db_table = "forum_question_fts"
+
+
+class ReputationEntry(models.Model):
+    """
+    One change to a user's reputation.
+
+    Appended by ``forum.domain.reputation`` whenever a vote on the user's
+    post is cast, flipped or withdrawn, and by ``rebuild_reputation`` when it
+    corrects a drifted total, so the entries of a user always sum to
+    ``User.reputation``.
+    """
+
+    class Reason(models.TextChoices):
+        VOTE = "vote", "Vote"
+        REBUILD = "rebuild", "Rebuild correction"
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="reputation_entries",
+        help_text="The user whose reputation changed.",
+    )
+    delta = models.IntegerField(help_text="Points gained (positive) or lost (negative).")
+    reason = models.CharField(max_length=10, choices=Reason.choices, default=Reason.VOTE)
+    content_type = models.ForeignKey(
+        ContentType,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        help_text="The type of the voted post, for vote entries.",
+    )
+    object_id = models.PositiveIntegerField(null=True, blank=True, help_text="The ID of the voted post.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-id"], name="forum_reputation_user_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.delta:+d} for {self.user_id} ({self.reason})"
+
+
 class Answer(TimeStampedModel,VoteCountMixin):
     """
     Represents an answer posted to a question.
@@ -90,6 +274,13 @@ class Answer(TimeStampedModel,VoteCountMixin):
     content = models.TextField(help_text="Write your answer here.")
     votes = GenericRelation("Vote", related_query_name="answers", help_text="All votes (upvotes/downvotes) associated with this answer.")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["question", "-created_at", "-id"], name="forum_answer_question_idx"),
+            models.Index(fields=["question", "-upvote_count", "-id"], name="forum_answer_popular_idx"),
+            models.Index(fields=["question", "-downvote_count", "-id"], name="forum_answer_unpopular_idx"),
+        ]
+
     def __str__(self):
         return f"Answer by {self.author.username} to '{self.question.title}'"
 
@@ -124,12 +315,36 @@ class Comment(TimeStampedModel, VoteCountMixin):
         related_name="replies",
         help_text="If this is a reply, select the parent comment.",
     )
+    path = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Materialized path: the zero-padded ids of this comment's ancestors followed by its own.",
+    )
     votes = GenericRelation(
         "Vote",
         related_query_name="comments",
         help_text="All votes (upvotes/downvotes) associated with this comment.",
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["content_type", "object_id", "parent", "-created_at", "-id"],
+                name="forum_comment_target_idx",
+            ),
+            models.Index(fields=["content_type", "object_id", "path"], name="forum_comment_tree_idx"),
+            models.Index(
+                fields=["content_type", "object_id", "parent", "-upvote_count", "-id"],
+                name="forum_comment_popular_idx",
+            ),
+            models.Index(
+                fields=["content_type", "object_id", "parent", "-downvote_count", "-id"],
+                name="forum_comment_unpopular_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author.username}"
 
@@ -161,6 +376,16 @@ class Vote(TimeStampedModel):
 
     class Meta:
         unique_together = ("user", "content_type", "object_id")
+        indexes = [
+            models.Index(fields=["content_type", "object_id", "vote_type"], name="forum_vote_target_type_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the persisted vote type so counter updates can apply a delta.
+        instance._loaded_vote_type = instance.__dict__.get("vote_type", 0)
+        return instance
 
     def __str__(self):
         return f"{self.get_vote_type_display()} by {self.user.username}"
@@ -0,0 +1,165 @@
+from django.core import signing
+from django.core.paginator import InvalidPage, Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorPage:
+    """A forward-only page produced by ``CursorPaginator``.
+
+    Mirrors the parts of ``django.core.paginator.Page`` the templates use,
+    without a page number or total count.
+    """
+
+    is_cursor_page = True
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return False
+
+    def has_other_pages(self):
+        return self.has_next()
+
+
+class CursorPaginator:
+    """Keyset paginator over the queryset's own ordering plus a primary-key tiebreaker.
+
+    Each page is fetched with a ``WHERE (ordering) < (last row)`` condition,
+    so deep pages cost the same as the first one and no COUNT query is run.
+    Cursors are signed tokens holding the ordering values of the last row.
+    """
+
+    salt = "forum.pagination.cursor"
+
+    def __init__(self, queryset, per_page):
+        self.per_page = int(per_page)
+        self.ordering = self.get_ordering(queryset)
+        self.queryset = queryset.order_by(*[f"-{name}" if desc else name for name, desc in self.ordering])
+        self.fields = [self.get_field(queryset, name) for name, _ in self.ordering]
+        self.count = None
+
+    def get_ordering(self, queryset):
+        pk_name = queryset.model._meta.pk.name
+        ordering = []
+        for item in queryset.query.order_by or queryset.model._meta.ordering:
+            if not isinstance(item, str) or "__" in item or item == "?":
+                raise ValueError(f"Cursor pagination cannot order by {item!r}.")
+            name = item.lstrip("-")
+            ordering.append((pk_name if name == "pk" else name, item.startswith("-")))
+        if not any(name == pk_name for name, _ in ordering):
+            descending = ordering[0][1] if ordering else False
+            ordering.append((pk_name, descending))
+        return ordering
+
+    def get_field(self, queryset, name):
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, name) for name, _ in self.ordering]
+        return signing.dumps(
+            [value.isoformat() if hasattr(value, "isoformat") else value for value in values],
+            salt=self.salt,
+        )
+
+    def decode_cursor(self, cursor):
+        try:
+            raw_values = signing.loads(cursor, salt=self.salt)
+            if len(raw_values) != len(self.fields):
+                raise InvalidCursor("That cursor does not match this listing.")
+            return [field.to_python(value) for field, value in zip(self.fields, raw_values)]
+        except (signing.BadSignature, TypeError, ValueError) as exc:
+            raise InvalidCursor("That cursor is invalid.") from exc
+
+    def after(self, values):
+        """Build the lexicographic keyset condition selecting rows that sort after `values`."""
+        condition = Q()
+        equal_so_far = Q()
+        for (name, descending), value in zip(self.ordering, values):
+            lookup = "lt" if descending else "gt"
+            condition |= equal_so_far & Q(**{f"{name}__{lookup}": value})
+            equal_so_far &= Q(**{name: value})
+        return condition
+
+    def page_queryset(self, cursor=None):
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(cursor)))
+        return queryset[: self.per_page + 1]
+
+    def build_page(self, rows):
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[: self.per_page]
+            next_cursor = self.encode_cursor(rows[-1])
+        return CursorPage(rows, next_cursor)
+
+    def page(self, cursor=None):
+        return self.build_page(list(self.page_queryset(cursor)))
+
+    async def apage(self, cursor=None):
+        return self.build_page([row async for row in self.page_queryset(cursor)])
+
+
+def estimated_row_count(model, using="default"):
+    """Return the database's own row estimate for `model`'s table, or None when it has none.
+
+    PostgreSQL reads ``pg_class.reltuples``; SQLite reads ``sqlite_stat1``,
+    which exists once ``ANALYZE`` has run.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+            elif connection.vendor == "sqlite":
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that trusts the database's row estimate for large, unfiltered tables.
+
+    An exact COUNT(*) over millions of rows dominates admin changelist time.
+    Filtered querysets and tables under `exact_count_threshold` rows are
+    still counted exactly.
+    """
+
+    exact_count_threshold = 10_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, "query") and not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.exact_count_threshold:
+                return estimate
+        return super().count
@@ -0,0 +1,99 @@
+"""
+Read-replica routing.
+
+Views wrapped in ``ReadReplicaMixin`` read forum data from one of
+``settings.FORUM_READ_REPLICAS`` through ``read_from``; everything else,
+including every write, stays on ``default``. ``PrimaryPinningMiddleware``
+marks a client that just wrote something so its reads stay on the primary
+until the replicas have caught up.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+DEFAULT_PIN_SECONDS = 10
+PIN_COOKIE = "forum_primary_pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Sessions and accounts always come from the primary, so a lagging replica never logs anyone out.
+REPLICATED_APP_LABELS = {"forum", "taggit"}
+
+_read_alias = ContextVar("forum_read_alias", default=None)
+
+
+@contextmanager
+def read_from(alias):
+    """Route reads of replicated models to `alias` for the duration of the block."""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def read_replicas():
+    return list(getattr(settings, "FORUM_READ_REPLICAS", []))
+
+
+def is_pinned_to_primary(request):
+    return bool(request.COOKIES.get(PIN_COOKIE))
+
+
+def read_alias_for(request):
+    """Pick a replica for a read-only request, or None to stay on the primary."""
+    replicas = read_replicas()
+    if not replicas or request.method not in SAFE_METHODS or is_pinned_to_primary(request):
+        return None
+    return random.choice(replicas)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is not None and model._meta.app_label in REPLICATED_APP_LABELS:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive their schema through replication.
+        return False if db in read_replicas() else None
+
+
+class PrimaryPinningMiddleware:
+    """After a successful write request, keep that client's reads on the primary for a short window."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400 and read_replicas():
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=getattr(settings, "FORUM_REPLICA_PIN_SECONDS", DEFAULT_PIN_SECONDS),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,179 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from taggit.models import Tag, TaggedItem
+
+from forum.domain.comments import sync_comment_path
+from forum.domain.duplicates import index_question, unindex_question
+from forum.domain.live import publish_new_answer, publish_new_comment
+from forum.domain.ranking import initial_hot_score, mark_hot_score_stale
+from forum.domain.related import mark_listing_questions_stale, mark_related_stale
+from forum.domain.reputation import REPUTATION_POINTS, author_of
+from forum.domain.search import get_search_backend
+from forum.domain.tags import adjust_tag_counts, invalidate_tag_catalog, question_tag_ids
+from forum.domain.vote import apply_vote_delta
+from forum.instrumentation import install_query_recorder
+from forum.models import Answer, Comment, Question, ReputationEntry, Vote
+
+
+@receiver(post_save, sender=Vote)
+def update_vote_counters_on_save(sender, instance, created, **kwargs):
+    old_vote_type = 0 if created else getattr(instance, "_loaded_vote_type", 0)
+    apply_vote_delta(
+        instance.content_type_id,
+        instance.object_id,
+        old_vote_type,
+        instance.vote_type,
+        author_id=getattr(instance, "_voted_author_id", None),
+        voter_id=instance.user_id,
+    )
+    instance._loaded_vote_type = instance.vote_type
+
+
+@receiver(pre_delete, sender=Vote)
+def remember_voted_author_on_delete(sender, instance, **kwargs):
+    # A cascade may delete the voted post before its votes, so look up whose reputation to adjust now.
+    model = ContentType.objects.get_for_id(instance.content_type_id).model_class()
+    if model in REPUTATION_POINTS and not hasattr(instance, "_voted_author_id"):
+        instance._voted_author_id = author_of(model, instance.object_id)
+
+
+@receiver(post_delete, sender=Vote)
+def update_vote_counters_on_delete(sender, instance, **kwargs):
+    old_vote_type = getattr(instance, "_loaded_vote_type", instance.vote_type)
+    apply_vote_delta(
+        instance.content_type_id,
+        instance.object_id,
+        old_vote_type,
+        0,
+        author_id=getattr(instance, "_voted_author_id", None),
+        voter_id=instance.user_id,
+    )
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def delete_reputation_entries_of_deleted_user(sender, instance, **kwargs):
+    # Votes on the user's posts are deleted before the user and append entries for them.
+    ReputationEntry.objects.filter(user_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_path_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_comment_path(instance)
+
+
+@receiver(pre_save, sender=Question)
+def set_initial_hot_score(sender, instance, raw=False, **kwargs):
+    if instance._state.adding and not raw:
+        instance.hot_score = initial_hot_score(instance)
+        instance.hot_score_stale = False
+
+
+@receiver(pre_save, sender=Question)
+def mark_related_stale_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not instance.text_changed():
+        return
+    if update_fields is None or "related_stale" in update_fields:
+        instance.related_stale = True
+    else:
+        mark_related_stale([instance.pk])
+
+
+@receiver(post_save, sender=Question)
+def remember_saved_text(sender, instance, **kwargs):
+    instance._loaded_text = (instance.__dict__.get("title"), instance.__dict__.get("description"))
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def mark_related_stale_on_tag_change(sender, instance, action, reverse, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and not reverse and isinstance(instance, Question):
+        mark_related_stale([instance.pk])
+
+
+@receiver(pre_delete, sender=Question)
+def mark_listing_questions_stale_on_delete(sender, instance, **kwargs):
+    mark_listing_questions_stale(instance.pk)
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def update_tag_counts_on_tag_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse or not isinstance(instance, Question):
+        return
+    if action == "post_add":
+        adjust_tag_counts(pk_set, 1)
+    elif action == "post_remove":
+        adjust_tag_counts(pk_set, -1)
+    elif action == "pre_clear":
+        # clear() reports no pk_set, so remember what is about to go.
+        instance._cleared_tag_ids = question_tag_ids(instance.pk)
+    elif action == "post_clear":
+        adjust_tag_counts(instance.__dict__.pop("_cleared_tag_ids", ()), -1)
+
+
+@receiver(pre_delete, sender=Question)
+def update_tag_counts_on_delete(sender, instance, **kwargs):
+    # The tag links go with the question without sending m2m signals.
+    adjust_tag_counts(question_tag_ids(instance.pk), -1)
+
+
+@receiver(post_save, sender=Question)
+def index_question_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(partial(index_question, instance))
+
+
+@receiver(post_delete, sender=Question)
+def unindex_question_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(partial(unindex_question, instance.pk))
+
+
+@receiver(post_save, sender=Answer)
+def mark_hot_score_stale_on_answer(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        mark_hot_score_stale(instance.question_id)
+
+
+@receiver(post_save, sender=Answer)
+def publish_new_answer_on_create(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(partial(publish_new_answer, instance))
+
+
+@receiver(post_save, sender=Comment)
+def publish_new_comment_on_create(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(partial(publish_new_comment, instance))
+
+
+@receiver(post_delete, sender=Answer)
+def mark_hot_score_stale_on_answer_delete(sender, instance, **kwargs):
+    mark_hot_score_stale(instance.question_id)
+
+
+@receiver(post_migrate)
+def ensure_search_index(sender, using, **kwargs):
+    # SQLite drops a table's triggers when a migration rebuilds the table,
+    # so re-create any missing search triggers once migrations have run.
+    if sender.name != "forum":
+        return
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if "forum_question" in connection.introspection.table_names(cursor):
+            get_search_backend(connection.vendor).install(cursor)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_catalog_on_change(sender, **kwargs):
+    invalidate_tag_catalog()
+
+
+@receiver(connection_created)
+def record_queries_on_connect(sender, connection, **kwargs):
+    install_query_recorder(connection)
@@ -8,12 +8,16 @@ def get_user_vote(obj, user):
     """Return the vote type (1, -1 or 0) for `user` on `obj`.
 
     Safe to call from templates. Returns 0 for anonymous users or on error.
+    Uses the ``user_vote`` attribute set by ``attach_user_votes`` when the
+    view has batch-loaded the page's votes.
     """
     try:
         if not getattr(user, "is_authenticated", False):
             return 0
         if obj is None:
             return 0
+        if hasattr(obj, "user_vote"):
+            return obj.user_vote
         return obj.get_user_voted_type(user)
     except Exception:
         return 0
@@ -21,12 +25,13 @@ def get_user_vote(obj, user):
 
 @register.simple_tag
 def query_string_exclude_page(request):
-    """Build query string from request.GET excluding 'page' parameter."""
+    """Build query string from request.GET excluding the 'page' and 'cursor' parameters."""
     if not request or not hasattr(request, 'GET'):
         return ""
     
     query_params = request.GET.copy()
-    if 'page' in query_params:
-        del query_params['page']
+    for param in ('page', 'cursor'):
+        if param in query_params:
+            del query_params[param]
     
     return query_params.urlencode()
@@ -1,11 +1,62 @@
-from django.test import TestCase, Client
-from django.urls import reverse
+from django.test import TestCase, TransactionTestCase, Client, RequestFactory, override_settings
+import asyncio
+from functools import partial
+import gzip
+import os
+import tempfile
+import threading
+from unittest import skipUnless
+from unittest.mock import patch
+from django.urls import get_resolver, reverse
 from django.contrib.auth import get_user_model
-from forum.models import Question,Vote,Answer,Comment
+from forum.benchmarks import iter_routes, run_benchmarks, seed_dataset
+from forum.models import Question,Vote,Answer,Comment,RelatedQuestion,ReputationEntry,TagCounter
 from django.contrib.contenttypes.models import ContentType
 from forum.forms import CommentForm
+from forum.pagination import EstimatedCountPaginator
+from forum.instrumentation import RequestMetrics, record_query
+from forum.routers import PIN_COOKIE, ReplicaRouter, read_from
+from forum.urls import select_view
+from forum.views import AsyncVoteView, VoteView
+from forum.views.mixins import LockRetryMixin
+from forum.domain.ranking import hot_score, recompute_hot_scores
+from forum.domain.comments import MAX_COMMENT_DEPTH, descendants_filter, rebuild_comment_paths
+from forum.domain.retry import call_with_lock_retry, retry_on_lock
+from forum.domain.corpus import export_corpus, import_corpus
+from forum.domain.duplicates import (
+    BANDS,
+    MinHashLSHIndex,
+    build_duplicate_index,
+    find_duplicates,
+    get_duplicate_index,
+    jaccard,
+    loaded_duplicate_index,
+    question_band_keys,
+    question_shingles,
+    reset_duplicate_index,
+    sync_new_questions,
+)
+from forum.domain.related import RelatedCorpus, refresh_related_questions, related_questions
+from forum.domain.reputation import rebuild_reputation
+from forum.domain.search import get_search_backend
+from forum.domain.tags import build_tag_cloud, get_tag_cloud, tag_choices
+from forum.domain.live import LocalMemoryBroker, coalesced_batches, get_broker, question_channel
 from django.utils import timezone
-from taggit.models import Tag
+from taggit.models import Tag, TaggedItem
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from io import StringIO
+import json
+from urllib.parse import quote
+import re
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.http import HttpResponse
+from django.views import View
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from asgiref.sync import async_to_sync, sync_to_async
 
 User = get_user_model()
 
@@ -58,10 +109,13 @@ class TestQuestionListView(TestCase):
         self.assertTrue(response.context['page_obj'].has_next())
 
         self.assertContains(response, 'Load More Questions', status_code=200)
-        self.assertContains(response, 'Please login to see more questions', status_code=200)
-        
-        login_url = reverse('login')
-        self.assertContains(response, f'href="{login_url}?next=', status_code=200)
+        next_cursor = response.context['page_obj'].next_cursor
+        self.assertContains(response, f'href="?cursor={quote(next_cursor)}"', status_code=200)
+
+        next_page = self.client.get(reverse('question_list'), {'cursor': next_cursor})
+        self.assertEqual(len(next_page.context['questions']), 5)
+        self.assertFalse(set(next_page.context['questions']) & set(response.context['questions']))
+        self.assertNotContains(next_page, 'Load More Questions', status_code=200)
 
     def test_should_not_show_load_more_button_when_no_more_pages(self):
         response = self.client.get(reverse('question_list') + '?page=2')
@@ -1090,3 +1144,1806 @@ class TestCommentFilter(TestCase):
         self.assertNotIn(reply, comments)
         # Only parent comments should be included
         self.assertEqual(len(comments), 3)
+
+
+class TestVoteCounters(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="voter", email="voter@example.com", password="pass123")
+        self.user2 = User.objects.create_user(username="voter2", email="voter2@example.com", password="pass123")
+        self.question = Question.objects.create(title="Counters", description="Denormalized", author=self.user)
+
+    def test_should_increment_counters_when_vote_is_created(self):
+        Vote.objects.create(user=self.user, content_object=self.question, vote_type=Vote.VoteType.UPVOTE)
+        Vote.objects.create(user=self.user2, content_object=self.question, vote_type=Vote.VoteType.DOWNVOTE)
+
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.upvote_count, 1)
+        self.assertEqual(self.question.downvote_count, 1)
+        self.assertEqual(self.question.score, 0)
+
+    def test_should_update_counters_when_vote_is_switched_or_removed(self):
+        self.client.login(username="voter", password="pass123")
+        url = reverse("vote", kwargs={"model_label": "question", "object_id": self.question.pk})
+
+        response = self.client.post(url, {"vote_type": 1})
+        self.assertEqual(response.json(), {"upvotes": 1, "downvotes": 0, "user_vote": 1})
+
+        response = self.client.post(url, {"vote_type": -1})
+        self.assertEqual(response.json(), {"upvotes": 0, "downvotes": 1, "user_vote": -1})
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.score, -1)
+
+        response = self.client.post(url, {"vote_type": -1})
+        self.assertEqual(response.json(), {"upvotes": 0, "downvotes": 0, "user_vote": 0})
+        self.question.refresh_from_db()
+        self.assertEqual((self.question.upvote_count, self.question.downvote_count, self.question.score), (0, 0, 0))
+
+    def test_should_rebuild_and_verify_counters_from_vote_table(self):
+        Vote.objects.create(user=self.user, content_object=self.question, vote_type=Vote.VoteType.UPVOTE)
+        Question.objects.filter(pk=self.question.pk).update(upvote_count=7, score=7)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_vote_counts", "--verify", stdout=StringIO())
+
+        call_command("rebuild_vote_counts", stdout=StringIO())
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.upvote_count, 1)
+        self.assertEqual(self.question.score, 1)
+        call_command("rebuild_vote_counts", "--verify", stdout=StringIO())
+
+
+class TestVoteView(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="poster", email="poster@example.com", password="pass123")
+        self.question = Question.objects.create(title="Votes", description="Endpoint", author=self.user)
+        self.answer = Answer.objects.create(question=self.question, author=self.user, content="Answer")
+        self.comment = Comment.objects.create(content_object=self.answer, author=self.user, content="Comment")
+        self.client.login(username="poster", password="pass123")
+
+    def vote_url(self, label, object_id):
+        return reverse("vote", kwargs={"model_label": label, "object_id": object_id})
+
+    def test_should_toggle_votes_on_every_votable_model(self):
+        for label, obj in (("question", self.question), ("answer", self.answer), ("comment", self.comment)):
+            response = self.client.post(self.vote_url(label, obj.pk), {"vote_type": 1})
+            self.assertEqual(response.json(), {"upvotes": 1, "downvotes": 0, "user_vote": 1})
+            obj.refresh_from_db()
+            self.assertEqual(obj.upvote_count, 1)
+        self.assertEqual(Vote.objects.filter(user=self.user).count(), 3)
+
+    def test_should_reject_get_requests(self):
+        response = self.client.get(self.vote_url("question", self.question.pk), {"vote_type": 1})
+        self.assertEqual(response.status_code, 405)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_should_reject_invalid_targets_without_creating_votes(self):
+        self.assertEqual(self.client.post(self.vote_url("user", self.user.pk), {"vote_type": 1}).status_code, 404)
+        self.assertEqual(self.client.post(self.vote_url("question", 999999), {"vote_type": 1}).status_code, 404)
+        self.assertEqual(self.client.post(self.vote_url("question", self.question.pk), {"vote_type": 2}).status_code, 400)
+        self.assertEqual(self.client.post(self.vote_url("question", self.question.pk), {"vote_type": "up"}).status_code, 400)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_should_redirect_anonymous_users_to_login(self):
+        self.client.logout()
+        response = self.client.post(self.vote_url("question", self.question.pk), {"vote_type": 1})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Vote.objects.exists())
+
+
+class TestConcurrentVoteToggles(TransactionTestCase):
+    threads = 8
+    toggles_per_thread = 5
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="racer", email="racer@example.com", password="pass123")
+        self.question = Question.objects.create(title="Race", description="Double clicks", author=self.author)
+        self.voters = [
+            User.objects.create_user(username=f"racer{i}", email=f"racer{i}@example.com", password="pass123")
+            for i in range(4)
+        ]
+
+    def run_concurrently(self, work):
+        barrier = threading.Barrier(self.threads)
+        errors = []
+
+        def target(index):
+            try:
+                barrier.wait()
+                work(index)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=target, args=(i,)) for i in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(errors, [])
+
+    def test_should_keep_votes_and_counters_consistent_under_concurrent_toggles(self):
+        url = reverse("vote", kwargs={"model_label": "question", "object_id": self.question.pk})
+
+        def work(index):
+            client = Client()
+            client.force_login(self.voters[index % len(self.voters)])
+            for toggle in range(self.toggles_per_thread):
+                # Odd-numbered threads flip between up- and downvotes, the rest double-click upvote.
+                vote_type = -1 if index % 2 and toggle % 2 else 1
+                response = client.post(url, {"vote_type": vote_type})
+                if response.status_code != 200:
+                    raise AssertionError(response.status_code)
+
+        self.run_concurrently(work)
+
+        votes = Vote.objects.filter(object_id=self.question.pk)
+        self.assertEqual(votes.count(), votes.values("user").distinct().count())
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.upvote_count, votes.filter(vote_type=1).count())
+        self.assertEqual(self.question.downvote_count, votes.filter(vote_type=-1).count())
+        self.assertEqual(self.question.score, self.question.upvote_count - self.question.downvote_count)
+
+    def test_should_settle_on_toggle_parity_when_same_vote_is_repeated(self):
+        url = reverse("vote", kwargs={"model_label": "question", "object_id": self.question.pk})
+
+        def work(index):
+            client = Client()
+            client.force_login(self.voters[0])
+            # 8 threads x 5 toggles = 40 upvote toggles: an even count leaves no vote.
+            for _ in range(self.toggles_per_thread):
+                client.post(url, {"vote_type": 1})
+
+        self.run_concurrently(work)
+
+        self.assertFalse(Vote.objects.filter(object_id=self.question.pk).exists())
+        self.question.refresh_from_db()
+        self.assertEqual((self.question.upvote_count, self.question.downvote_count, self.question.score), (0, 0, 0))
+
+
+class TestUserVotePrefetch(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="viewer", email="viewer@example.com", password="pass123")
+        self.question = Question.objects.create(title="Prefetch", description="Votes", author=self.user)
+        self.question.tags.add("django")
+        self.client.login(username="viewer", password="pass123")
+
+    def create_answers(self, count):
+        for i in range(count):
+            answer = Answer.objects.create(question=self.question, author=self.user, content=f"Answer {i}")
+            Vote.objects.create(user=self.user, content_object=answer, vote_type=Vote.VoteType.UPVOTE)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_should_attach_user_vote_to_each_answer_on_page(self):
+        self.create_answers(2)
+        response = self.client.get(reverse("answer-list-partial", kwargs={"question_id": self.question.pk}))
+        self.assertEqual([answer.user_vote for answer in response.context["answers"]], [1, 1])
+        self.assertContains(response, "btn-success text-white", count=2)
+
+    def test_should_not_scale_answer_list_queries_with_page_size(self):
+        url = reverse("answer-list-partial", kwargs={"question_id": self.question.pk})
+        self.create_answers(1)
+        single = self.count_queries(url)
+        self.create_answers(2)
+        self.assertEqual(self.count_queries(url), single)
+
+    def test_should_not_scale_question_list_queries_with_page_size(self):
+        url = reverse("question_list")
+        single = self.count_queries(url)
+        for i in range(5):
+            question = Question.objects.create(title=f"Q{i}", description="More", author=self.user)
+            question.tags.add("python")
+            Vote.objects.create(user=self.user, content_object=question, vote_type=Vote.VoteType.DOWNVOTE)
+        self.assertEqual(self.count_queries(url), single)
+
+
+class TestQuestionSearch(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="searcher", email="searcher@example.com", password="pass123")
+        self.in_title = Question.objects.create(
+            title="Django migrations explained", description="Schema changes", author=self.user
+        )
+        self.in_description = Question.objects.create(
+            title="Schema changes", description="How do django migrations work?", author=self.user
+        )
+        self.tagged = Question.objects.create(
+            title="Deploying apps", description="Migrations during deploy", author=self.user
+        )
+        self.unrelated = Question.objects.create(title="Python tips", description="Generators", author=self.user)
+        self.tagged.tags.add("migrations")
+        self.url = reverse("question_list")
+
+    def test_should_match_word_prefixes(self):
+        response = self.client.get(self.url, {"question": "migra"})
+        self.assertCountEqual(response.context["questions"], [self.in_title, self.in_description, self.tagged])
+
+    def test_should_keep_index_in_sync_with_edits_and_deletes(self):
+        self.unrelated.title = "Generators and migrations"
+        self.unrelated.save()
+        self.in_title.delete()
+
+        response = self.client.get(self.url, {"question": "migrations"})
+        self.assertCountEqual(response.context["questions"], [self.in_description, self.tagged, self.unrelated])
+
+    def test_should_order_by_relevance_with_tag_boost(self):
+        response = self.client.get(self.url, {"question": "migrations", "sort": "relevance"})
+        questions = list(response.context["questions"])
+        self.assertEqual(questions[0], self.tagged)
+        self.assertEqual(questions[1], self.in_title)
+        self.assertGreater(questions[0].search_rank, questions[-1].search_rank)
+
+    def test_should_ignore_relevance_sort_without_search(self):
+        response = self.client.get(self.url, {"sort": "relevance"})
+        self.assertEqual(list(response.context["questions"])[0], self.unrelated)
+
+    def test_should_rebuild_search_index(self):
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Rebuilt question search index", out.getvalue())
+        response = self.client.get(self.url, {"question": "generators"})
+        self.assertCountEqual(response.context["questions"], [self.unrelated])
+
+
+class TestTagCatalog(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="tagger", email="tagger@example.com", password="pass123")
+        self.question = Question.objects.create(title="Tags", description="Catalog", author=self.user)
+        self.question.tags.add("django", "python", "htmx")
+        self.url = reverse("tag_autocomplete")
+
+    def test_should_serve_question_list_without_tag_queries_once_cached(self):
+        self.client.get(reverse("question_list"))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("question_list"), {"tag": Tag.objects.get(name="python").pk})
+        self.assertFalse(any('FROM "taggit_tag"' in query["sql"] and "ORDER BY" in query["sql"] for query in queries))
+
+    def test_should_invalidate_catalog_when_tags_change(self):
+        self.assertEqual([tag["name"] for tag in self.client.get(self.url).json()["results"]], ["django", "htmx", "python"])
+
+        self.question.tags.add("alpine")
+        Tag.objects.get(name="htmx").delete()
+
+        response = self.client.get(self.url)
+        self.assertEqual([tag["name"] for tag in response.json()["results"]], ["alpine", "django", "python"])
+
+    def test_should_page_and_filter_tags(self):
+        self.question.tags.add(*[f"topic-{i:02d}" for i in range(25)])
+
+        first = self.client.get(self.url, {"q": "topic"}).json()
+        self.assertEqual(len(first["results"]), 20)
+        self.assertTrue(first["has_more"])
+
+        second = self.client.get(self.url, {"q": "TOPIC", "page": 2}).json()
+        self.assertEqual([tag["name"] for tag in second["results"]], [f"topic-{i:02d}" for i in range(20, 25)])
+        self.assertFalse(second["has_more"])
+
+    def test_should_match_tag_prefixes_in_popularity_order(self):
+        other = Question.objects.create(title="More", description="Tags", author=self.user)
+        other.tags.add("pytest", "python", "ruby")
+
+        names = [tag["name"] for tag in self.client.get(self.url, {"q": "Py"}).json()["results"]]
+        self.assertEqual(names, ["python", "pytest"])
+        self.assertEqual(self.client.get(self.url, {"q": "thon"}).json()["results"], [])
+        self.assertEqual(self.client.get(self.url, {"q": "pz"}).json()["results"], [])
+
+    def test_should_embed_only_selected_tags_in_question_list(self):
+        python = Tag.objects.get(name="python")
+        response = self.client.get(reverse("question_list"), {"tag": python.pk})
+        self.assertEqual(json.loads(response.context["selected_tags_json"]), [{"id": python.pk, "name": "python"}])
+        self.assertNotContains(response, '"name": "django"')
+
+
+class TestCursorPagination(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="scroller", email="scroller@example.com", password="pass123")
+        self.question = Question.objects.create(title="Cursor", description="Keyset", author=self.user)
+        now = timezone.now()
+        self.answers = [
+            Answer.objects.create(question=self.question, author=self.user, content=f"Answer {i}")
+            for i in range(7)
+        ]
+        # Two answers share a timestamp so the id tiebreaker is exercised.
+        Answer.objects.filter(pk__in=[a.pk for a in self.answers[:2]]).update(created_at=now)
+        self.url = reverse("answer-list-partial", kwargs={"question_id": self.question.pk})
+
+    def collect(self, params=None):
+        params = dict(params or {}, cursor="")
+        seen = []
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url, params)
+            self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+            page = response.context["page_obj"]
+            seen.extend(response.context["answers"])
+            if not page.has_next():
+                return seen
+            params["cursor"] = page.next_cursor
+
+    def test_should_walk_every_answer_once_in_order(self):
+        expected = list(self.question.answers.order_by("-created_at", "-id"))
+        self.assertEqual(self.collect(), expected)
+
+    def test_should_follow_popularity_ordering(self):
+        for answer in self.answers[3:5]:
+            Vote.objects.create(user=self.user, content_object=answer, vote_type=Vote.VoteType.UPVOTE)
+        answers = self.collect({"vote_type": Vote.VoteType.UPVOTE})
+        self.assertEqual(len(answers), 7)
+        self.assertCountEqual(answers[:2], self.answers[3:5])
+
+    def test_should_render_items_only_for_follow_up_pages(self):
+        first = self.client.get(self.url, {"cursor": ""})
+        self.assertTemplateUsed(first, "forum/partials/answer_list.html")
+        self.assertContains(first, "Load more")
+
+        second = self.client.get(self.url, {"cursor": first.context["page_obj"].next_cursor})
+        self.assertTemplateNotUsed(second, "forum/partials/answer_list.html")
+        self.assertTemplateUsed(second, "forum/partials/answer_items.html")
+
+    def test_should_reject_tampered_cursor(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_should_skip_count_for_anonymous_question_list(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("question_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+class TestListQueryPlans(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="planner", email="planner@example.com", password="pass123")
+        self.question = Question.objects.create(title="Plans", description="Indexes", author=self.user)
+        self.answer = Answer.objects.create(question=self.question, author=self.user, content="Indexed")
+        Comment.objects.create(author=self.user, content="Top level", content_object=self.answer)
+        self.client.login(username="planner", password="pass123")
+
+    def plan_for(self, url, table):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        sql = next(
+            query["sql"] for query in queries
+            if f'FROM "{table}"' in query["sql"] and "ORDER BY" in query["sql"] and "COUNT(" not in query["sql"]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return " | ".join(row[-1] for row in cursor.fetchall())
+
+    def test_should_order_question_list_by_index(self):
+        plan = self.plan_for(reverse("question_list"), "forum_question")
+        self.assertIn("forum_question_recent_idx", plan)
+        self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+    def test_should_fetch_answers_by_question_index(self):
+        plan = self.plan_for(reverse("answer-list-partial", kwargs={"question_id": self.question.pk}), "forum_answer")
+        self.assertIn("forum_answer_question_idx", plan)
+        self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+    def test_should_fetch_top_level_comments_by_target_index(self):
+        plan = self.plan_for(reverse("answer-comments-partial", kwargs={"answer_id": self.answer.pk}), "forum_comment")
+        self.assertIn("forum_comment_target_idx", plan)
+        self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+    def test_should_page_popularity_orderings_by_keyset_index(self):
+        cases = (
+            (reverse("question_list"), "forum_question", "forum_question_%s_idx"),
+            (reverse("answer-list-partial", kwargs={"question_id": self.question.pk}), "forum_answer", "forum_answer_%s_idx"),
+            (reverse("answer-comments-partial", kwargs={"answer_id": self.answer.pk}), "forum_comment", "forum_comment_%s_idx"),
+        )
+        for url, table, index in cases:
+            for vote_type, kind in ((Vote.VoteType.UPVOTE, "popular"), (Vote.VoteType.DOWNVOTE, "unpopular")):
+                plan = self.plan_for(f"{url}?vote_type={vote_type}&cursor=", table)
+                self.assertIn(index % kind, plan)
+                self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+    def test_should_count_votes_per_object_by_index(self):
+        content_type = ContentType.objects.get_for_model(Answer)
+        queryset = Vote.objects.filter(content_type=content_type, object_id=self.answer.pk, vote_type=1)
+        sql, params = queryset.values("id").query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " | ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("forum_vote_target_type_idx", plan)
+
+    def test_should_fetch_comment_subtree_by_path_range(self):
+        root = Comment.objects.get(content="Top level")
+        queryset = Comment.objects.filter(
+            descendants_filter(root.path), content_type_id=root.content_type_id, object_id=root.object_id
+        ).order_by("path")
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " | ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("forum_comment_tree_idx", plan)
+        self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+
+class TestQuestionListQueryShape(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="shape", email="shape@example.com", password="pass123")
+        self.user2 = User.objects.create_user(username="shape2", email="shape2@example.com", password="pass123")
+        self.question = Question.objects.create(title="Fan-out", description="Joins", author=self.user)
+        self.question.tags.add("django", "python", "sql")
+        Vote.objects.create(user=self.user, content_object=self.question, vote_type=Vote.VoteType.UPVOTE)
+        Vote.objects.create(user=self.user2, content_object=self.question, vote_type=Vote.VoteType.UPVOTE)
+        self.tag_ids = list(Tag.objects.filter(name__in=["django", "python", "sql"]).values_list("id", flat=True))
+
+    def test_should_not_inflate_counts_when_filtering_by_several_tags(self):
+        response = self.client.get(reverse("question_list"), {"tag": self.tag_ids})
+        questions = list(response.context["questions"])
+        self.assertEqual(questions, [self.question])
+        self.assertEqual(questions[0].upvotes, 2)
+        self.assertEqual(questions[0].downvotes, 0)
+        self.assertEqual(questions[0].total_votes, 2)
+
+    def test_should_filter_tags_with_semi_join(self):
+        self.client.login(username="shape", password="pass123")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("question_list"), {"tag": self.tag_ids, "vote_type": Vote.VoteType.UPVOTE})
+        list_sql = [q["sql"] for q in queries if 'FROM "forum_question"' in q["sql"] and "LIMIT" in q["sql"]]
+        self.assertTrue(list_sql)
+        for sql in list_sql:
+            self.assertIn("EXISTS", sql)
+            self.assertNotIn("DISTINCT", sql)
+            self.assertNotIn("GROUP BY", sql)
+            self.assertNotIn('"forum_vote"', sql)
+
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                steps = [row[-1] for row in cursor.fetchall()]
+            # The tag semi-join probes taggit's (content_type, object_id, tag) index once per question.
+            tag_steps = [step for step in steps if step.startswith(("SEARCH U0", "SCAN U0"))]
+            self.assertTrue(tag_steps, steps)
+            for step in tag_steps:
+                self.assertRegex(step, r"^SEARCH U0 USING (COVERING )?INDEX \S*taggit_taggeditem\S*")
+            self.assertFalse([step for step in steps if "TEMP B-TREE" in step], steps)
+
+
+class TestCardFragmentCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.author = User.objects.create_user(username="cardauthor", email="cardauthor@example.com", password="pass123")
+        self.voter = User.objects.create_user(username="cardvoter", email="cardvoter@example.com", password="pass123")
+        self.question = Question.objects.create(title="Cached title", description="Body", author=self.author)
+        self.answer = Answer.objects.create(question=self.question, author=self.author, content="Cached answer")
+
+    def test_should_reuse_card_until_object_is_saved(self):
+        self.client.get(reverse("question_list"))
+        Question.objects.filter(pk=self.question.pk).update(title="Changed behind the cache")
+        self.assertContains(self.client.get(reverse("question_list")), "Cached title")
+
+        self.question.refresh_from_db()
+        self.question.save()
+        self.assertContains(self.client.get(reverse("question_list")), "Changed behind the cache")
+
+    def test_should_serve_warm_cards_from_one_fragment(self):
+        self.question.tags.add("cached")
+        self.client.get(reverse("question_list"))
+        key = make_template_fragment_key(
+            "question_card", [self.question.pk, Question.objects.get(pk=self.question.pk).updated_at, "cached"]
+        )
+        self.assertIn("Cached title", cache.get(key))
+        self.assertIn(">cached<", cache.get(key))
+
+        # A warm render copies the fragment as stored instead of rendering the card body again.
+        cache.set(key, "<div>from the fragment cache</div>")
+        response = self.client.get(reverse("question_list"))
+        self.assertContains(response, "from the fragment cache")
+        self.assertNotContains(response, "Cached title")
+        self.assertContains(response, "Asked ")
+
+    def test_should_show_tag_changes_on_a_cached_card(self):
+        self.question.tags.add("before")
+        self.assertContains(self.client.get(reverse("question_list")), "before")
+
+        self.question.tags.set(["after"])
+        response = self.client.get(reverse("question_list"))
+        self.assertContains(response, "after")
+        self.assertNotContains(response, ">before<")
+
+    def test_should_render_vote_state_per_user_over_shared_card(self):
+        Vote.objects.create(user=self.voter, content_object=self.question, vote_type=Vote.VoteType.UPVOTE)
+        self.assertContains(self.client.get(reverse("question_list")), 'href="/accounts/login/"')
+
+        self.client.login(username="cardvoter", password="pass123")
+        response = self.client.get(reverse("question_list"))
+        self.assertContains(response, "btn-success text-white")
+        self.assertContains(response, "<span data-upvote-count>1</span>")
+        self.assertNotContains(response, reverse("question_edit", args=[self.question.pk]))
+
+        self.client.login(username="cardauthor", password="pass123")
+        response = self.client.get(reverse("question_list"))
+        self.assertContains(response, reverse("question_edit", args=[self.question.pk]))
+        self.assertNotContains(response, "btn-success text-white")
+
+    def test_should_refresh_answer_card_after_edit(self):
+        url = reverse("answer-list-partial", args=[self.question.pk])
+        self.assertContains(self.client.get(url), "Cached answer")
+
+        self.answer.content = "Edited answer"
+        self.answer.save()
+        response = self.client.get(url)
+        self.assertContains(response, "Edited answer")
+        self.assertNotContains(response, "Cached answer")
+
+
+class TestCommentTree(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="threader", email="threader@example.com", password="pass123")
+        self.question = Question.objects.create(title="Threads", description="Replies", author=self.user)
+        self.answer = Answer.objects.create(question=self.question, author=self.user, content="Answer")
+        self.root = Comment.objects.create(content_object=self.answer, author=self.user, content="Root")
+
+    def reply(self, parent, content):
+        return Comment.objects.create(content_object=self.answer, author=self.user, content=content, parent=parent)
+
+    def test_should_maintain_paths_on_save(self):
+        child = self.reply(self.root, "Child")
+        grandchild = self.reply(child, "Grandchild")
+        self.assertEqual(self.root.path, f"{self.root.pk:010d}")
+        self.assertEqual(Comment.objects.get(pk=grandchild.pk).path, f"{self.root.pk:010d}{child.pk:010d}{grandchild.pk:010d}")
+
+        other = Comment.objects.create(content_object=self.answer, author=self.user, content="Other root")
+        child.parent = other
+        child.save()
+        self.assertEqual(Comment.objects.get(pk=grandchild.pk).path, f"{other.pk:010d}{child.pk:010d}{grandchild.pk:010d}")
+
+    def test_should_backfill_paths_from_parent_links(self):
+        child = self.reply(self.root, "Child")
+        grandchild = self.reply(child, "Grandchild")
+        Comment.objects.update(path="")
+
+        self.assertEqual(rebuild_comment_paths(), 3)
+        self.assertEqual(Comment.objects.get(pk=grandchild.pk).path, f"{self.root.pk:010d}{child.pk:010d}{grandchild.pk:010d}")
+        self.assertEqual(rebuild_comment_paths(), 0)
+
+    def test_should_preview_first_replies_with_constant_queries(self):
+        url = reverse("answer-comments-partial", kwargs={"answer_id": self.answer.pk})
+        first = self.reply(self.root, "First reply")
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get(url)
+
+        self.reply(first, "Nested reply")
+        self.reply(self.root, "Second reply")
+        self.reply(self.root, "Hidden reply")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(len(queries), len(baseline))
+        root = response.context["comments"][0]
+        self.assertEqual([reply.content for reply in root.children], ["First reply", "Second reply"])
+        self.assertEqual([reply.content for reply in root.children[0].children], ["Nested reply"])
+        self.assertTrue(root.has_more_replies)
+        self.assertContains(response, reverse("comment-replies-partial", args=[self.root.pk]))
+        self.assertNotContains(response, "Hidden reply")
+
+    def test_should_load_whole_subtree_in_one_query(self):
+        first = self.reply(self.root, "First reply")
+        self.reply(first, "Nested reply")
+        self.reply(self.root, "Second reply")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("comment-replies-partial", args=[self.root.pk]))
+        self.assertEqual(len([q for q in queries if "forum_comment" in q["sql"]]), 2)
+        self.assertContains(response, "Nested reply")
+        self.assertContains(response, "Second reply")
+
+    def test_should_limit_thread_depth_to_what_paths_can_hold(self):
+        parent = self.root
+        for level in range(2, MAX_COMMENT_DEPTH + 1):
+            parent = self.reply(parent, f"Level {level}")
+        self.assertEqual(len(parent.path), MAX_COMMENT_DEPTH * 10)
+
+        form = CommentForm(data={"content": "Too deep", "parent": parent.pk})
+        self.assertFalse(form.is_valid())
+        self.assertIn("parent", form.errors)
+
+        # Moving a thread must leave room for its replies too.
+        other = Comment.objects.create(content_object=self.answer, author=self.user, content="Other root")
+        child = self.reply(other, "Child")
+        self.reply(child, "Grandchild")
+        self.assertFalse(CommentForm(data={"content": "Child", "parent": parent.parent.pk}, instance=child).is_valid())
+        self.assertTrue(
+            CommentForm(data={"content": "Child", "parent": parent.parent.parent.pk}, instance=child).is_valid()
+        )
+
+    def test_should_not_move_comment_under_its_own_reply(self):
+        child = self.reply(self.root, "Child")
+        form = CommentForm(data={"content": "Root", "parent": child.pk}, instance=self.root)
+        self.assertFalse(form.is_valid())
+        self.assertIn("parent", form.errors)
+
+
+class TestAdminChangelists(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="moderator", email="moderator@example.com", password="pass123")
+        self.client.login(username="moderator", password="pass123")
+        self.rows = 0
+
+    def add_targets(self, count):
+        for _ in range(count):
+            self.rows += 1
+            user = User.objects.create_user(username=f"member{self.rows}", email=f"member{self.rows}@example.com")
+            question = Question.objects.create(title=f"Question {self.rows}", description="Body", author=user)
+            answer = Answer.objects.create(question=question, author=user, content="Answer")
+            comment = Comment.objects.create(content_object=answer, author=user, content="Comment")
+            reply = Comment.objects.create(content_object=answer, author=user, content="Reply", parent=comment)
+            for target in (question, answer, comment, reply):
+                Vote.objects.create(user=user, content_object=target, vote_type=Vote.VoteType.UPVOTE)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_should_resolve_changelist_targets_in_batches(self):
+        for model in ("vote", "comment", "answer", "question"):
+            with self.subTest(model=model):
+                url = reverse(f"admin:forum_{model}_changelist")
+                self.add_targets(1)
+                single = self.count_queries(url)
+                self.add_targets(3)
+                self.assertEqual(self.count_queries(url), single)
+
+    def test_should_use_estimated_count_for_large_unfiltered_tables(self):
+        self.add_targets(2)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.add_targets(1)
+
+        paginator = EstimatedCountPaginator(Vote.objects.order_by("pk"), 100)
+        paginator.exact_count_threshold = 1
+        self.assertEqual(paginator.count, 8)
+
+        filtered = EstimatedCountPaginator(Vote.objects.filter(vote_type=1).order_by("pk"), 100)
+        filtered.exact_count_threshold = 1
+        self.assertEqual(filtered.count, 12)
+        self.assertEqual(EstimatedCountPaginator(Vote.objects.order_by("pk"), 100).count, 12)
+
+
+class TestHotRanking(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="trender", email="trender@example.com", password="pass123")
+        self.voters = [
+            User.objects.create_user(username=f"fan{i}", email=f"fan{i}@example.com", password="pass123") for i in range(3)
+        ]
+        self.old = Question.objects.create(title="Old but popular", description="Body", author=self.user)
+        self.new = Question.objects.create(title="Brand new", description="Body", author=self.user)
+
+    def test_should_decay_with_age_and_grow_with_activity(self):
+        now = timezone.now()
+        self.assertGreater(hot_score(0, 0, now), hot_score(0, 0, now - timezone.timedelta(days=1)))
+        self.assertGreater(hot_score(10, 1, now), hot_score(1, 0, now))
+        self.assertLess(hot_score(-5, 0, now), hot_score(0, 0, now))
+
+    def test_should_only_recompute_questions_with_new_votes_or_answers(self):
+        Question.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timezone.timedelta(hours=6))
+        self.assertEqual(recompute_hot_scores(), 0)
+
+        for voter in self.voters:
+            Vote.objects.create(user=voter, content_object=self.old, vote_type=Vote.VoteType.UPVOTE)
+        Answer.objects.create(question=self.old, author=self.user, content="Answer")
+        self.assertEqual(list(Question.objects.filter(hot_score_stale=True)), [self.old])
+
+        self.assertEqual(recompute_hot_scores(), 1)
+        self.old.refresh_from_db()
+        self.assertFalse(self.old.hot_score_stale)
+        self.assertEqual(self.old.hot_score, hot_score(3, 1, self.old.created_at))
+
+        response = self.client.get(reverse("question_list"), {"sort": "hot"})
+        self.assertEqual(list(response.context["questions"]), [self.old, self.new])
+
+    def test_should_rank_new_questions_without_waiting_for_the_worker(self):
+        self.assertFalse(self.new.hot_score_stale)
+        self.assertGreater(self.new.hot_score, self.old.hot_score)
+        response = self.client.get(reverse("question_list"), {"sort": "hot", "page": 1})
+        self.assertEqual(list(response.context["questions"]), [self.new, self.old])
+
+    def test_should_recompute_from_command(self):
+        Question.objects.update(hot_score=0, hot_score_stale=True)
+        out = StringIO()
+        call_command("recompute_hot_scores", stdout=out)
+        self.assertIn("2 question(s)", out.getvalue())
+        self.assertFalse(Question.objects.filter(hot_score=0).exists())
+
+        out = StringIO()
+        call_command("recompute_hot_scores", "--full", stdout=out)
+        self.assertIn("2 question(s)", out.getvalue())
+
+    @skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+    def test_should_sort_hot_list_by_index(self):
+        sql, params = Question.objects.order_by("-hot_score", "-id").query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " | ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("forum_question_hot_idx", plan)
+        self.assertNotIn("USE TEMP B-TREE", plan)
+
+
+class TestAsyncViews(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="asyncer", email="asyncer@example.com", password="pass123")
+        self.question = Question.objects.create(title="Async", description="Views", author=self.user)
+        self.answers = [
+            Answer.objects.create(question=self.question, author=self.user, content=f"Answer {i}") for i in range(5)
+        ]
+        self.comment = Comment.objects.create(content_object=self.answers[0], author=self.user, content="Root")
+        for i in range(4):
+            Comment.objects.create(content_object=self.answers[0], author=self.user, parent=self.comment, content=f"Reply {i}")
+        Vote.objects.create(user=self.user, content_object=self.answers[-1], vote_type=-1)
+        self.client.login(username="asyncer", password="pass123")
+
+    def fetch_both(self, name, kwargs, data=None):
+        sync_response = self.client.get(reverse(name, kwargs=kwargs), data or {})
+        async_response = self.client.get(reverse(f"{name}-async", kwargs=kwargs), data or {})
+        self.assertEqual(sync_response.status_code, 200)
+        self.assertEqual(async_response.status_code, 200)
+        return sync_response, async_response
+
+    def test_should_render_the_same_answer_page_as_the_sync_view(self):
+        for data in ({}, {"page": 2}, {"cursor": ""}):
+            sync_response, async_response = self.fetch_both(
+                "answer-list-partial", {"question_id": self.question.pk}, data
+            )
+            self.assertEqual(
+                [(answer.pk, answer.user_vote) for answer in async_response.context["answers"]],
+                [(answer.pk, answer.user_vote) for answer in sync_response.context["answers"]],
+            )
+            self.assertEqual(async_response.context["is_paginated"], sync_response.context["is_paginated"])
+            self.assertEqual(
+                [template.name for template in async_response.templates],
+                [template.name for template in sync_response.templates],
+            )
+
+    def test_should_follow_cursors_and_reject_bad_pages(self):
+        url = reverse("answer-list-partial-async", kwargs={"question_id": self.question.pk})
+        first = self.client.get(url, {"cursor": ""})
+        second = self.client.get(url, {"cursor": first.context["page_obj"].next_cursor})
+        self.assertEqual(
+            [answer.pk for answer in first.context["answers"]] + [answer.pk for answer in second.context["answers"]],
+            [answer.pk for answer in reversed(self.answers)],
+        )
+        self.assertEqual(self.client.get(url, {"cursor": "bogus"}).status_code, 404)
+        self.assertEqual(self.client.get(url, {"page": 9}).status_code, 404)
+        self.assertEqual(self.client.get(reverse("answer-list-partial-async", kwargs={"question_id": 999999})).status_code, 404)
+
+    def test_should_attach_reply_previews_to_async_comment_pages(self):
+        sync_response, async_response = self.fetch_both("answer-comments-partial", {"answer_id": self.answers[0].pk})
+        (root,) = async_response.context["comments"]
+        self.assertEqual([reply.content for reply in root.children], ["Reply 0", "Reply 1", "Reply 2"])
+        self.assertTrue(root.has_more_replies)
+        self.assertEqual(async_response.context["partial_url"], reverse(
+            "answer-comments-partial-async", kwargs={"answer_id": self.answers[0].pk}
+        ))
+        self.assertEqual(async_response.context["answer"], sync_response.context["answer"])
+
+    def test_should_toggle_votes_through_the_async_endpoint(self):
+        url = reverse("vote-async", kwargs={"model_label": "answer", "object_id": self.answers[0].pk})
+        self.assertEqual(self.client.post(url, {"vote_type": 1}).json(), {"upvotes": 1, "downvotes": 0, "user_vote": 1})
+        self.assertEqual(self.client.post(url, {"vote_type": 1}).json(), {"upvotes": 0, "downvotes": 0, "user_vote": 0})
+        self.assertEqual(self.client.post(url, {"vote_type": 2}).status_code, 400)
+        self.assertEqual(self.client.get(url).status_code, 405)
+        missing = reverse("vote-async", kwargs={"model_label": "answer", "object_id": 999999})
+        self.assertEqual(self.client.post(missing, {"vote_type": 1}).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.post(url, {"vote_type": 1}).status_code, 302)
+        self.assertFalse(Vote.objects.filter(object_id=self.answers[0].pk).exists())
+
+    async def test_should_serve_async_views_through_the_async_client(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            reverse("answer-list-partial-async", kwargs={"question_id": self.question.pk}), {"cursor": ""}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Answer 4")
+        response = await self.async_client.post(
+            reverse("vote-async", kwargs={"model_label": "question", "object_id": self.question.pk}), {"vote_type": -1}
+        )
+        self.assertEqual(response.json(), {"upvotes": 0, "downvotes": 1, "user_vote": -1})
+
+    def test_should_mount_async_views_at_the_shared_urls_when_enabled(self):
+        self.assertIs(select_view(VoteView, AsyncVoteView), VoteView)
+        with self.settings(FORUM_ASYNC_VIEWS=True):
+            self.assertIs(select_view(VoteView, AsyncVoteView), AsyncVoteView)
+
+
+class TestAsgiBenchmarkCommand(TransactionTestCase):
+    def test_should_load_test_both_variants_and_delete_the_dataset(self):
+        out = StringIO()
+        call_command(
+            "benchmark_asgi", "--concurrency", "2", "--requests", "4", "--questions", "2", "--answers", "2",
+            "--comments", "1", stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(all(line.endswith("errors=0") for line in lines), lines)
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(Question.objects.exists())
+
+
+@override_settings(FORUM_LIVE_UPDATES=True)
+class TestLiveUpdates(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="watcher", email="watcher@example.com", password="pass123")
+        self.question = Question.objects.create(title="Live", description="Updates", author=self.user)
+        self.answer = Answer.objects.create(question=self.question, author=self.user, content="Answer")
+        self.client.login(username="watcher", password="pass123")
+
+    async def collect(self, channel, action, interval=0.2):
+        """Subscribe to `channel`, run the sync `action` and return the first coalesced batch."""
+        subscription = get_broker().subscribe(channel)
+        try:
+            batches = coalesced_batches(subscription, interval=interval, keepalive=5)
+            await sync_to_async(action)()
+            return await anext(batches)
+        finally:
+            subscription.close()
+
+    async def test_should_coalesce_bursts_into_one_event_per_object(self):
+        broker = LocalMemoryBroker()
+        subscription = broker.subscribe("question:1")
+
+        def burst():
+            for upvotes in range(1, 4):
+                broker.publish("question:1", {"type": "vote", "model": "answer", "id": 7, "upvotes": upvotes, "downvotes": 0})
+            broker.publish("question:1", {"type": "answer", "id": 8})
+            broker.publish("question:2", {"type": "answer", "id": 9})
+
+        await asyncio.to_thread(burst)
+        batch = await anext(coalesced_batches(subscription, interval=0.2, keepalive=5))
+        self.assertEqual(batch, [
+            {"type": "vote", "model": "answer", "id": 7, "upvotes": 3, "downvotes": 0},
+            {"type": "answer", "id": 8},
+        ])
+        subscription.close()
+        self.assertEqual(broker.subscribers, {})
+
+    def test_should_publish_vote_counts_to_the_question_channel(self):
+        url = reverse("vote", kwargs={"model_label": "answer", "object_id": self.answer.pk})
+        batch = async_to_sync(self.collect)(
+            question_channel(self.question.pk), lambda: self.client.post(url, {"vote_type": -1})
+        )
+        self.assertEqual(batch, [{"type": "vote", "model": "answer", "id": self.answer.pk, "upvotes": 0, "downvotes": 1}])
+
+    def test_should_publish_new_answers_and_comments_after_commit(self):
+        def create():
+            with self.captureOnCommitCallbacks(execute=True):
+                answer = Answer.objects.create(question=self.question, author=self.user, content="Late answer")
+                Comment.objects.create(content_object=self.answer, author=self.user, content="Late comment")
+            self.created = answer
+
+        batch = async_to_sync(self.collect)(question_channel(self.question.pk), create)
+        comment = Comment.objects.get(content="Late comment")
+        self.assertEqual(batch, [
+            {"type": "answer", "id": self.created.pk},
+            {"type": "comment", "id": comment.pk, "parent_id": None, "answer_id": self.answer.pk},
+        ])
+
+    async def test_should_stream_events_as_server_sent_events(self):
+        response = await self.async_client.get(reverse("question-events", kwargs={"question_id": self.question.pk}))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+        get_broker().publish(question_channel(self.question.pk), {"type": "answer", "id": 42})
+        self.assertEqual(await asyncio.wait_for(anext(stream), 5), b'event: answer\ndata: {"type":"answer","id":42}\n\n')
+        await stream.aclose()
+
+    async def test_should_404_for_missing_questions(self):
+        response = await self.async_client.get(reverse("question-events", kwargs={"question_id": 999999}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_should_refuse_streams_outside_asgi_or_when_disabled(self):
+        url = reverse("question-events", kwargs={"question_id": self.question.pk})
+        self.assertEqual(self.client.get(url).status_code, 204)
+        with self.settings(FORUM_LIVE_UPDATES=False):
+            self.assertEqual(async_to_sync(self.async_client.get)(url).status_code, 204)
+            page = self.client.get(reverse("question_detail", kwargs={"question_id": self.question.pk}))
+            self.assertNotContains(page, "EventSource")
+        page = self.client.get(reverse("question_detail", kwargs={"question_id": self.question.pk}))
+        self.assertContains(page, "EventSource")
+
+    def test_should_skip_publishing_votes_without_subscribers(self):
+        comment = Comment.objects.create(content_object=self.answer, author=self.user, content="Quiet")
+        url = reverse("vote", kwargs={"model_label": "comment", "object_id": comment.pk})
+        with patch("forum.domain.live.question_id_for") as question_id_for:
+            self.client.post(url, {"vote_type": 1})
+        question_id_for.assert_not_called()
+
+
+@override_settings(FORUM_READ_REPLICAS=["replica"])
+class TestReadReplicaRouting(TestCase):
+    """The replica test database is a separate SQLite file that never receives the primary's writes,
+    standing in for a replica that lags behind."""
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", email="writer@example.com", password="pass123")
+        self.question = Question.objects.create(title="Fresh question", description="Only on the primary", author=self.user)
+        self.client.login(username="writer", password="pass123")
+
+    def test_should_route_forum_reads_to_the_replica_only_inside_read_from(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Question))
+        with read_from("replica"):
+            self.assertEqual(router.db_for_read(Question), "replica")
+            self.assertEqual(router.db_for_read(Tag), "replica")
+            self.assertIsNone(router.db_for_read(User))
+            self.assertEqual(router.db_for_write(Question), "default")
+            self.assertFalse(Question.objects.exists())
+        self.assertTrue(Question.objects.exists())
+        self.assertFalse(router.allow_migrate("replica", "forum"))
+        self.assertIsNone(router.allow_migrate("default", "forum"))
+
+    def test_should_serve_read_only_views_from_the_replica(self):
+        self.assertEqual(list(self.client.get(reverse("question_list")).context["questions"]), [])
+        self.assertEqual(self.client.get(reverse("question_detail", kwargs={"question_id": self.question.pk})).status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse("answer-list-partial-async", kwargs={"question_id": self.question.pk})).status_code, 404
+        )
+
+    def test_should_pin_writers_to_the_primary_after_a_write(self):
+        response = self.client.post(
+            reverse("vote", kwargs={"model_label": "question", "object_id": self.question.pk}), {"vote_type": 1}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 10)
+
+        detail = self.client.get(reverse("question_detail", kwargs={"question_id": self.question.pk}))
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.context["question_upvotes"], 1)
+        self.assertEqual(list(self.client.get(reverse("question_list")).context["questions"]), [self.question])
+
+    def test_should_not_pin_failed_writes(self):
+        response = self.client.post(
+            reverse("vote", kwargs={"model_label": "question", "object_id": self.question.pk}), {"vote_type": 5}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+class TestSqliteTuning(TransactionTestCase):
+    def test_should_configure_new_connections_for_concurrent_writes(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 2_000)
+        self.assertEqual(connection.transaction_mode, "IMMEDIATE")
+        self.assertEqual(connection.settings_dict["CONN_MAX_AGE"], 600)
+
+    def test_should_retry_lock_errors_in_a_fresh_transaction(self):
+        calls = []
+
+        def write():
+            calls.append(connection.in_atomic_block)
+            Question.objects.create(title=f"Attempt {len(calls)}", description="Retry", author=self.user())
+            if len(calls) < 3:
+                raise OperationalError("database is locked")
+            return len(calls)
+
+        self.assertEqual(retry_on_lock(write)(), 3)
+        self.assertEqual(calls, [True, True, True])
+        self.assertEqual(list(Question.objects.values_list("title", flat=True)), ["Attempt 3"])
+
+    def test_should_run_commit_hooks_of_the_successful_attempt_only(self):
+        attempts, notified = [], []
+
+        class FlakyView(LockRetryMixin, View):
+            def post(view, request):
+                attempts.append(request)
+                transaction.on_commit(partial(notified.append, len(attempts)))
+                if len(attempts) < 3:
+                    raise OperationalError("database is locked")
+                return HttpResponse()
+
+        self.assertEqual(FlakyView.as_view()(RequestFactory().post("/")).status_code, 200)
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(notified, [3])
+
+    def test_should_not_retry_other_errors(self):
+        calls = []
+
+        def fail():
+            calls.append(1)
+            raise OperationalError("no such table: forum_missing")
+
+        with self.assertRaises(OperationalError):
+            call_with_lock_retry(fail)
+        self.assertEqual(len(calls), 1)
+
+    def test_should_report_stock_and_tuned_write_throughput(self):
+        out = StringIO()
+        call_command("benchmark_sqlite", "--threads", "2", "--ops", "10", stdout=out)
+        stock, tuned = out.getvalue().splitlines()
+        self.assertTrue(stock.startswith("stock"))
+        self.assertIn("committed=20 ", tuned)
+        self.assertIn("lock_errors=0 ", tuned)
+
+    def user(self):
+        return User.objects.get_or_create(username="retrier", email="retrier@example.com")[0]
+
+
+class TestConditionalGet(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="cacher", email="cacher@example.com", password="pass123")
+        self.other = User.objects.create_user(username="other", email="other@example.com", password="pass123")
+        self.question = Question.objects.create(title="Cached", description="Validators", author=self.user)
+        self.answer = Answer.objects.create(question=self.question, author=self.user, content="Answer")
+        self.comment = Comment.objects.create(content_object=self.answer, author=self.user, content="Comment")
+        self.urls = {
+            "question": reverse("question_detail", kwargs={"question_id": self.question.pk}),
+            "answer": reverse("answer_detail", kwargs={"answer_id": self.answer.pk}),
+            "answers": reverse("answer-list-partial", kwargs={"question_id": self.question.pk}),
+            "comments": reverse("answer-comments-partial", kwargs={"answer_id": self.answer.pk}),
+        }
+
+    def etags(self):
+        return {name: self.client.get(url)["ETag"] for name, url in self.urls.items()}
+
+    def test_should_short_circuit_unchanged_pages_with_one_query(self):
+        for url in self.urls.values():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("no-cache", response["Cache-Control"])
+            self.assertIn("Cookie", response["Vary"])
+            with self.assertNumQueries(1):
+                not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(not_modified["ETag"], response["ETag"])
+            self.assertFalse(response.has_header("Last-Modified"))
+
+    def test_should_change_validators_when_votes_or_children_change(self):
+        before = self.etags()
+        Vote.objects.create(user=self.other, content_object=self.comment, vote_type=1)
+        after_comment_vote = self.etags()
+        self.assertNotEqual(after_comment_vote["comments"], before["comments"])
+        self.assertEqual(after_comment_vote["question"], before["question"])
+
+        Answer.objects.create(question=self.question, author=self.other, content="Another")
+        Vote.objects.create(user=self.other, content_object=self.question, vote_type=-1)
+        after_answer = self.etags()
+        self.assertNotEqual(after_answer["answers"], after_comment_vote["answers"])
+        self.assertNotEqual(after_answer["question"], after_comment_vote["question"])
+        self.assertEqual(after_answer["answer"], after_comment_vote["answer"])
+
+    def test_should_keep_separate_validators_per_user(self):
+        anonymous = self.etags()
+        self.client.login(username="other", password="pass123")
+        signed_in = self.etags()
+        self.assertTrue(all(anonymous[name] != signed_in[name] for name in self.urls))
+
+        self.client.post(reverse("vote", kwargs={"model_label": "answer", "object_id": self.answer.pk}), {"vote_type": 1})
+        voted = self.etags()
+        self.assertNotEqual(voted["answers"], signed_in["answers"])
+        self.assertNotEqual(voted["answer"], signed_in["answer"])
+        self.assertEqual(voted["question"], signed_in["question"])
+
+        self.client.post(reverse("vote", kwargs={"model_label": "answer", "object_id": self.answer.pk}), {"vote_type": 1})
+        # Toggling the vote off restores exactly the state the first page was rendered from.
+        self.assertEqual(self.etags()["answers"], signed_in["answers"])
+
+    async def test_should_validate_async_partials_like_their_sync_twins(self):
+        await self.async_client.aforce_login(self.other)
+        for name, kwargs in (
+            ("answer-list-partial-async", {"question_id": self.question.pk}),
+            ("answer-comments-partial-async", {"answer_id": self.answer.pk}),
+        ):
+            url = reverse(name, kwargs=kwargs)
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("private", response["Cache-Control"])
+            not_modified = await self.async_client.get(url, headers={"If-None-Match": response["ETag"]})
+            self.assertEqual(not_modified.status_code, 304)
+
+        url = reverse("answer-list-partial-async", kwargs={"question_id": self.question.pk})
+        etag = (await self.async_client.get(url))["ETag"]
+        await Answer.objects.acreate(question=self.question, author=self.user, content="Async")
+        self.assertEqual((await self.async_client.get(url, headers={"If-None-Match": etag})).status_code, 200)
+
+    def test_should_revalidate_after_logging_in_again(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.other)
+        url = self.urls["question"]
+        etag = client.get(url)["ETag"]
+
+        client.logout()
+        client.force_login(self.other)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        token = re.search(r'"X-CSRFToken": "([^"]+)"', response.content.decode()).group(1)
+        vote = client.post(
+            reverse("vote", kwargs={"model_label": "question", "object_id": self.question.pk}),
+            {"vote_type": 1},
+            HTTP_X_CSRFTOKEN=token,
+        )
+        self.assertEqual(vote.status_code, 200)
+
+    def test_should_not_validate_missing_objects(self):
+        response = self.client.get(reverse("question_detail", kwargs={"question_id": 999999}))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
+
+
+class TestCorpusExportImport(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="exporter", email="exporter@example.com", password="pass123")
+        self.voter = User.objects.create_user(username="exvoter", email="exvoter@example.com", password="pass123")
+        self.question = Question.objects.create(title="Portable corpus", description="Body text", author=self.author)
+        self.question.tags.add("export", "jsonl")
+        self.answer = Answer.objects.create(question=self.question, author=self.voter, content="An answer")
+        self.root = Comment.objects.create(content_object=self.answer, author=self.author, content="Root comment")
+        self.reply = Comment.objects.create(
+            content_object=self.answer, parent=self.root, author=self.voter, content="Reply"
+        )
+        Comment.objects.create(content_object=self.question, author=self.voter, content="On the question")
+        Vote.objects.create(user=self.voter, content_object=self.question, vote_type=Vote.VoteType.UPVOTE)
+        Vote.objects.create(user=self.author, content_object=self.answer, vote_type=Vote.VoteType.DOWNVOTE)
+        Vote.objects.create(user=self.voter, content_object=self.reply, vote_type=Vote.VoteType.UPVOTE)
+        self.created_at = timezone.now() - timezone.timedelta(days=30)
+        Question.objects.filter(pk=self.question.pk).update(created_at=self.created_at)
+
+    def export(self, **kwargs):
+        stream = StringIO()
+        counts = export_corpus(stream, **kwargs)
+        stream.seek(0)
+        return stream, counts
+
+    def clear_forum(self):
+        Question.objects.all().delete()
+        Comment.objects.all().delete()
+        Vote.objects.all().delete()
+        Tag.objects.all().delete()
+        self.voter.delete()
+
+    def test_should_stream_header_then_sections_in_dependency_order(self):
+        stream, counts = self.export(chunk_size=1)
+        records = [json.loads(line) for line in stream]
+        self.assertEqual(records[0], {"format": "answerly-corpus", "version": 1})
+        self.assertEqual([r["model"] for r in records[1:3]], ["user", "user"])
+        self.assertEqual(counts["question"], 1)
+        self.assertEqual(counts["tagged"], 2)
+        self.assertEqual(counts["comment"], 3)
+        self.assertEqual(counts["vote"], 3)
+        vote = next(r for r in records if r.get("model") == "vote" and r["target_model"] == "comment")
+        self.assertEqual(vote["target"], self.reply.pk)
+        self.assertNotIn("is_superuser", records[1])
+
+    def test_should_round_trip_with_remapped_ids_and_rebuilt_state(self):
+        stream, exported = self.export()
+        self.clear_forum()
+        Question.objects.create(title="Occupies the old id", description="x", author=self.author)
+
+        imported = import_corpus(stream, batch_size=1)
+
+        self.assertEqual(imported, exported)
+        question = Question.objects.get(title="Portable corpus")
+        self.assertNotEqual(question.pk, self.question.pk)
+        self.assertEqual(question.author, self.author)
+        self.assertEqual(question.created_at, self.created_at)
+        # Only the imported instances skip auto_now; the shared fields are untouched.
+        self.assertTrue(Question._meta.get_field("updated_at").auto_now)
+        question.save()
+        self.assertGreater(question.updated_at, self.created_at)
+        self.assertEqual(sorted(question.tags.names()), ["export", "jsonl"])
+        self.assertEqual((question.upvote_count, question.score), (1, 1))
+        self.assertFalse(question.hot_score_stale)
+
+        answer = question.answers.get()
+        voter = User.objects.get(username="exvoter")
+        self.assertEqual(answer.author, voter)
+        self.assertEqual(answer.downvote_count, 1)
+        self.assertTrue(voter.check_password("pass123"))
+
+        reply = Comment.objects.get(content="Reply")
+        self.assertEqual(reply.content_object, answer)
+        self.assertEqual(reply.parent.content, "Root comment")
+        self.assertEqual(reply.path, reply.parent.path + f"{reply.pk:010d}")
+        self.assertEqual(reply.upvote_count, 1)
+        self.assertEqual(Comment.objects.get(content="On the question").content_object, question)
+        self.assertEqual(list(get_search_backend().search(Question.objects.all(), "portable")), [question])
+        call_command("rebuild_vote_counts", "--verify", stdout=StringIO())
+        # The reply's upvote is a self-vote and earns nothing.
+        self.author.refresh_from_db()
+        self.assertEqual((self.author.reputation, voter.reputation), (5, -2))
+        call_command("rebuild_reputation", "--verify", stdout=StringIO())
+
+    def test_should_reuse_existing_users_and_tags(self):
+        stream, _ = self.export()
+        users, tags = User.objects.count(), Tag.objects.count()
+
+        import_corpus(stream)
+
+        self.assertEqual(User.objects.count(), users)
+        self.assertEqual(Tag.objects.count(), tags)
+        self.assertEqual(Question.objects.filter(title="Portable corpus", author=self.author).count(), 2)
+        self.assertEqual(Vote.objects.count(), 6)
+
+    def test_should_reject_dangling_references_without_writing_anything(self):
+        stream, _ = self.export()
+        lines = [line for line in stream if '"model":"question"' not in line]
+        questions = Question.objects.count()
+
+        with self.assertRaisesMessage(ValueError, "question"):
+            import_corpus(StringIO("".join(lines)))
+        with self.assertRaisesMessage(ValueError, "answerly-corpus"):
+            import_corpus(StringIO(lines[1]))
+        self.assertEqual(Question.objects.count(), questions)
+
+    def test_should_round_trip_compressed_files_through_commands(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "corpus.jsonl.gz")
+            out = StringIO()
+            call_command("export_corpus", path, stdout=out)
+            self.assertRegex(out.getvalue(), r"Exported 14 rows .* rows/s\.")
+
+            self.clear_forum()
+            out = StringIO()
+            call_command("import_corpus", path, "--batch-size", "2", stdout=out)
+            self.assertRegex(out.getvalue(), r"Imported 14 rows .* rows/s\.")
+            self.assertEqual(Vote.objects.count(), 3)
+
+            with gzip.open(path, "wt") as corrupt:
+                corrupt.write("not json\n")
+            with self.assertRaises(CommandError):
+                call_command("import_corpus", path, stdout=StringIO())
+
+
+class TestPerformanceInstrumentation(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="timed", email="timed@example.com", password="pass123")
+        self.question = Question.objects.create(title="Timed question", description="Body", author=self.user)
+        self.answer = Answer.objects.create(question=self.question, author=self.user, content="Timed answer")
+
+    def parse_server_timing(self, response):
+        metrics = {}
+        for entry in response["Server-Timing"].split(", "):
+            name, duration, *rest = entry.split(";")
+            metrics[name] = (float(duration.removeprefix("dur=")), rest)
+        return metrics
+
+    @override_settings(FORUM_SERVER_TIMING=True)
+    def test_should_emit_server_timing_to_staff_only(self):
+        self.assertNotIn("Server-Timing", self.client.get(reverse("question_list")))
+        self.client.force_login(self.user)
+        self.assertNotIn("Server-Timing", self.client.get(reverse("question_list")))
+
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        response = self.client.get(reverse("question_list"))
+        metrics = self.parse_server_timing(response)
+        self.assertEqual(set(metrics), {"total", "view", "tpl", "db"})
+        self.assertGreater(metrics["tpl"][0], 0)
+        self.assertGreaterEqual(metrics["total"][0], metrics["tpl"][0])
+        self.assertRegex(metrics["db"][1][0], r'^desc="[1-9]\d* queries"$')
+
+        with self.settings(FORUM_SERVER_TIMING=False):
+            client = Client()
+            client.force_login(self.user)
+            self.assertNotIn("Server-Timing", client.get(reverse("question_list")))
+
+    @override_settings(FORUM_SERVER_TIMING=True, DEBUG=True)
+    def test_should_emit_server_timing_to_everyone_under_debug(self):
+        self.assertIn("Server-Timing", self.client.get(reverse("question_list")))
+
+    def test_should_log_one_structured_line_per_request_tagged_by_route(self):
+        with self.assertLogs("forum.performance", level="INFO") as logs:
+            self.client.get(reverse("answer_detail", kwargs={"answer_id": self.answer.pk}))
+        (line,) = logs.records
+        record = json.loads(line.getMessage())
+        self.assertEqual(record["route"], "answer_detail")
+        self.assertEqual((record["method"], record["status"]), ("GET", 200))
+        self.assertGreater(record["queries"], 0)
+        self.assertGreater(record["template_ms"], 0)
+        self.assertEqual(
+            set(record),
+            {"route", "method", "status", "total_ms", "view_ms", "template_ms", "sql_ms", "queries",
+             "repeated_queries", "duplicate_queries"},
+        )
+
+    def test_should_count_repeated_and_duplicate_queries(self):
+        metrics = RequestMetrics()
+        metrics.record_query("SELECT 1 WHERE id = %s", (1,), 0.001)
+        metrics.record_query("SELECT 1 WHERE id = %s", (2,), 0.001)
+        metrics.record_query("SELECT 1 WHERE id = %s", [1], 0.001)
+        metrics.record_query("INSERT INTO t VALUES (%s)", [(1,), (2,)], 0.001)
+        self.assertEqual(metrics.queries, 4)
+        self.assertEqual(metrics.repeated_queries, 2)
+        self.assertEqual(metrics.duplicates, 1)
+
+    def test_should_sample_slow_requests_with_their_sql(self):
+        with self.settings(FORUM_SLOW_REQUEST_MS=0, FORUM_SLOW_REQUEST_SAMPLE_RATE=1.0):
+            with self.assertLogs("forum.performance", level="WARNING"), \
+                    self.assertLogs("forum.performance.slow", level="WARNING") as logs:
+                Client().get(reverse("question_detail", kwargs={"question_id": self.question.pk}))
+        sample = json.loads(logs.records[0].getMessage())
+        self.assertEqual(sample["route"], "question_detail")
+        self.assertEqual(sample["path"], reverse("question_detail", kwargs={"question_id": self.question.pk}))
+        self.assertEqual(len(sample["sql"]), sample["queries"])
+        self.assertTrue(any("forum_question" in query["sql"] for query in sample["sql"]))
+        self.assertEqual({key for query in sample["sql"] for key in query}, {"ms", "sql", "param_count"})
+        self.assertTrue(any(query["param_count"] for query in sample["sql"]))
+
+        with self.settings(
+            FORUM_SLOW_REQUEST_MS=0, FORUM_SLOW_REQUEST_SAMPLE_RATE=1.0, FORUM_SLOW_REQUEST_LOG_PARAMS=True
+        ):
+            with self.assertLogs("forum.performance", level="WARNING"), \
+                    self.assertLogs("forum.performance.slow", level="WARNING") as logs:
+                Client().get(reverse("question_detail", kwargs={"question_id": self.question.pk}))
+        sample = json.loads(logs.records[0].getMessage())
+        self.assertIn(repr((self.question.pk,)), [query.get("params") for query in sample["sql"]])
+
+        with self.settings(FORUM_SLOW_REQUEST_MS=0, FORUM_SLOW_REQUEST_SAMPLE_RATE=0.0):
+            with self.assertLogs("forum.performance", level="WARNING"), \
+                    self.assertNoLogs("forum.performance.slow", level="WARNING"):
+                Client().get(reverse("question_list"))
+
+    @override_settings(FORUM_SERVER_TIMING=True)
+    async def test_should_count_queries_made_by_async_views(self):
+        await User.objects.filter(pk=self.user.pk).aupdate(is_staff=True)
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            reverse("answer-list-partial-async", kwargs={"question_id": self.question.pk})
+        )
+        metrics = self.parse_server_timing(response)
+        self.assertRegex(metrics["db"][1][0], r'^desc="[1-9]\d* queries"$')
+        self.assertGreater(metrics["tpl"][0], 0)
+
+    def test_should_not_record_queries_outside_requests(self):
+        self.assertIn(record_query, connection.execute_wrappers)
+        Question.objects.count()
+
+    def test_should_report_overhead_from_benchmark_command(self):
+        out = StringIO()
+        call_command(
+            "benchmark_instrumentation", "--rounds", "2", "--questions", "2", "--max-overhead", "1000", stdout=out
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertIn("all routes", lines[-1])
+
+
+class TestDuplicateDetection(TestCase):
+    TITLE = "How do I reverse a linked list in Python"
+    DESCRIPTION = (
+        "I have a singly linked list class with head and next pointers and want to reverse it "
+        "in place without allocating a second list. My loop keeps losing the rest of the nodes."
+    )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.index_path = os.path.join(directory.name, "duplicates.idx")
+        settings_override = override_settings(FORUM_DUPLICATE_INDEX_PATH=self.index_path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_duplicate_index()
+        self.addCleanup(reset_duplicate_index)
+        self.user = User.objects.create_user(username="asker", email="asker@example.com", password="pass123")
+        self.original = Question.objects.create(title=self.TITLE, description=self.DESCRIPTION, author=self.user)
+        Question.objects.create(
+            title="Configure gunicorn workers", description="How many workers should gunicorn run per core?",
+            author=self.user,
+        )
+        build_duplicate_index().save(self.index_path)
+
+    def reworded(self):
+        return (
+            "Reverse a linked list in Python",
+            self.DESCRIPTION.replace("My loop keeps losing", "Each attempt loses"),
+        )
+
+    def test_should_score_reworded_questions_as_similar(self):
+        shingles = question_shingles(self.TITLE, self.DESCRIPTION)
+        self.assertNotIn("t:how", shingles)
+        self.assertIn("d:linked list", shingles)
+        self.assertGreater(jaccard(shingles, question_shingles(*self.reworded())), 0.6)
+        self.assertLess(jaccard(shingles, question_shingles("Configure gunicorn workers", "How many?")), 0.1)
+        self.assertIsNone(question_band_keys("", ""))
+
+    def test_should_suggest_duplicates_without_scanning_questions(self):
+        get_duplicate_index()
+        with CaptureQueriesContext(connection) as queries:
+            duplicates = find_duplicates(*self.reworded())
+        self.assertEqual([question.pk for question in duplicates], [self.original.pk])
+        self.assertGreater(duplicates[0].similarity, 0.6)
+        # One query for questions created since the index was built, one for the candidates.
+        self.assertEqual(len(queries), 2)
+        for query in queries:
+            self.assertIn('"forum_question"."id"', query["sql"].split("WHERE", 1)[1])
+        self.assertEqual(find_duplicates(*self.reworded(), exclude_id=self.original.pk), [])
+
+    def test_should_update_the_loaded_index_when_questions_change(self):
+        index = get_duplicate_index()
+        late = Question.objects.create(title="Completely unrelated", description="Nothing alike here", author=self.user)
+        # Questions created elsewhere are picked up by the next lookup.
+        self.assertEqual(find_duplicates(late.title, late.description), [late])
+        self.assertEqual(index.synced_through, late.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            late.title, late.description = self.reworded()
+            late.save()
+        self.assertEqual({question.pk for question in find_duplicates(self.TITLE, self.DESCRIPTION)},
+                         {self.original.pk, late.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.original.delete()
+        self.assertNotIn(self.original.pk, index.query(question_band_keys(self.TITLE, self.DESCRIPTION)))
+        self.assertEqual([question.pk for question in find_duplicates(self.TITLE, self.DESCRIPTION)], [late.pk])
+
+    def test_should_sync_new_questions_in_batches_without_growing_hidden(self):
+        index = get_duplicate_index()
+        late = [
+            Question.objects.create(title=f"Unrelated topic {number}", description="Nothing alike here", author=self.user)
+            for number in range(3)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            sync_new_questions(index, batch_size=2)
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(index.synced_through, late[-1].pk)
+        self.assertEqual(set(index.delta_keys), {question.pk for question in late})
+        # Only questions in the base file need hiding.
+        self.assertEqual(index.hidden, set())
+
+        # A reader that fetched before another thread synced does not overwrite it.
+        index.add_synced([(late[0].pk, question_band_keys(self.TITLE, self.DESCRIPTION))], synced_through=late[0].pk)
+        self.assertEqual(index.delta_keys[late[0].pk], question_band_keys(late[0].title, late[0].description))
+        self.assertEqual(index.synced_through, late[-1].pk)
+
+        index.remove(self.original.pk)
+        self.assertEqual(index.hidden, {self.original.pk})
+        index.save(self.index_path)
+        self.assertEqual((index.hidden, index.delta_keys), (set(), {}))
+        self.assertEqual(sorted(index.ids), sorted(question.pk for question in Question.objects.exclude(pk=self.original.pk)))
+        self.assertNotIn(self.original.pk, index.query(question_band_keys(self.TITLE, self.DESCRIPTION)))
+
+    def test_should_round_trip_the_index_file_with_its_delta(self):
+        keys = question_band_keys(self.TITLE, self.DESCRIPTION)
+        other_keys = question_band_keys(*self.reworded())
+        index = MinHashLSHIndex.build([(1, keys), (2, other_keys)], synced_through=2)
+        index.add(3, keys)
+        index.remove(2)
+        index.save(self.index_path)
+
+        loaded = MinHashLSHIndex.load(self.index_path)
+        self.assertEqual(loaded.synced_through, 2)
+        self.assertEqual(sorted(loaded.ids), [1, 3])
+        self.assertEqual(loaded.query(keys), {1: BANDS, 3: BANDS})
+        self.assertEqual(dict(loaded.rows()), {1: keys, 3: keys})
+
+        with open(self.index_path, "r+b") as fh:
+            fh.write(b"ANSLSH00")
+        self.assertIsNone(MinHashLSHIndex.load(self.index_path))
+        self.assertIsNone(MinHashLSHIndex.load(self.index_path + ".missing"))
+
+    def test_should_offer_duplicates_before_posting(self):
+        self.client.login(username="asker", password="pass123")
+        title, description = self.reworded()
+        data = {"title": title, "description": description, "tags": "python"}
+
+        response = self.client.post(reverse("question_post"), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["duplicates"], [self.original])
+        self.assertContains(response, reverse("question_detail", kwargs={"question_id": self.original.pk}))
+        self.assertContains(response, 'name="post_anyway"')
+        self.assertFalse(Question.objects.filter(title=title).exists())
+
+        response = self.client.post(reverse("question_post"), {**data, "post_anyway": "1"})
+        self.assertRedirects(response, reverse("question_list"))
+        self.assertTrue(Question.objects.filter(title=title).exists())
+
+    def test_should_not_suggest_or_scan_without_an_index_file(self):
+        os.remove(self.index_path)
+        reset_duplicate_index()
+        with self.assertLogs("forum.domain.duplicates", level="WARNING"), \
+                CaptureQueriesContext(connection) as queries:
+            self.assertEqual(find_duplicates(*self.reworded()), [])
+        self.assertEqual(len(queries), 0)
+        self.assertIsNone(loaded_duplicate_index())
+
+        call_command("build_duplicate_index", stdout=StringIO())
+        self.assertEqual([question.pk for question in find_duplicates(*self.reworded())], [self.original.pk])
+
+    def test_should_build_index_file_with_command(self):
+        out = StringIO()
+        call_command("build_duplicate_index", stdout=out)
+        self.assertIn("Indexed 2 questions", out.getvalue())
+        self.assertEqual(MinHashLSHIndex.load(self.index_path).synced_through, Question.objects.latest("pk").pk)
+        self.assertEqual(find_duplicates(*self.reworded()), [self.original])
+
+    def test_should_report_lookup_latency_from_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_duplicate_lookup", "--questions", "200", "--lookups", "20", stdout=out)
+        self.assertIn("Indexed 200 questions", out.getvalue())
+        self.assertRegex(out.getvalue(), r"Lookup p50=[\d.]+ms p95=[\d.]+ms")
+
+
+class TestRelatedQuestions(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="relater", email="relater@example.com", password="pass123")
+        self.select = self.ask("Django ORM select_related joins", "Avoiding extra queries for foreign keys", "django", "orm")
+        self.prefetch = self.ask("Django ORM prefetch_related performance", "Many to many lookups are slow", "django", "orm")
+        self.forms = self.ask("Django forms clean method", "Validation errors on submit", "django", "forms")
+        self.bread = self.ask("Sourdough bread starter", "Mine never rises overnight", "baking")
+
+    def ask(self, title, description, *tags):
+        question = Question.objects.create(title=title, description=description, author=self.user)
+        question.tags.add(*tags)
+        return question
+
+    def test_should_rank_related_questions_by_tags_and_title(self):
+        out = StringIO()
+        call_command("refresh_related_questions", stdout=out)
+        self.assertIn("for 4 question(s)", out.getvalue())
+        self.assertEqual(related_questions(self.select.pk), [self.prefetch, self.forms])
+        self.assertEqual(related_questions(self.bread.pk), [])
+        self.assertFalse(Question.objects.filter(related_stale=True).exists())
+        scores = RelatedQuestion.objects.filter(question=self.select).order_by("rank").values_list("score", flat=True)
+        self.assertGreater(scores[0], scores[1])
+
+    def test_should_read_the_list_with_one_indexed_query(self):
+        refresh_related_questions()
+        url = reverse("question_detail", kwargs={"question_id": self.select.pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, "Related Questions")
+        self.assertContains(response, reverse("question_detail", kwargs={"question_id": self.prefetch.pk}))
+        related = [query["sql"] for query in queries if "forum_relatedquestion" in query["sql"]]
+        self.assertEqual(len(related), 1)
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {related[0]}".replace("%s", str(self.select.pk)))
+            plan = " ".join(str(row) for row in cursor.fetchall())
+        self.assertIn("forum_related_question_idx", plan)
+
+    def test_should_refresh_only_changed_questions_and_the_lists_they_move(self):
+        corpus = RelatedCorpus.load()
+        refresh_related_questions(corpus)
+        self.bread.title = "Django ORM select_related with prefetch"
+        self.bread.save()
+        self.bread.tags.set(["django", "orm"])
+        self.assertEqual(list(Question.objects.filter(related_stale=True)), [self.bread])
+
+        # The changed question, the lists it enters and the lists that showed it.
+        self.assertEqual(refresh_related_questions(corpus), 4)
+        self.assertEqual(related_questions(self.select.pk)[0], self.bread)
+        self.assertIn(self.bread, related_questions(self.prefetch.pk))
+
+        self.prefetch.tags.remove("orm")
+        self.assertTrue(Question.objects.get(pk=self.prefetch.pk).related_stale)
+
+    def test_should_only_mark_text_changes_stale(self):
+        refresh_related_questions()
+        question = Question.objects.get(pk=self.forms.pk)
+        question.hot_score = 42
+        question.save()
+        question.save(update_fields=["hot_score"])
+        self.assertFalse(Question.objects.filter(related_stale=True).exists())
+
+        question.description = "Validating forms with clean"
+        question.save(update_fields=["description"])
+        self.assertEqual(list(Question.objects.filter(related_stale=True)), [self.forms])
+
+    def test_should_relate_questions_by_description(self):
+        first = Question.objects.create(title="Crash on startup", description="Segfault inside libvips resize", author=self.user)
+        second = Question.objects.create(title="Thumbnails fail", description="libvips resize segfault", author=self.user)
+        refresh_related_questions()
+        self.assertEqual(related_questions(first.pk), [second])
+
+        response = self.client.get(reverse("question_detail", kwargs={"question_id": first.pk}))
+        similarity = RelatedQuestion.objects.get(question=first, related=second).score
+        self.assertContains(response, f"{round(similarity * 100)}%")
+
+    def test_should_drop_deleted_questions_from_lists(self):
+        corpus = RelatedCorpus.load()
+        refresh_related_questions(corpus)
+        Question.objects.filter(pk=self.forms.pk).delete()
+        self.assertEqual(related_questions(self.select.pk), [self.prefetch])
+        self.assertTrue(Question.objects.get(pk=self.select.pk).related_stale)
+
+        self.assertEqual(refresh_related_questions(corpus), 2)
+        self.assertNotIn(self.forms.pk, corpus.features)
+        self.assertEqual(related_questions(self.select.pk), [self.prefetch])
+
+    def test_should_change_detail_validator_when_list_is_rewritten(self):
+        url = reverse("question_detail", kwargs={"question_id": self.select.pk})
+        before = self.client.get(url)["ETag"]
+        refresh_related_questions()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=before).status_code, 200)
+
+
+class TestTagCounts(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="counter", email="counter@example.com", password="pass123")
+        self.first = Question.objects.create(title="First", description="Body", author=self.user)
+        self.second = Question.objects.create(title="Second", description="Body", author=self.user)
+        self.first.tags.add("django", "python")
+        self.second.tags.add("python", "htmx")
+
+    def counts(self):
+        return dict(TagCounter.objects.filter(question_count__gt=0).values_list("tag__name", "question_count"))
+
+    def test_should_follow_tag_changes_and_deletions(self):
+        self.assertEqual(self.counts(), {"django": 1, "python": 2, "htmx": 1})
+        self.first.tags.add("python")
+        self.first.tags.remove("django")
+        self.second.tags.set(["htmx", "alpine"])
+        self.assertEqual(self.counts(), {"python": 1, "htmx": 1, "alpine": 1})
+
+        self.second.tags.clear()
+        self.assertEqual(self.counts(), {"python": 1})
+        self.first.delete()
+        self.assertEqual(self.counts(), {})
+
+    def test_should_sort_tag_choices_by_popularity(self):
+        self.assertEqual([name for _, name in tag_choices()], ["python", "django", "htmx"])
+        response = self.client.get(reverse("tag_autocomplete"))
+        self.assertEqual([tag["name"] for tag in response.json()["results"]], ["python", "django", "htmx"])
+
+    def test_should_serve_a_cached_bounded_tag_cloud(self):
+        third = Question.objects.create(title="Third", description="Body", author=self.user)
+        third.tags.add("python")
+        cloud = build_tag_cloud(size=2)
+        self.assertEqual([(tag["name"], tag["count"]) for tag in cloud], [("django", 1), ("python", 3)])
+        self.assertEqual([tag["level"] for tag in cloud], [1, 5])
+
+        response = self.client.get(reverse("question_list"))
+        self.assertContains(response, f'?tag={Tag.objects.get(name="htmx").pk}')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(get_tag_cloud()), 3)
+        self.assertEqual(len(queries), 0)
+
+    def test_should_reconcile_drifted_counts(self):
+        alpine = Tag.objects.create(name="alpine", slug="alpine")
+        TaggedItem.objects.bulk_create(
+            [TaggedItem(content_object=question, tag=alpine) for question in (self.first, self.second)]
+        )
+        TagCounter.objects.filter(tag__name="python").update(question_count=7)
+
+        with self.assertRaises(CommandError):
+            call_command("reconcile_tag_counts", "--verify", stdout=StringIO())
+        out = StringIO()
+        call_command("reconcile_tag_counts", stdout=out)
+        self.assertIn("2 counter(s) fixed", out.getvalue())
+        self.assertEqual(self.counts(), {"django": 1, "python": 2, "htmx": 1, "alpine": 2})
+        call_command("reconcile_tag_counts", "--verify", stdout=StringIO())
+
+
+class TestReputation(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", email="author@example.com", password="pass123")
+        self.voter = User.objects.create_user(username="voter", email="voter@example.com", password="pass123")
+        self.question = Question.objects.create(title="Reputation", description="Ledger", author=self.author)
+        self.answer = Answer.objects.create(question=self.question, author=self.voter, content="Answer")
+        self.comment = Comment.objects.create(content_object=self.answer, author=self.author, content="Comment")
+        self.client.login(username="voter", password="pass123")
+
+    def vote(self, label, obj, vote_type):
+        return self.client.post(reverse("vote", kwargs={"model_label": label, "object_id": obj.pk}), {"vote_type": vote_type})
+
+    def reputation(self, user):
+        user.refresh_from_db()
+        ledger = ReputationEntry.objects.filter(user=user).aggregate(total=Sum("delta"))["total"] or 0
+        self.assertEqual(user.reputation, ledger)
+        return user.reputation
+
+    def test_should_record_every_vote_change_in_the_ledger(self):
+        self.vote("question", self.question, 1)
+        self.assertEqual(self.reputation(self.author), 5)
+        self.vote("question", self.question, -1)
+        self.assertEqual(self.reputation(self.author), -2)
+        self.vote("question", self.question, -1)
+        self.assertEqual(self.reputation(self.author), 0)
+        self.assertEqual(
+            list(ReputationEntry.objects.filter(user=self.author).order_by("pk").values_list("delta", flat=True)),
+            [5, -7, 2],
+        )
+
+        self.vote("comment", self.comment, 1)
+        self.client.login(username="author", password="pass123")
+        self.vote("answer", self.answer, 1)
+        self.assertEqual(self.reputation(self.author), 1)
+        self.assertEqual(self.reputation(self.voter), 10)
+        entry = ReputationEntry.objects.filter(user=self.voter).get()
+        self.assertEqual((entry.content_type.model, entry.object_id), ("answer", self.answer.pk))
+
+    def test_should_take_back_points_when_voted_posts_are_deleted(self):
+        self.vote("question", self.question, 1)
+        Vote.objects.create(user=self.author, content_object=self.answer, vote_type=1)
+        self.answer.delete()
+        self.assertEqual(self.reputation(self.voter), 0)
+        self.assertEqual(self.reputation(self.author), 5)
+
+    def test_should_not_credit_votes_on_own_posts(self):
+        self.vote("answer", self.answer, 1)
+        Vote.objects.create(user=self.author, content_object=self.question, vote_type=1)
+        self.assertEqual(self.reputation(self.voter), 0)
+        self.assertEqual(self.reputation(self.author), 0)
+        self.assertEqual(rebuild_reputation(dry_run=True), {})
+
+    def test_should_delete_authors_whose_posts_carry_votes(self):
+        self.vote("question", self.question, 1)
+        self.vote("comment", self.comment, 1)
+        self.author.delete()
+        self.assertFalse(ReputationEntry.objects.filter(user_id=self.author.pk).exists())
+        self.assertEqual(self.reputation(self.voter), 0)
+
+    def test_should_rebuild_drifted_reputation_from_votes(self):
+        self.vote("question", self.question, 1)
+        self.vote("comment", self.comment, 1)
+        User.objects.filter(pk=self.author.pk).update(reputation=40)
+        Vote.objects.bulk_create([Vote(user=self.author, content_object=self.answer, vote_type=-1)])
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_reputation", "--verify", stdout=StringIO())
+        out = StringIO()
+        call_command("rebuild_reputation", "--chunk-size", "1", stdout=out)
+        self.assertIn("2 user(s) corrected", out.getvalue())
+        self.author.refresh_from_db()
+        self.voter.refresh_from_db()
+        self.assertEqual((self.author.reputation, self.voter.reputation), (6, -2))
+        self.assertEqual(
+            ReputationEntry.objects.filter(user=self.author, reason=ReputationEntry.Reason.REBUILD).get().delta, -34
+        )
+        call_command("rebuild_reputation", "--verify", stdout=StringIO())
+        self.assertEqual(self.reputation(self.voter), -2)
+
+
+class TestEndpointQueryBudgets(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(
+            users=6, questions=12, answers_per_question=4, comments_per_answer=4,
+            replies_per_comment=1, tags=8, votes_per_object=3,
+        )
+
+    def test_should_cover_every_forum_and_accounts_route(self):
+        names = {pattern.name for pattern in iter_routes()}
+        forum_names = {pattern.name for pattern in get_resolver("forum.urls").url_patterns}
+        accounts_names = {pattern.name for pattern in get_resolver("accounts.urls").url_patterns if getattr(pattern, "name", None)}
+        self.assertTrue(forum_names <= names)
+        self.assertTrue(accounts_names <= names)
+        self.assertIn("login", names)
+
+    def test_should_stay_within_query_budgets(self):
+        results = run_benchmarks(self.dataset, repeat=1)
+        self.assertEqual([r for r in results if r["status"] >= 500], [])
+        over_budget = [f"{r['route']} ({r['profile']}): {r['queries']} > {r['query_budget']}" for r in results if r["over_budget"]]
+        self.assertEqual(over_budget, [])
+
+    def test_should_write_json_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "report.json")
+            call_command(
+                "benchmark_endpoints", "--users=3", "--questions=3", "--answers=1", "--comments=1",
+                "--replies=0", "--tags=2", "--votes=1", "--repeat=1", f"--output={path}", stdout=StringIO(),
+            )
+            with open(path) as fh:
+                report = json.load(fh)
+        self.assertEqual(report["dataset"]["questions"], 3)
+        result = next(r for r in report["results"] if r["route"] == "question_list" and r["profile"] == "anonymous")
+        self.assertEqual(
+            set(result),
+            {"route", "profile", "method", "path", "status", "queries", "sql_ms", "p50_ms", "p95_ms",
+             "query_budget", "over_budget"},
+        )
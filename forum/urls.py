@@ -1,9 +1,16 @@
+from django.conf import settings
 from django.urls import path
 from .views import QuestionListView,QuestionCreateView,\
     QuestionUpdateView,QuestionDeleteView,QuestionDetailView,\
     AnswerCreateView,AnswerUpdateView,AnswerDeleteView,AnswerDetailView,\
-    CommentUpdateView,CommentDeleteView,AnswerListPartialView,CommentsPartialListView,\
-    QuestionVoteView,AnswerVoteView,CommentVoteView
+    CommentUpdateView,CommentDeleteView,AnswerListPartialView,CommentsPartialListView,CommentRepliesPartialView,\
+    VoteView,TagAutocompleteView,AsyncVoteView,AsyncAnswerListPartialView,AsyncCommentsPartialListView,QuestionEventStreamView
+
+
+def select_view(sync_view, async_view):
+    """Pick the implementation mounted at a shared URL; FORUM_ASYNC_VIEWS switches to the async one."""
+    return async_view if getattr(settings, "FORUM_ASYNC_VIEWS", False) else sync_view
+
 
 urlpatterns = [
     path('', QuestionListView.as_view(), name='question_list'),
@@ -11,15 +18,19 @@ urlpatterns = [
     path('question/<int:question_id>/edit/', QuestionUpdateView.as_view(), name='question_edit'),
     path('question/<int:question_id>/delete/', QuestionDeleteView.as_view(), name='question_delete'),
     path('question/<int:question_id>/answer/', AnswerCreateView.as_view(), name='answer_post'),
-    path("questions/<int:question_id>/answers/",AnswerListPartialView.as_view(),name='answer-list-partial'),
+    path("questions/<int:question_id>/answers/",select_view(AnswerListPartialView, AsyncAnswerListPartialView).as_view(),name='answer-list-partial'),
     path('question/<int:question_id>/', QuestionDetailView.as_view(), name='question_detail'),
+    path('question/<int:question_id>/events/', QuestionEventStreamView.as_view(), name='question-events'),
     path('answer/<int:answer_id>/edit/', AnswerUpdateView.as_view(), name='answer_update'),
     path('answer/<int:answer_id>/delete/', AnswerDeleteView.as_view(), name='answer_delete'),
     path('answers/<int:answer_id>/', AnswerDetailView.as_view(), name='answer_detail'),
-    path('answers/<int:answer_id>/comments/', CommentsPartialListView.as_view(), name='answer-comments-partial'),
+    path('answers/<int:answer_id>/comments/', select_view(CommentsPartialListView, AsyncCommentsPartialListView).as_view(), name='answer-comments-partial'),
+    path('comments/<int:comment_id>/replies/', CommentRepliesPartialView.as_view(), name='comment-replies-partial'),
     path('comment/<int:comment_id>/edit/', CommentUpdateView.as_view(), name='comment_update'),
     path('comment/<int:comment_id>/delete/', CommentDeleteView.as_view(), name='comment_delete'),
-    path('vote/question/<int:object_id>/', QuestionVoteView.as_view(), name='vote_question'),
-    path('vote/answer/<int:object_id>/', AnswerVoteView.as_view(), name='vote_answer'),
-    path('vote/comment/<int:object_id>/', CommentVoteView.as_view(), name='vote_comment'),
+    path('tags/', TagAutocompleteView.as_view(), name='tag_autocomplete'),
+    path('vote/<slug:model_label>/<int:object_id>/', select_view(VoteView, AsyncVoteView).as_view(), name='vote'),
+    path('async/questions/<int:question_id>/answers/', AsyncAnswerListPartialView.as_view(), name='answer-list-partial-async'),
+    path('async/answers/<int:answer_id>/comments/', AsyncCommentsPartialListView.as_view(), name='answer-comments-partial-async'),
+    path('async/vote/<slug:model_label>/<int:object_id>/', AsyncVoteView.as_view(), name='vote-async'),
 ]
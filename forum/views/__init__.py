@@ -12,12 +12,19 @@ from forum.views.answer import (
     AnswerDeleteView,
     AnswerDetailView,
     AnswerListPartialView,
+    AsyncAnswerListPartialView,
 )
 
 from forum.views.comment import (
     CommentUpdateView,
     CommentDeleteView,
     CommentsPartialListView,
+    CommentRepliesPartialView,
+    AsyncCommentsPartialListView,
 )
 
-from forum.views.vote import QuestionVoteView,AnswerVoteView,CommentVoteView
+from forum.views.live import QuestionEventStreamView
+
+from forum.views.tag import TagAutocompleteView
+
+from forum.views.vote import AsyncVoteView, VoteView
@@ -1,18 +1,28 @@
-from django.shortcuts import get_object_or_404, redirect
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect
 from django.views.generic import CreateView, UpdateView, DeleteView, DetailView
 from django.urls import reverse_lazy
-from django.db.models import Count, Q
+from django.db.models import F
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import redirect_to_login
 from django_filters.views import FilterView
 
 from forum.models import Answer, Question,Vote
 from forum.forms import AnswerForm, CommentForm
-from forum.views.mixins import AuthorRequiredMixin
+from forum.domain.live import live_updates_enabled
+from forum.domain.validators import aanswer_list_state, answer_list_state, answer_state
+from forum.domain.vote import aattach_user_votes, attach_user_votes
+from forum.views.mixins import (
+    AsyncFilteredListView,
+    AuthorRequiredMixin,
+    ConditionalGetMixin,
+    CursorPaginationMixin,
+    LockRetryMixin,
+    ReadReplicaMixin,
+)
 from forum.filters import AnswerFilter
 from django.contrib.contenttypes.models import ContentType
 
-class AnswerCreateView(LoginRequiredMixin, CreateView):
+class AnswerCreateView(LoginRequiredMixin, LockRetryMixin, CreateView):
     model = Answer
     form_class = AnswerForm
     template_name = "forum/answer_form.html"
@@ -35,7 +45,7 @@ class AnswerCreateView(LoginRequiredMixin, CreateView):
         return context
 
 
-class AnswerUpdateView(LoginRequiredMixin, AuthorRequiredMixin, UpdateView):
+class AnswerUpdateView(LoginRequiredMixin, AuthorRequiredMixin, LockRetryMixin, UpdateView):
     model = Answer
     form_class = AnswerForm
     template_name = "forum/answer_update_form.html"
@@ -50,7 +60,7 @@ class AnswerUpdateView(LoginRequiredMixin, AuthorRequiredMixin, UpdateView):
         return context
 
 
-class AnswerDeleteView(LoginRequiredMixin, AuthorRequiredMixin, DeleteView):
+class AnswerDeleteView(LoginRequiredMixin, AuthorRequiredMixin, LockRetryMixin, DeleteView):
     model = Answer
     template_name = "forum/answer_confirm_delete.html"
     pk_url_kwarg = 'answer_id'
@@ -64,16 +74,21 @@ class AnswerDeleteView(LoginRequiredMixin, AuthorRequiredMixin, DeleteView):
         return context
 
 
-class AnswerDetailView(DetailView):
+class AnswerDetailView(ReadReplicaMixin, ConditionalGetMixin, LockRetryMixin, DetailView):
     model = Answer
     template_name = "forum/answer_detail.html"
     pk_url_kwarg = 'answer_id'
     context_object_name = 'answer'
+
+    def get_validator_state(self):
+        return answer_state(self.kwargs["answer_id"], self.request.user)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         answer = self.object
         context.update(self.get_answer_vote_context(answer))
         context["question"] = answer.question
+        context["live_updates"] = live_updates_enabled()
         return context
 
     def get_answer_vote_context(self, answer):
@@ -103,29 +118,59 @@ class AnswerDetailView(DetailView):
         context = self.get_context_data(comment_form=form)
         return self.render_to_response(context)
 
-class AnswerListPartialView(FilterView):
+def answer_card_queryset(question):
+    return (
+        question.answers.select_related("author")
+        .annotate(
+            upvotes=F("upvote_count"),
+            downvotes=F("downvote_count"),
+        )
+        .order_by("-created_at")
+    )
+
+
+class AnswerListPartialView(ReadReplicaMixin, ConditionalGetMixin, CursorPaginationMixin, FilterView):
     model = Answer
     template_name = "forum/partials/answer_list.html"
+    cursor_template_name = "forum/partials/answer_items.html"
     context_object_name = "answers"
     paginate_by = 3
     filterset_class = AnswerFilter
 
+    def get_validator_state(self):
+        return answer_list_state(self.kwargs["question_id"], self.request.user)
+
     def get_queryset(self):
         self.question = get_object_or_404(
             Question,
             pk=self.kwargs["question_id"]
         )
-        return (
-            self.question.answers.select_related("author")
-            .annotate(
-                upvotes=Count("votes", filter=Q(votes__vote_type=1)),
-                downvotes=Count("votes", filter=Q(votes__vote_type=-1)),
-            )
-            .order_by("-created_at")
-        )
+        return answer_card_queryset(self.question)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        attach_user_votes(context["object_list"], self.request.user)
         context["htmx_target"] = "#answer-list"
         return context
 
+
+class AsyncAnswerListPartialView(ReadReplicaMixin, ConditionalGetMixin, AsyncFilteredListView):
+    """ASGI-native ``AnswerListPartialView`` rendering the same templates and context."""
+
+    template_name = AnswerListPartialView.template_name
+    cursor_template_name = AnswerListPartialView.cursor_template_name
+    context_object_name = AnswerListPartialView.context_object_name
+    paginate_by = AnswerListPartialView.paginate_by
+    filterset_class = AnswerFilter
+
+    async def aget_validator_state(self):
+        return await aanswer_list_state(self.kwargs["question_id"], self.request.user)
+
+    async def aget_queryset(self):
+        self.question = await aget_object_or_404(Question, pk=self.kwargs["question_id"])
+        return answer_card_queryset(self.question)
+
+    async def aget_extra_context(self, objects):
+        await aattach_user_votes(objects, self.request.user)
+        return {"htmx_target": "#answer-list"}
+
@@ -1,19 +1,30 @@
-from django.views.generic import UpdateView, DeleteView
+from asgiref.sync import sync_to_async
+from django.views.generic import DetailView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django_filters.views import FilterView
 
 from forum.models import Comment, Answer
 from forum.forms import CommentForm
-from forum.views.mixins import AuthorRequiredMixin
+from forum.domain.comments import aattach_reply_previews, attach_reply_previews, load_comment_subtree
+from forum.domain.validators import acomment_list_state, comment_list_state
+from forum.domain.vote import aattach_user_votes, attach_user_votes
+from forum.views.mixins import (
+    AsyncFilteredListView,
+    AuthorRequiredMixin,
+    ConditionalGetMixin,
+    CursorPaginationMixin,
+    LockRetryMixin,
+    ReadReplicaMixin,
+)
 from forum.filters import CommentFilter
 
-from django.shortcuts import get_object_or_404
-from django.db.models import Count, Q
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.db.models import F
 from django.contrib.contenttypes.models import ContentType
 
 
-class CommentUpdateView(LoginRequiredMixin, AuthorRequiredMixin, UpdateView):
+class CommentUpdateView(LoginRequiredMixin, AuthorRequiredMixin, LockRetryMixin, UpdateView):
     model = Comment
     form_class = CommentForm
     template_name = "forum/comment_update_form.html"
@@ -30,7 +41,7 @@ class CommentUpdateView(LoginRequiredMixin, AuthorRequiredMixin, UpdateView):
         return context
 
 
-class CommentDeleteView(LoginRequiredMixin, AuthorRequiredMixin, DeleteView):
+class CommentDeleteView(LoginRequiredMixin, AuthorRequiredMixin, LockRetryMixin, DeleteView):
     model = Comment
     template_name = "forum/comment_confirm_delete.html"
     pk_url_kwarg = 'comment_id'
@@ -45,35 +56,91 @@ class CommentDeleteView(LoginRequiredMixin, AuthorRequiredMixin, DeleteView):
         context['cancel_url'] = reverse_lazy('answer_detail', kwargs={'answer_id': answer.pk})
         return context
 
-class CommentsPartialListView(FilterView):
+def comment_card_queryset():
+    return Comment.objects.select_related("author").annotate(
+        upvotes=F("upvote_count"),
+        downvotes=F("downvote_count"),
+    )
+
+
+def answer_comments_queryset(answer):
+    return comment_card_queryset().filter(
+        content_type=ContentType.objects.get_for_model(Answer),
+        object_id=answer.pk,
+    )
+
+
+class CommentsPartialListView(ReadReplicaMixin, ConditionalGetMixin, CursorPaginationMixin, FilterView):
     model = Comment
     template_name = "forum/partials/comment_list.html"
+    cursor_template_name = "forum/partials/comment_items.html"
     context_object_name = "comments"
     paginate_by = 3
     filterset_class = CommentFilter
 
-    def dispatch(self, request, *args, **kwargs):
-        self.answer = get_object_or_404(Answer, pk=self.kwargs.get("answer_id"))
-        return super().dispatch(request, *args, **kwargs)
+    def get_validator_state(self):
+        return comment_list_state(self.kwargs["answer_id"], self.request.user)
 
     def get_queryset(self):
-        return (
-            Comment.objects.filter(
-                content_type=ContentType.objects.get_for_model(Answer),
-                object_id=self.answer.pk,
-                parent__isnull=True,
-            )
-            .select_related("author")
-            .annotate(
-                upvotes=Count("votes", filter=Q(votes__vote_type=1)),
-                downvotes=Count("votes", filter=Q(votes__vote_type=-1)),
-            )
-            .order_by("-created_at")
-        )
+        self.answer = get_object_or_404(Answer, pk=self.kwargs.get("answer_id"))
+        return answer_comments_queryset(self.answer).filter(parent__isnull=True).order_by("-created_at")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        comments = list(context["object_list"])
+        replies = attach_reply_previews(comments, answer_comments_queryset(self.answer))
+        attach_user_votes(comments + replies, self.request.user)
         context["htmx_target"] = "#comment-list"
         context["partial_url"] = self.request.path
         context["answer"] = self.answer
         return context
+
+
+class AsyncCommentsPartialListView(ReadReplicaMixin, ConditionalGetMixin, AsyncFilteredListView):
+    """ASGI-native ``CommentsPartialListView`` rendering the same templates and context."""
+
+    template_name = CommentsPartialListView.template_name
+    cursor_template_name = CommentsPartialListView.cursor_template_name
+    context_object_name = CommentsPartialListView.context_object_name
+    paginate_by = CommentsPartialListView.paginate_by
+    filterset_class = CommentFilter
+
+    async def aget_validator_state(self):
+        return await acomment_list_state(self.kwargs["answer_id"], self.request.user)
+
+    async def aget_queryset(self):
+        self.answer = await aget_object_or_404(Answer, pk=self.kwargs.get("answer_id"))
+        await sync_to_async(ContentType.objects.get_for_model)(Answer)
+        return answer_comments_queryset(self.answer).filter(parent__isnull=True).order_by("-created_at")
+
+    async def aget_extra_context(self, objects):
+        replies = await aattach_reply_previews(objects, answer_comments_queryset(self.answer))
+        await aattach_user_votes(objects + replies, self.request.user)
+        return {
+            "htmx_target": "#comment-list",
+            "partial_url": self.request.path,
+            "answer": self.answer,
+        }
+
+
+class CommentRepliesPartialView(ReadReplicaMixin, DetailView):
+    """Every reply below one comment, loaded with a single path range query."""
+
+    template_name = "forum/partials/comment_replies.html"
+    pk_url_kwarg = "comment_id"
+    context_object_name = "comment"
+
+    def get_queryset(self):
+        return comment_card_queryset()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        replies = load_comment_subtree(
+            self.object,
+            comment_card_queryset().filter(
+                content_type_id=self.object.content_type_id,
+                object_id=self.object.object_id,
+            ),
+        )
+        attach_user_votes(replies, self.request.user)
+        return context
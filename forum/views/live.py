@@ -0,0 +1,29 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.views import View
+
+from forum.domain.live import live_updates_enabled, question_channel, stream_events
+from forum.models import Question
+
+
+class QuestionEventStreamView(View):
+    """Server-Sent Events stream of vote-count and new-answer/comment updates for one question.
+
+    The stream stays open for as long as the page does, so it is only served
+    through the ASGI application with ``FORUM_LIVE_UPDATES`` on. Otherwise it
+    answers 204, which tells EventSource clients to stop reconnecting; under
+    WSGI an endless stream would hold a worker without ever sending a byte.
+    """
+
+    http_method_names = ["get"]
+
+    async def get(self, request, *args, **kwargs):
+        if not live_updates_enabled() or not isinstance(request, ASGIRequest):
+            return HttpResponse(status=204)
+        question = await aget_object_or_404(Question.objects.only("pk"), pk=kwargs["question_id"])
+        return StreamingHttpResponse(
+            stream_events(question_channel(question.pk)),
+            content_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
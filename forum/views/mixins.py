@@ -1,6 +1,239 @@
+import hashlib
+
 from django.contrib.auth.mixins import UserPassesTestMixin
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404
+from django.middleware.csrf import get_token
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from django.views import View
+
+from forum.pagination import CursorPaginator
+from forum.domain.retry import retry_on_lock
+from forum.routers import SAFE_METHODS, read_alias_for, read_from
 
 class AuthorRequiredMixin(UserPassesTestMixin):
     def test_func(self):
         obj = self.get_object()
         return self.request.user == obj.author
+
+
+class LockRetryMixin:
+    """Run write requests in one transaction, retried with backoff on database lock contention.
+
+    A retry runs the whole ``dispatch`` again, so side effects outside the
+    database (flash messages, notifications) must wait for the commit with
+    ``transaction.on_commit``; hooks of a rolled-back attempt are discarded.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        return retry_on_lock(super().dispatch)(request, *args, **kwargs)
+
+
+class ReadReplicaMixin:
+    """Serve safe requests from a read replica unless the client is pinned to the primary.
+
+    Template responses are rendered inside the routed block so that lazy
+    querysets evaluated by the template read from the same database.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        alias = read_alias_for(request)
+        if alias is None:
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return self.adispatch_from(alias, request, *args, **kwargs)
+        with read_from(alias):
+            return self.render_response(super().dispatch(request, *args, **kwargs))
+
+    async def adispatch_from(self, alias, request, *args, **kwargs):
+        with read_from(alias):
+            return self.render_response(await super().dispatch(request, *args, **kwargs))
+
+    def render_response(self, response):
+        if callable(getattr(response, "render", None)) and not response.is_rendered:
+            response.render()
+        return response
+
+
+class ConditionalGetMixin:
+    """Answer GET/HEAD with 304 Not Modified while the view's validator state is unchanged.
+
+    Subclasses implement ``get_validator_state`` with one cheap query (see
+    ``forum.domain.validators``); it runs before the view's own queries, so
+    an unchanged page costs that query and nothing else. Validators are
+    per user because the vote buttons, author controls and navbar differ,
+    and per CSRF secret because every page embeds a token: logging in again
+    rotates the secret, and a 304 would leave the browser posting a stale
+    token. For the same reason there is no Last-Modified; a date cannot
+    tell that the token changed.
+
+    Async views implement ``aget_validator_state`` instead and get the same
+    handling from ``adispatch_conditional``.
+    """
+
+    def get_validator_state(self):
+        raise NotImplementedError
+
+    async def aget_validator_state(self):
+        raise NotImplementedError
+
+    def get_etag(self):
+        return self.etag_from(self.get_validator_state())
+
+    def etag_from(self, state):
+        if state is None:
+            return None
+        user = self.request.user
+        variant = f"user:{user.pk}:{user.get_username()}" if user.is_authenticated else "anonymous"
+        # Hands out the secret now on a first visit so the page renders with the one hashed here.
+        get_token(self.request)
+        csrf_secret = self.request.META["CSRF_COOKIE"]
+        digest = hashlib.md5(
+            repr((type(self).__name__, variant, csrf_secret, state)).encode(), usedforsecurity=False
+        )
+        return quote_etag(digest.hexdigest())
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return self.adispatch_conditional(request, *args, **kwargs)
+        etag = self.get_etag()
+        if etag is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return self.add_validator_headers(not_modified, etag)
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            self.add_validator_headers(response, etag)
+        return response
+
+    async def adispatch_conditional(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        etag = self.etag_from(await self.aget_validator_state())
+        if etag is None:
+            return await super().dispatch(request, *args, **kwargs)
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return self.add_validator_headers(not_modified, etag)
+        response = await super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            self.add_validator_headers(response, etag)
+        return response
+
+    def add_validator_headers(self, response, etag):
+        response.headers.setdefault("ETag", etag)
+        # Always revalidate; the validators make that cheap.
+        patch_cache_control(response, no_cache=True, private=self.request.user.is_authenticated)
+        patch_vary_headers(response, ("Cookie",))
+        return response
+
+
+class CursorPaginationMixin:
+    """Serve a ListView/FilterView with keyset pagination when a cursor is requested.
+
+    The classic numbered paginator stays the default; views opt in per
+    request through ``use_cursor_pagination``. Follow-up pages (a non-empty
+    cursor) render ``cursor_template_name`` so they can be appended in place.
+    """
+
+    cursor_query_param = "cursor"
+    cursor_template_name = None
+
+    def use_cursor_pagination(self):
+        return self.cursor_query_param in self.request.GET
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = CursorPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_query_param))
+        except InvalidPage as exc:
+            raise Http404(str(exc))
+        return (paginator, page, page.object_list, page.has_next())
+
+    def get_template_names(self):
+        if self.cursor_template_name and self.request.GET.get(self.cursor_query_param):
+            return [self.cursor_template_name]
+        return super().get_template_names()
+
+
+class AsyncFilteredListView(View):
+    """ASGI-native counterpart of a ``CursorPaginationMixin`` + ``FilterView`` partial.
+
+    Subclasses provide ``aget_queryset`` and ``aget_extra_context``. The
+    filterset and paginator are the same ones the sync views use, but every
+    query runs on the async ORM and the page is fully loaded before the
+    template renders, so no step goes through the sync bridge.
+    """
+
+    filterset_class = None
+    template_name = None
+    cursor_template_name = None
+    context_object_name = None
+    paginate_by = None
+    cursor_query_param = "cursor"
+
+    async def aget_queryset(self):
+        raise NotImplementedError
+
+    async def aget_extra_context(self, objects):
+        return {}
+
+    def filter_queryset(self, queryset):
+        filterset = self.filterset_class(self.request.GET or None, queryset=queryset, request=self.request)
+        # Same rule as FilterView in strict mode: an invalid filter shows nothing.
+        if not filterset.is_bound or filterset.is_valid():
+            return filterset, filterset.qs
+        return filterset, filterset.queryset.none()
+
+    async def apaginate_queryset(self, queryset):
+        if self.cursor_query_param in self.request.GET:
+            paginator = CursorPaginator(queryset, self.paginate_by)
+            try:
+                page = await paginator.apage(self.request.GET.get(self.cursor_query_param))
+            except InvalidPage as exc:
+                raise Http404(str(exc))
+            return paginator, page, page.has_next()
+
+        paginator = Paginator(queryset, self.paginate_by)
+        paginator.count = await queryset.acount()
+        page_number = self.request.GET.get("page") or 1
+        if page_number == "last":
+            page_number = paginator.num_pages
+        try:
+            page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise Http404(str(exc))
+        page.object_list = [obj async for obj in page.object_list]
+        return paginator, page, page.has_other_pages()
+
+    def get_template_name(self):
+        if self.cursor_template_name and self.request.GET.get(self.cursor_query_param):
+            return self.cursor_template_name
+        return self.template_name
+
+    async def get(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        filterset, queryset = self.filter_queryset(await self.aget_queryset())
+        paginator, page, is_paginated = await self.apaginate_queryset(queryset)
+        objects = list(page.object_list)
+        context = {
+            "filter": filterset,
+            "paginator": paginator,
+            "page_obj": page,
+            "is_paginated": is_paginated,
+            "object_list": objects,
+            self.context_object_name: objects,
+        }
+        context.update(await self.aget_extra_context(objects))
+        return render(request, self.get_template_name(), context)
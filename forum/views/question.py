@@ -1,53 +1,66 @@
 from django.views.generic import CreateView, UpdateView, DeleteView, DetailView
-from django.db.models import Sum, Count, Q
+from django.db.models import F
 from django.urls import reverse_lazy
 from django.core.paginator import Paginator
 import json
 
 from forum.models import Question
 from forum.forms import QuestionForm
-from forum.views.mixins import AuthorRequiredMixin
+from forum.domain.vote import attach_user_votes
+from forum.domain.duplicates import find_duplicates
+from forum.domain.live import live_updates_enabled
+from forum.domain.related import related_questions
+from forum.domain.tags import get_tag_cloud, get_tags_by_ids
+from forum.domain.validators import question_state
+from forum.views.mixins import (
+    AuthorRequiredMixin,
+    ConditionalGetMixin,
+    CursorPaginationMixin,
+    LockRetryMixin,
+    ReadReplicaMixin,
+)
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django_filters.views import FilterView
 from ..filters import QuestionFilter
-from taggit.models import Tag
 
 
-class QuestionListView(FilterView):
+class QuestionListView(ReadReplicaMixin, CursorPaginationMixin, FilterView):
     model = Question
     template_name = 'forum/question_list.html'
     context_object_name = 'questions'
     paginate_by = 10
     filterset_class = QuestionFilter
 
+    def use_cursor_pagination(self):
+        # Anonymous visitors only get "load more", so skip the COUNT query for them.
+        if not self.request.user.is_authenticated and 'page' not in self.request.GET:
+            return True
+        return super().use_cursor_pagination()
+
     def get_queryset(self):
-        return Question.objects.annotate(
-            total_votes=Sum('votes__vote_type', default=0),
-            upvotes=Count('votes', filter=Q(votes__vote_type=1)),
-            downvotes=Count('votes', filter=Q(votes__vote_type=-1)),
+        return Question.objects.select_related('author').prefetch_related('tags').annotate(
+            total_votes=F('score'),
+            upvotes=F('upvote_count'),
+            downvotes=F('downvote_count'),
         ).order_by('-created_at')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['tags_json'] = self.get_tags_as_json()
-        context['selected_tag_ids'] = self.get_selected_tag_ids_as_json()
+        attach_user_votes(context['object_list'], self.request.user)
+        context['selected_tags_json'] = self.get_selected_tags_as_json()
+        context['tag_cloud'] = get_tag_cloud()
         return context
 
-    def get_tags_as_json(self):
-        tags_queryset = Tag.objects.all().order_by('name')
-        tags_data = [{'id': tag.id, 'name': tag.name} for tag in tags_queryset]
-        return json.dumps(tags_data)
-
-    def get_selected_tag_ids_as_json(self):
+    def get_selected_tags_as_json(self):
         selected_tag_ids = [
             int(tag_id)
             for tag_id in self.request.GET.getlist('tag')
             if tag_id.isdigit()
         ]
-        return json.dumps(selected_tag_ids)
+        return json.dumps(get_tags_by_ids(selected_tag_ids))
 
 
-class QuestionCreateView(LoginRequiredMixin, CreateView):
+class QuestionCreateView(LoginRequiredMixin, LockRetryMixin, CreateView):
     model = Question
     form_class = QuestionForm
     template_name = 'forum/question_form.html'
@@ -56,10 +69,15 @@ class QuestionCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.author = self.request.user
+        # Offer likely duplicates once; resubmitting with "post anyway" saves regardless.
+        if 'post_anyway' not in self.request.POST:
+            duplicates = find_duplicates(form.cleaned_data['title'], form.cleaned_data['description'])
+            if duplicates:
+                return self.render_to_response(self.get_context_data(form=form, duplicates=duplicates))
         return super().form_valid(form)
 
 
-class QuestionUpdateView(LoginRequiredMixin, AuthorRequiredMixin, UpdateView):
+class QuestionUpdateView(LoginRequiredMixin, AuthorRequiredMixin, LockRetryMixin, UpdateView):
     model = Question
     form_class = QuestionForm
     template_name = 'forum/question_edit.html'
@@ -67,7 +85,7 @@ class QuestionUpdateView(LoginRequiredMixin, AuthorRequiredMixin, UpdateView):
     success_url = reverse_lazy('question_list')
 
 
-class QuestionDeleteView(LoginRequiredMixin, AuthorRequiredMixin, DeleteView):
+class QuestionDeleteView(LoginRequiredMixin, AuthorRequiredMixin, LockRetryMixin, DeleteView):
     model = Question
     template_name = 'forum/question_confirm_delete.html'
     context_object_name = 'question'
@@ -75,16 +93,21 @@ class QuestionDeleteView(LoginRequiredMixin, AuthorRequiredMixin, DeleteView):
     success_url = reverse_lazy('question_list')
 
 
-class QuestionDetailView(DetailView):
+class QuestionDetailView(ReadReplicaMixin, ConditionalGetMixin, DetailView):
     model = Question
     template_name = "forum/question_detail.html"
     context_object_name = "question"
     pk_url_kwarg = 'question_id'
 
+    def get_validator_state(self):
+        return question_state(self.kwargs["question_id"], self.request.user)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        question = self.get_object()
+        question = self.object
         context.update(self.get_question_vote_context(question))
+        context["related_questions"] = related_questions(question.pk)
+        context["live_updates"] = live_updates_enabled()
         return context
 
     def get_question_vote_context(self, question):
@@ -0,0 +1,19 @@
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+
+from forum.domain.tags import get_tag_catalog, search_tags
+
+
+class TagAutocompleteView(View):
+    """Paged tag lookup for the tag picker; `?all=1` returns the whole cached catalog."""
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get("all"):
+            return HttpResponse(get_tag_catalog()["json"], content_type="application/json")
+
+        try:
+            page = max(int(request.GET.get("page", 1)), 1)
+        except ValueError:
+            page = 1
+        tags, has_more = search_tags(request.GET.get("q", ""), page=page)
+        return JsonResponse({"results": tags, "page": page, "has_more": has_more})
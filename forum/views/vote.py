@@ -1,59 +1,64 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404, JsonResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from django.views import View
-from django.contrib.contenttypes.models import ContentType
-from django.shortcuts import get_object_or_404
-from forum.models import Question, Answer, Comment, Vote
-from forum.domain.vote import update_votes
-
-class QuestionVoteView(LoginRequiredMixin, View):
-    def get(self, request, *args, **kwargs):
-        object_id = kwargs.get("object_id")
-        vote_type = request.GET.get("vote_type")
-        vote_type = int(vote_type)
-        content_type = ContentType.objects.get_for_model(Question)
-
-        vote, created = Vote.objects.get_or_create(
-            user=request.user,
-            content_type=content_type,
-            object_id=object_id,
-            defaults={"vote_type": vote_type},
-        )
-        question=get_object_or_404(Question, pk=object_id)
-
-        return update_votes(request,question,vote_type, vote=vote, created=created)
-
-
-class AnswerVoteView(LoginRequiredMixin, View):
-    def get(self, request, *args, **kwargs):
-        object_id = kwargs.get("object_id")
-        vote_type = request.GET.get("vote_type")
-        vote_type = int(vote_type)
-        content_type = ContentType.objects.get_for_model(Answer)
-
-        vote, created = Vote.objects.get_or_create(
-            user=request.user,
-            content_type=content_type,
-            object_id=object_id,
-            defaults={"vote_type": vote_type},
-        )
-        answer=get_object_or_404(Answer, pk=object_id)
-
-        return update_votes(request,answer,vote_type, vote=vote, created=created)
-
-
-class CommentVoteView(LoginRequiredMixin, View):
-    def get(self, request, *args, **kwargs):
-        object_id = kwargs.get("object_id")
-        vote_type = request.GET.get("vote_type")
-        vote_type = int(vote_type)
-        content_type = ContentType.objects.get_for_model(Comment)
-
-        vote, created = Vote.objects.get_or_create(
-            user=request.user,
-            content_type=content_type,
-            object_id=object_id,
-            defaults={"vote_type": vote_type},
-        )
-        comment=get_object_or_404(Comment, pk=object_id)
-
-        return update_votes(request,comment,vote_type, vote=vote, created=created)
+
+from forum.domain.vote import VOTABLE_MODELS_BY_LABEL, aupdate_votes, update_votes
+from forum.models import Vote
+
+
+class VoteRequestMixin:
+    http_method_names = ["post"]
+
+    def get_vote_model(self):
+        model = VOTABLE_MODELS_BY_LABEL.get(self.kwargs.get("model_label"))
+        if model is None:
+            raise Http404("Unknown vote target.")
+        return model
+
+    def get_vote_type(self):
+        """Return the posted vote type, or None when it is not a valid one."""
+        try:
+            vote_type = int(self.request.POST.get("vote_type", ""))
+        except ValueError:
+            return None
+        return vote_type if vote_type in Vote.VoteType.values else None
+
+    def invalid_vote_type(self):
+        return JsonResponse({"error": "vote_type must be 1 or -1."}, status=400)
+
+
+class VoteView(LoginRequiredMixin, VoteRequestMixin, View):
+    """Toggle the current user's vote on a question, answer or comment.
+
+    The target model comes from the `model_label` URL segment; the response
+    carries the updated counters and the user's resulting vote.
+    """
+
+    def post(self, request, *args, **kwargs):
+        model = self.get_vote_model()
+        vote_type = self.get_vote_type()
+        if vote_type is None:
+            return self.invalid_vote_type()
+
+        model_object = get_object_or_404(model.objects.only("pk", "author_id"), pk=kwargs.get("object_id"))
+        return update_votes(request, model_object, vote_type)
+
+
+class AsyncVoteView(VoteRequestMixin, View):
+    """ASGI-native ``VoteView``: lookups run on the async ORM, so the request only
+    leaves the event loop for the vote transaction itself."""
+
+    async def post(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+
+        model = self.get_vote_model()
+        vote_type = self.get_vote_type()
+        if vote_type is None:
+            return self.invalid_vote_type()
+
+        model_object = await aget_object_or_404(model.objects.only("pk", "author_id"), pk=kwargs.get("object_id"))
+        return await aupdate_votes(request, model_object, vote_type)